@@ -0,0 +1,493 @@
+# The MIT License (MIT)
+#
+# Copyright (c) [2015] [Dobri Georgiev]
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Synthetic FilmScribe exports and parse benchmarks.
+
+    python benchmark.py generate big.xml --events 50000
+    python benchmark.py run --events 20000 --output results.json
+    python benchmark.py run --file big.xml --baseline results.json
+    python benchmark.py conformance testdata/filmscribe.xml big.xml
+"""
+
+from xml.sax.saxutils import escape
+from xml.sax.saxutils import quoteattr
+from multiprocessing import Pool
+from collections import OrderedDict
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+import filmscribe
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+__author__ = 'dobri.georgiev'
+
+_TIMES = filmscribe.FilmscribeTimeEngine(24)
+
+_EFFECTS = ('Dissolve', 'Dip to Color', 'Wipe', 'Push', 'Picture-in-Picture')
+_MOTIONS = ('Fit To Fill', 'Strobe', 'Freeze Frame', 'Timewarp')
+_COLORS = ('Red', 'Green', 'Blue', 'Cyan', 'Magenta', 'Yellow', 'White')
+
+
+class FilmscribeGenerator(object):
+    """Writes valid FilmScribe xml of a given shape.
+
+    The output is deterministic for a seed. Cut events follow the layout of
+    testdata/filmscribe.xml, optical events carry Motion or Effect layers
+    with their own sources, and locators are spread over the lists at
+    locator_density per event.
+    """
+
+    def __init__(self, events=1000, assemble_lists=1, optical_lists=1, optical_events=100, locator_density=0.05,
+                 custom_fields=2, layers=2, clips=500, seed=0):
+        """
+
+        :type events: int
+        :param events: Events per assemble list
+        :type assemble_lists: int
+        :type optical_lists: int
+        :type optical_events: int
+        :param optical_events: Events per optical list
+        :type locator_density: float
+        :param locator_density: Locators per event
+        :type custom_fields: int
+        :param custom_fields: Custom records per source
+        :type layers: int
+        :param layers: Layers per optical event
+        :type clips: int
+        :param clips: Number of distinct source clips
+        :type seed: int
+        """
+        self.events = events
+        self.assemble_lists = assemble_lists
+        self.optical_lists = optical_lists
+        self.optical_events = optical_events
+        self.locator_density = locator_density
+        self.custom_fields = custom_fields
+        self.layers = layers
+        self.clips = clips
+        self.seed = seed
+
+    @property
+    def options(self):
+        """
+        :rtype: dict
+        :return: Arguments that reproduce this generator
+        """
+        return OrderedDict((name, getattr(self, name)) for name in (
+            'events', 'assemble_lists', 'optical_lists', 'optical_events', 'locator_density', 'custom_fields',
+            'layers', 'clips', 'seed'))
+
+    def write(self, filename):
+        """
+        :type filename: str
+        :rtype: int
+        :return: Number of events, locators included
+        """
+        random_state = random.Random(self.seed)
+        count = 0
+        with open(filename, 'wb') as outfile:
+            write = outfile.write
+            write('<?xml version="1.0" encoding="UTF-8"?>\n<FilmScribeFile Version="1.0" Date="Oct. 25, 2008">\n')
+            for index in range(self.assemble_lists):
+                count += self.__write_list(write, random_state, 'AssembleList', 'SCENE {0}'.format(index + 1),
+                                           self.events, self.__cut)
+            for index in range(self.optical_lists):
+                count += self.__write_list(write, random_state, 'OpticalList', 'OPTICALS {0}'.format(index + 1),
+                                           self.optical_events, self.__optical)
+            write('</FilmScribeFile>\n')
+        return count
+
+    def __write_list(self, write, random_state, tag, title, events, write_event):
+        lengths = [random_state.randint(12, 400) for _ in range(events)]
+        duration = sum(lengths)
+        write('    <{0}>\n        <ListHead>\n'.format(tag))
+        write('            <Title>{0}</Title>\n            <Tracks>V1</Tracks>\n'.format(escape(title)))
+        write('            <EventCount>{0}</EventCount>\n'.format(events))
+        write('            <OpticalCount>{0}</OpticalCount>\n'.format(events if tag == 'OpticalList' else 0))
+        write('            <DupeCount>0</DupeCount>\n            <MasterDuration>\n')
+        write('                <FrameCount>{0}</FrameCount>\n'.format(duration))
+        write('                <Edgecode Type="35mm 4p">{0}</Edgecode>\n'.format(_TIMES.frames_to_edgecode(duration)))
+        write('                <Timecode Type="TC1">{0}</Timecode>\n'.format(_TIMES.frames_to_timecode(duration)))
+        write('            </MasterDuration>\n            <EditRate>24</EditRate>\n        </ListHead>\n')
+        write('        <Events>\n')
+        count = 0
+        frame = 86400
+        for number, length in enumerate(lengths, 1):
+            write_event(write, random_state, number, frame, length)
+            count += 1
+            if random_state.random() < self.locator_density:
+                self.__locator(write, random_state, frame + random_state.randrange(length))
+                count += 1
+            frame += length
+        write('        </Events>\n    </{0}>\n'.format(tag))
+        return count
+
+    @staticmethod
+    def __time(write, indent, tag, frame, edgecode=True):
+        write('{0}<{1}>\n'.format(indent, tag))
+        write('{0}    <Timecode Type="TC1">{1}</Timecode>\n'.format(indent, _TIMES.frames_to_timecode(frame)))
+        if edgecode:
+            write('{0}    <Edgecode Type="35mm 4p">{1}</Edgecode>\n'.format(indent, _TIMES.frames_to_edgecode(frame)))
+        write('{0}    <Frame>{1}</Frame>\n{0}</{2}>\n'.format(indent, frame, tag))
+
+    def __master(self, write, indent, frame, length):
+        write('{0}<Master>\n{0}    <Reel/>\n'.format(indent))
+        self.__time(write, indent + '    ', 'Start', frame)
+        self.__time(write, indent + '    ', 'End', frame + length - 1)
+        write('{0}</Master>\n'.format(indent))
+
+    def __source(self, write, random_state, indent, length):
+        clip = random_state.randrange(self.clips)
+        start = random_state.randrange(1000, 500000)
+        scene = '{0}{1}'.format(clip // 10 + 1, 'ABCDEFGHIJ'[clip % 10])
+        take = clip % 7 + 1
+        inner = indent + '    '
+        write('{0}<Source>\n'.format(indent))
+        write('{0}<ClipName>{1}/{2}</ClipName>\n'.format(inner, scene, take))
+        write('{0}<MobID>060a2b340101010101010f00-13-00-00-00-{{3fef{1:04x}-4e20-000a-060e2b347f7f2a80}}</MobID>\n'
+              .format(inner, clip))
+        for tag, point in (('Start', start), ('End', start + length - 1)):
+            write('{0}<{1}>\n{0}    <Frame>{2}</Frame>\n'.format(inner, tag, point))
+            write('{0}    <Edgecode Type="KeyNum">{1}</Edgecode>\n'.format(
+                inner, _TIMES.frames_to_edgecode(point, 'EH {0:02d}'.format(clip % 100))))
+            write('{0}</{1}>\n'.format(inner, tag))
+        write('{0}<TapeName>T{1:03d}</TapeName>\n'.format(inner, clip // 25))
+        write('{0}<LabRoll>{1:06d}</LabRoll>\n{0}<CamRoll>{2}</CamRoll>\n'.format(inner, clip // 5, 100 + clip // 8))
+        write('{0}<SceneTake>{1}/{2}/{2}</SceneTake>\n'.format(inner, scene, take))
+        for index in range(self.custom_fields):
+            name = ('Scene', 'Take', 'Camera', 'Lens', 'Notes')[index % 5] + ('' if index < 5 else str(index))
+            write('{0}<Custom Name={1}>{2}</Custom>\n'.format(inner, quoteattr(name), escape(
+                '{0} {1}'.format(scene, random_state.randrange(10)))))
+        write('{0}</Source>\n'.format(indent))
+
+    def __cut(self, write, random_state, number, frame, length):
+        indent = ' ' * 16
+        write('            <Event Num="{0}" Type="Cut" Length="{1}" SourceCount="1">\n'.format(number, length))
+        self.__master(write, indent, frame, length)
+        self.__source(write, random_state, indent, length)
+        write('            </Event>\n')
+
+    def __optical(self, write, random_state, number, frame, length):
+        indent = ' ' * 16
+        write('            <Event Num="{0}" Type="Optical" Length="{1}" SourceCount="{2}" RefNum="{0}" '
+              'Reference="OPT {0}">\n'.format(number, length, self.layers))
+        self.__master(write, indent, frame, length)
+        for layer in range(1, self.layers + 1):
+            write('{0}<Layer Num="{1}">\n'.format(indent, layer))
+            if layer == 1:
+                write('{0}    <Motion Type={1} Factor="{2}"/>\n'.format(
+                    indent, quoteattr(random_state.choice(_MOTIONS)), random_state.choice((0.5, 1.0, 2.0))))
+            else:
+                write('{0}    <Effect Type={1}/>\n'.format(indent, quoteattr(random_state.choice(_EFFECTS))))
+            self.__source(write, random_state, indent + '    ', length)
+            write('{0}</Layer>\n'.format(indent))
+        write('            </Event>\n')
+
+    @staticmethod
+    def __locator(write, random_state, frame):
+        write('            <Comment Type="Locator">\n')
+        write('                <Color>{0}</Color>\n'.format(random_state.choice(_COLORS)))
+        write('                <Master>\n')
+        write('                    <Timecode Type="TC1">{0}</Timecode>\n'.format(_TIMES.frames_to_timecode(frame)))
+        write('                    <Frame>{0}</Frame>\n                </Master>\n'.format(frame))
+        write('                <Text>note {0}</Text>\n            </Comment>\n'.format(frame))
+
+
+def _event_count(filmscribe_file):
+    return sum(len(filmscribe_list.events)
+               for filmscribe_list in filmscribe_file.assemble_lists + filmscribe_file.optical_lists)
+
+
+def _bench_from_file(path, binary, **options):
+    return _event_count(filmscribe.FilmscribeFile.from_file(path, **options))
+
+
+def _bench_iter_events(path, binary):
+    return sum(1 for _ in filmscribe.iter_events(path))
+
+
+def _bench_columns(path, binary):
+    return sum(len(columns) for _, columns in filmscribe.FilmscribeColumns.from_file(path))
+
+
+def _bench_from_binary(path, binary):
+    return _event_count(filmscribe.FilmscribeFile.from_binary(binary))
+
+
+def _cases():
+    """Benchmarked entry points, name to (function, keyword arguments)."""
+    cases = OrderedDict()
+    cases['from_file'] = (_bench_from_file, {})
+    for backend in filmscribe.parser_backends():
+        cases['from_file[{0}]'.format(backend)] = (_bench_from_file, {'backend': backend})
+    cases['from_file[convert_times]'] = (_bench_from_file, {'convert_times': True})
+    cases['from_file[fields]'] = (_bench_from_file, {'fields': ('master.start.frame', 'master.end.frame',
+                                                                'source.clip_name')})
+    cases['from_file[heads_only]'] = (_bench_from_file, {'heads_only': True})
+    cases['iter_events'] = (_bench_iter_events, {})
+    cases['columns'] = (_bench_columns, {})
+    cases['from_binary'] = (_bench_from_binary, {})
+    return cases
+
+
+def _rss_bytes():
+    """Current resident set size, 0 where /proc is not available."""
+    if resource is None:
+        return 0
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * resource.getpagesize()
+    except (IOError, OSError, ValueError, IndexError):
+        return 0
+
+
+def _write_binary(task):
+    path, binary = task
+    filmscribe.FilmscribeFile.from_file(path).to_binary(binary)
+
+
+def _run_case(task):
+    """Run one case in a fresh worker process, so its peak RSS is its own."""
+    name, path, binary, repeat = task
+    function, options = _cases()[name]
+    before = _rss_bytes()
+    best = None
+    events = 0
+    for _ in range(repeat):
+        started = time.time()
+        events = function(path, binary, **options)
+        elapsed = time.time() - started
+        best = elapsed if best is None else min(best, elapsed)
+    peak = filmscribe._peak_rss_bytes()
+    size = os.path.getsize(binary if name == 'from_binary' else path)
+    return OrderedDict([
+        ('events', events),
+        ('seconds', round(best, 6)),
+        ('events_per_sec', round(events / best, 1) if best and events else None),
+        ('mb_per_sec', round(size / best / 1e6, 3) if best else None),
+        ('peak_rss_mb', round(peak / 1e6, 3)),
+        ('peak_rss_delta_mb', round(max(0, peak - before) / 1e6, 3) if before else None),
+    ])
+
+
+def run(path, repeat=3, names=None):
+    """Benchmark the parse entry points on path.
+
+    Memory is the peak resident set size of a fresh process per case, which
+    works on Python 2 where tracemalloc does not exist, and counts the
+    memory of the parser libraries as well.
+
+    :type path: str
+    :type repeat: int
+    :param repeat: Runs per case, the fastest is reported
+    :type names: list of str or None
+    :param names: Cases to run, all by default
+    :rtype: collections.OrderedDict
+    """
+    names = names or list(_cases())
+    unknown = [name for name in names if name not in _cases()]
+    if unknown:
+        raise ValueError('Unknown cases {0}, use any of {1}'.format(', '.join(unknown), ', '.join(_cases())))
+
+    workdir = tempfile.mkdtemp(prefix='filmscribe-bench-')
+    try:
+        binary = os.path.join(workdir, 'list.fsb')
+        results = OrderedDict()
+        # Every case runs in its own process, and so does the conversion, so
+        # the workers do not start out with the memory of an earlier parse.
+        for name, function, task in [(None, _write_binary, (path, binary))] + [
+                (name, _run_case, (name, path, binary, repeat)) for name in names]:
+            pool = Pool(1)
+            try:
+                result = pool.apply(function, (task,))
+            finally:
+                pool.terminate()
+                pool.join()
+            if name is None:
+                continue
+            results[name] = result
+            sys.stderr.write('{0:28} {1[events_per_sec]:>12} events/s {1[mb_per_sec]:>9} MB/s '
+                             '{1[peak_rss_mb]:>9} MB peak\n'.format(name, result))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results, baseline, threshold=0.1):
+    """Cases slower or larger than in baseline by more than threshold.
+
+    :type results: dict
+    :param results: Output of run
+    :type baseline: dict
+    :param baseline: Output of an earlier run
+    :type threshold: float
+    :param threshold: Tolerated relative change
+    :rtype: list of (str, str, float, float)
+    :return: (case, metric, baseline value, value) of every regression
+    """
+    regressions = []
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        for metric, higher_is_better in (('events_per_sec', True), ('peak_rss_mb', False)):
+            old, new = before.get(metric), result.get(metric)
+            if not old or new is None:
+                continue
+            change = (old - new) / float(old) if higher_is_better else (new - old) / float(old)
+            if change > threshold:
+                regressions.append((name, metric, old, new))
+    return regressions
+
+
+def conformance(paths, backends=None):
+    """Paths on which the parser backends do not build identical models.
+
+    Models are compared through their binary encoding, which covers every
+    field of every event.
+
+    :type paths: list of str
+    :type backends: list of str or None
+    :rtype: list of (str, str)
+    :return: (path, backend) of every mismatch with the first backend
+    """
+    backends = backends or filmscribe.parser_backends()
+    mismatches = []
+    for path in paths:
+        for options in ({}, {'convert_times': True}):
+            encoded = [filmscribe.FilmscribeFile.from_file(path, backend=backend, **options).to_binary()
+                       for backend in backends]
+            mismatches.extend((path, backend) for backend, data in zip(backends, encoded) if data != encoded[0])
+    return mismatches
+
+
+def _add_generator_arguments(parser):
+    parser.add_argument('--events', type=int, default=20000, help='Events per assemble list')
+    parser.add_argument('--assemble-lists', type=int, default=1)
+    parser.add_argument('--optical-lists', type=int, default=1)
+    parser.add_argument('--optical-events', type=int, default=500, help='Events per optical list')
+    parser.add_argument('--locator-density', type=float, default=0.05, help='Locators per event')
+    parser.add_argument('--custom-fields', type=int, default=2, help='Custom records per source')
+    parser.add_argument('--layers', type=int, default=2, help='Layers per optical event')
+    parser.add_argument('--clips', type=int, default=500, help='Distinct source clips')
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def _generator(args):
+    return FilmscribeGenerator(events=args.events, assemble_lists=args.assemble_lists,
+                               optical_lists=args.optical_lists, optical_events=args.optical_events,
+                               locator_density=args.locator_density, custom_fields=args.custom_fields,
+                               layers=args.layers, clips=args.clips, seed=args.seed)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Synthetic FilmScribe exports and parse benchmarks.')
+    commands = parser.add_subparsers(dest='command')
+
+    generate_parser = commands.add_parser('generate', help='Write a synthetic export')
+    generate_parser.add_argument('output')
+    _add_generator_arguments(generate_parser)
+
+    run_parser = commands.add_parser('run', help='Benchmark the parse entry points')
+    run_parser.add_argument('--file', help='Benchmark this export instead of a generated one')
+    run_parser.add_argument('--repeat', type=int, default=3, help='Runs per case, the fastest is reported')
+    run_parser.add_argument('--case', action='append', dest='cases', help='Run only this case, see --list')
+    run_parser.add_argument('--list', action='store_true', help='List the cases and exit')
+    run_parser.add_argument('--output', help='Write the results as JSON')
+    run_parser.add_argument('--baseline', help='JSON results of an earlier run to compare against')
+    run_parser.add_argument('--threshold', type=float, default=0.1, help='Tolerated slowdown or growth')
+    _add_generator_arguments(run_parser)
+
+    conformance_parser = commands.add_parser('conformance', help='Check that every backend builds the same model')
+    conformance_parser.add_argument('paths', nargs='+')
+
+    args = parser.parse_args(argv)
+
+    if args.command == 'generate':
+        events = _generator(args).write(args.output)
+        print '{0}: {1} events, {2} bytes'.format(args.output, events, os.path.getsize(args.output))
+        return 0
+
+    if args.command == 'conformance':
+        mismatches = conformance(args.paths)
+        for path, backend in mismatches:
+            sys.stderr.write('MISMATCH {0}: {1}\n'.format(path, backend))
+        print '{0} files, backends {1}: {2}'.format(len(args.paths), ', '.join(filmscribe.parser_backends()),
+                                                   'mismatch' if mismatches else 'identical')
+        return 1 if mismatches else 0
+
+    if args.list:
+        print '\n'.join(_cases())
+        return 0
+
+    workdir = None
+    try:
+        if args.file:
+            path, source = args.file, OrderedDict([('file', args.file)])
+        else:
+            workdir = tempfile.mkdtemp(prefix='filmscribe-bench-')
+            path = os.path.join(workdir, 'synthetic.xml')
+            generator = _generator(args)
+            generator.write(path)
+            source = generator.options
+        report = OrderedDict([
+            ('python', platform.python_version()),
+            ('platform', platform.platform()),
+            ('created', time.strftime('%Y-%m-%dT%H:%M:%S')),
+            ('input', source),
+            ('bytes', os.path.getsize(path)),
+            ('results', run(path, repeat=args.repeat, names=args.cases)),
+        ])
+    finally:
+        if workdir is not None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as outfile:
+            outfile.write(text + '\n')
+    else:
+        print text
+
+    if args.baseline:
+        with open(args.baseline) as infile:
+            regressions = compare(report['results'], json.load(infile)['results'], args.threshold)
+        for name, metric, old, new in regressions:
+            sys.stderr.write('REGRESSION {0} {1}: {2} -> {3}\n'.format(name, metric, old, new))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -21,11 +21,70 @@
 # SOFTWARE.
 
 from xml.sax import make_parser
+from xml.sax import SAXParseException
+from xml.sax.saxutils import escape
+from xml.sax.saxutils import quoteattr
 from xml.sax.handler import ContentHandler
 from xml.sax.handler import ErrorHandler
-
+from xml.sax.xmlreader import Locator
+from xml.parsers import expat
+from multiprocessing import Pool
+from multiprocessing import cpu_count
+from collections import OrderedDict
+from collections import deque
+from io import BytesIO
+from threading import Lock
+from operator import attrgetter
+from operator import itemgetter
+from itertools import groupby
+from array import array
+from bisect import bisect_left
+from bisect import bisect_right
+
+import argparse
+import glob
+import heapq
+import json
+import mmap
+import os
+import re
+import signal
+import struct
 import sys
+import time
 import traceback
+import zlib
+import bz2
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+try:
+    from lxml import etree
+except ImportError:
+    etree = None
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+try:
+    import sqlite3
+except ImportError:
+    sqlite3 = None
+
+try:
+    import lzma
+except ImportError:
+    lzma = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
 
 __author__ = 'dobri.georgiev'
 
@@ -48,35 +107,266 @@ class FilmscribeBreakException(Exception):
     pass
 
 
-class FilmscribeTime(object):
+class _FilmscribeSlots(object):
+    """Base of the slotted model classes.
+
+    Pickles as a flat tuple of slot values, which keeps worker results of
+    FilmscribeFile.from_files cheap to send back, and does not allocate
+    attributes that are created on first access.
+    """
+    __slots__ = ()
+
+    def __reduce__(self):
+        cls = type(self)
+        names = _SLOT_NAMES.get(cls) or _slot_names(cls)
+        return _restore_slots, (cls, tuple([_peek(self, name, ()) for name in names]))
+
+
+_SLOT_NAMES = {}
+
+
+def _slot_names(cls):
+    names = []
+    for klass in reversed(cls.__mro__):
+        for name in klass.__dict__.get('__slots__', ()):
+            if name.startswith('__') and not name.endswith('__'):
+                name = '_{0}{1}'.format(klass.__name__.lstrip('_'), name)
+            names.append(name)
+    _SLOT_NAMES[cls] = names = tuple(names)
+    return names
+
+
+def _restore_slots(cls, values):
+    # Slots that were never assigned are pickled as ().
+    obj = cls.__new__(cls)
+    for name, value in zip(_SLOT_NAMES.get(cls) or _slot_names(cls), values):
+        if value != ():
+            setattr(obj, name, value)
+    return obj
+
+
+class FilmscribeTime(_FilmscribeSlots):
+    """A point in time as exported by FilmScribe.
+
+    timecode_frames and edgecode_frames hold the integer frame counts of
+    timecode and edgecode once converted by a FilmscribeTimeEngine.
+    """
+    __slots__ = ('frame', 'edgecode', 'timecode', 'timecode_frames', 'edgecode_frames')
+
     def __init__(self):
-        self.__frame = None
-        self.__edgecode = None
-        self.__timecode = None
+        self.frame = None
+        self.edgecode = None
+        self.timecode = None
+        self.timecode_frames = None
+        self.edgecode_frames = None
 
-    @property
-    def frame(self):
-        return self.__frame
 
-    @frame.setter
-    def frame(self, value):
-        self.__frame = value
+_TIMECODE = re.compile(r'^\s*(\d+)[:;.,](\d+)[:;.,](\d+)([:;.,])(\d+)\s*$')
+_EDGECODE = re.compile(r'^\s*(?:(.*?)\s*(\d+)-)?(\d+)\+(\d+)\s*$')
 
-    @property
-    def edgecode(self):
-        return self.__edgecode
+# Nominal rate of the timecode types that name one. TC1, the master timecode,
+# and the source types run at the video rate of the project, see
+# FilmscribeTimeEngine.
+_TIMECODE_RATES = {'TC24': 24, 'TC25': 25, 'TC30': 30, 'Film TC': 24}
 
-    @edgecode.setter
-    def edgecode(self, value):
-        self.__edgecode = value
+# 2:3 pulldown, the video frame every film frame of an A, B, C, D cycle starts
+# on, and the film frame shown first by every video frame of the cycle.
+_PULLDOWN_VIDEO = (0, 1, 3, 4)
+_PULLDOWN_FILM = (0, 1, 1, 2, 3)
 
-    @property
-    def timecode(self):
-        return self.__timecode
 
-    @timecode.setter
-    def timecode(self, value):
-        self.__timecode = value
+class FilmscribeTimeEngine(object):
+    """Converts timecode and edgecode strings to integer frame counts and back.
+
+    Frame counts are always at the edit rate, so they compare with the Frame
+    of a point. Timecode is counted at its own nominal rate, timecode_rate,
+    which defaults to the video rate of the project: 30 for 24 and 23.976
+    fps lists, whose TC1 is 30 fps video timecode with 2:3 pulldown, and the
+    nominal edit rate otherwise. Pulldown timecode maps every 4 film frames
+    to 5 video frames, A frames on the video frames divisible by 5, with the
+    C and D frames on the video frame where their first full field is, as
+    FilmScribe writes them. Timecode is drop-frame when its last separator is
+    ';', '.' or ','.
+
+    Edgecode is feet+frames at frames_per_foot (16 for 35mm 4p). KeyNum
+    edgecode such as 'EH 75 3015-0021+06' counts the 4 digit prefix as the
+    upper digits of the footage, so frame counts keep increasing across a
+    prefix rollover.
+
+    Parsed strings are memoized, use for_rate() to share an engine per edit rate.
+    """
+    MEMO_SIZE = 65536
+
+    __engines = {}
+
+    def __init__(self, edit_rate=24, drop_frame=False, frames_per_foot=16, timecode_rate=None):
+        """
+
+        :type edit_rate: float
+        :param edit_rate: Edit rate of the list, usually FilmscribeListHead.edit_rate
+        :type drop_frame: bool
+        :param drop_frame: Write drop-frame timecode from frames_to_timecode
+        :type frames_per_foot: int
+        :param frames_per_foot: Film gauge of the edgecode, 16 for 35mm 4p, 40 for 16mm
+        :type timecode_rate: int or None
+        :param timecode_rate: Nominal frames per second of the timecode, None for the video rate of the
+            project. 30 on a 24 fps list is converted with 2:3 pulldown, other rates frame for frame.
+        """
+        self.edit_rate = float(edit_rate)
+        self.fps = int(round(self.edit_rate))
+        self.timecode_rate = timecode_rate or (30 if self.fps == 24 else self.fps)
+        self.pulldown = self.timecode_rate * 4 == self.fps * 5
+        self.drop_frame = drop_frame
+        self.frames_per_foot = frames_per_foot
+        self.__timecodes = {}
+        self.__edgecodes = {}
+
+    @classmethod
+    def for_rate(cls, edit_rate, timecode_type='TC1'):
+        """Shared engine for an edit rate, drop-frame for 29.97 and 59.94.
+
+        :type edit_rate: float
+        :type timecode_type: str or None
+        :param timecode_type: Type attribute of the Timecode elements, such as TC1 or TC24
+        :rtype: FilmscribeTimeEngine
+        """
+        key = (edit_rate, timecode_type)
+        engine = cls.__engines.get(key)
+        if engine is None:
+            rate = float(edit_rate)
+            engine = cls.__engines[key] = cls(rate, drop_frame=rate != int(rate) and int(round(rate)) % 30 == 0,
+                                              timecode_rate=_TIMECODE_RATES.get(timecode_type))
+        return engine
+
+    def timecode_to_frames(self, value):
+        """
+        :type value: str or unicode
+        :param value: Timecode such as 01:00:03:03 or 01:00:03;03
+        :rtype: int or None
+        :return: Frames at the edit rate, None when value is not a valid timecode at timecode_rate
+        """
+        frames = self.__timecodes.get(value)
+        if frames is None and value is not None:
+            match = _TIMECODE.match(value)
+            if match is None:
+                return None
+            hours, minutes, seconds, separator, frames = match.groups()
+            minutes, seconds, frames = int(minutes), int(seconds), int(frames)
+            dropped = self.__dropped_per_minute() if separator != ':' else 0
+            if minutes > 59 or seconds > 59 or frames >= self.timecode_rate or (
+                    seconds == 0 and frames < dropped and minutes % 10):
+                return None
+            minutes += int(hours) * 60
+            frames += (minutes * 60 + seconds) * self.timecode_rate - dropped * (minutes - minutes // 10)
+            if self.pulldown:
+                cycles, frames = divmod(frames, 5)
+                frames = cycles * 4 + _PULLDOWN_FILM[frames]
+            if len(self.__timecodes) >= self.MEMO_SIZE:
+                self.__timecodes.clear()
+            self.__timecodes[value] = frames
+        return frames
+
+    def frames_to_timecode(self, frames, drop_frame=None):
+        """
+        :type frames: int
+        :param frames: Frames at the edit rate
+        :type drop_frame: bool or None
+        :param drop_frame: Overrides the drop_frame of the engine
+        :rtype: str
+        """
+        drop_frame = self.drop_frame if drop_frame is None else drop_frame
+        fps = self.timecode_rate
+        if self.pulldown:
+            cycles, frames = divmod(frames, 4)
+            frames = cycles * 5 + _PULLDOWN_VIDEO[frames]
+        if drop_frame:
+            dropped = self.__dropped_per_minute()
+            tens, remainder = divmod(frames, fps * 600 - dropped * 9)
+            frames += dropped * 9 * tens
+            if remainder > dropped:
+                frames += dropped * ((remainder - dropped) // (fps * 60 - dropped))
+        seconds, ff = divmod(frames, fps)
+        minutes, ss = divmod(seconds, 60)
+        hh, mm = divmod(minutes, 60)
+        return '%02d:%02d:%02d%s%02d' % (hh, mm, ss, ';' if drop_frame else ':', ff)
+
+    def __dropped_per_minute(self):
+        return 2 * self.timecode_rate // 30
+
+    def edgecode_to_frames(self, value):
+        """
+        :type value: str or unicode
+        :param value: Edgecode such as 5015+02 or KeyNum such as EH 75 3015-0021+06
+        :rtype: int or None
+        """
+        frames = self.__edgecodes.get(value)
+        if frames is None and value is not None:
+            match = _EDGECODE.match(value)
+            if match is None:
+                return None
+            _, prefix, feet, frames = match.groups()
+            feet = int(feet) + (int(prefix) * 10000 if prefix else 0)
+            frames = feet * self.frames_per_foot + int(frames)
+            if len(self.__edgecodes) >= self.MEMO_SIZE:
+                self.__edgecodes.clear()
+            self.__edgecodes[value] = frames
+        return frames
+
+    def frames_to_edgecode(self, frames, stock=None):
+        """
+        :type frames: int
+        :type stock: str or None
+        :param stock: KeyNum manufacturer and stock code such as 'EH 75', writes KeyNum when given
+        :rtype: str
+        """
+        feet, frames = divmod(frames, self.frames_per_foot)
+        if stock is None:
+            return '%04d+%02d' % (feet, frames)
+        prefix, feet = divmod(feet, 10000)
+        return '%s %04d-%04d+%02d' % (stock, prefix, feet, frames)
+
+    def timecodes_to_frames(self, values):
+        """Batch form of timecode_to_frames, -1 where a value is missing.
+
+        :param values: Sequence of timecode strings
+        :rtype: array or numpy.ndarray
+        """
+        return self.__batch(self.timecode_to_frames, values)
+
+    def edgecodes_to_frames(self, values):
+        """Batch form of edgecode_to_frames, -1 where a value is missing.
+
+        :param values: Sequence of edgecode strings
+        :rtype: array or numpy.ndarray
+        """
+        return self.__batch(self.edgecode_to_frames, values)
+
+    @staticmethod
+    def __batch(convert, values):
+        frames = array('l', [-1 if value is None else value for value in map(convert, values)])
+        return numpy.frombuffer(frames, dtype='l') if numpy is not None else frames
+
+    def convert(self, point):
+        """Store the frame counts of the timecode and edgecode of point on it.
+
+        :type point: FilmscribeTime
+        """
+        if point.timecode is not None:
+            point.timecode_frames = self.timecode_to_frames(point.timecode)
+        if point.edgecode is not None:
+            point.edgecode_frames = self.edgecode_to_frames(point.edgecode)
+
+    def convert_event(self, event):
+        """Convert the master and source times of event that have been allocated.
+
+        :type event: FilmscribeEvent
+        """
+        for side in (_peek(event, 'master'), _peek(event, 'source')):
+            if side is not None:
+                for name in ('start', 'end'):
+                    point = _peek(side, name)
+                    if point is not None:
+                        self.convert(point)
 
 
 class FilmscribeListHead(object):
@@ -146,122 +436,65 @@ class FilmscribeListHead(object):
         self.__master_duration = value
 
 
-class FilmscribeEvent(object):
+class FilmscribeEvent(_FilmscribeSlots):
+    """A single event of a filmscribe list.
+
+    master (FilmscribeEventMaster) and source (FilmscribeEventSource) are only
+    allocated on first access.
+    """
+    __slots__ = ('id', 'length', 'source_count', 'ref_num', 'reference', 'type', 'master', 'source')
+
     def __init__(self, **kwargs):
-        self.__id = None
-        self.__length = None
-        self.__source_count = None
-        self.__ref_num = None
-        self.__reference = None
-        self.__master = FilmscribeEventMaster()
-        self.__source = FilmscribeEventSource()
-        self.__type = None
+        self.id = None
+        self.length = None
+        self.source_count = None
+        self.ref_num = None
+        self.reference = None
+        self.type = None
 
         for key, value in kwargs.items():
             if key == 'num':
-                self.__id = int(value)
+                self.id = int(value)
             if key == 'length':
-                self.__length = int(value)
+                self.length = int(value)
             if key == 'sourcecount':
-                self.__source_count = int(value)
+                self.source_count = int(value)
             if key == 'refnum':
-                self.__ref_num = int(value)
+                self.ref_num = int(value)
             if key == 'reference':
-                self.__reference = value
+                self.reference = value
             if key == 'type':
-                self.__type = value
+                self.type = value
 
-    @property
-    def master(self):
-        """
-        :rtype: FilmscribeEventMaster
-        :return: Event master
-        """
-        return self.__master
-
-    @master.setter
-    def master(self, value):
-        self.__master = value
-
-    @property
-    def source(self):
-        """
-        :rtype: FilmscribeEventSource
-        :return: Event source
-        """
-        return self.__source
-
-    @source.setter
-    def source(self, value):
-        self.__source = value
-
-    @property
-    def type(self):
-        """
-        :rtype: str
-        :return: Event type
-        """
-        return self.__type
-
-    @property
-    def id(self):
-        return self.__id
-
-    @id.setter
-    def id(self, value):
-        self.__id = value
-
-    @property
-    def length(self):
-        return self.__length
-
-    @length.setter
-    def length(self, value):
-        self.__length = value
-
-    @property
-    def source_count(self):
-        return self.__source_count
-
-    @source_count.setter
-    def source_count(self, value):
-        self.__source_count = value
-
-    @property
-    def ref_num(self):
-        return self.__ref_num
-
-    @ref_num.setter
-    def ref_num(self, value):
-        self.__ref_num = value
-
-    @property
-    def reference(self):
-        return self.__reference
-
-    @reference.setter
-    def reference(self, value):
-        self.__reference = value
+    def __getattr__(self, name):
+        # Only reached for slots that have not been assigned yet.
+        if name == 'master':
+            self.master = FilmscribeEventMaster()
+            return self.master
+        if name == 'source':
+            self.source = FilmscribeEventSource()
+            return self.source
+        raise AttributeError(name)
 
 
 class FilmscribeOpticalEvent(FilmscribeEvent):
+    __slots__ = ('layers',)
+
     def __init__(self, **kwargs):
         super(FilmscribeOpticalEvent, self).__init__(**kwargs)
-        self.__layers = []
+        self.layers = []
 
-    @property
-    def layers(self):
+    def add_layer(self, value):
         """
-        :rtype: list of FilmscribeOpticalLayer
-        :return:
+        :type value: FilmscribeOpticalLayer
+        :param value: Layer to be appended to this event
         """
-        return self.__layers
-
-    def add_layer(self, value):
-        self.__layers.append(value)
+        self.layers.append(value)
 
 
 class FilmscribeCutEvent(FilmscribeEvent):
+    __slots__ = ()
+
     def __init__(self, **kwargs):
         super(FilmscribeCutEvent, self).__init__(**kwargs)
 
@@ -270,6 +503,7 @@ class FilmscribeList(object):
     def __init__(self):
         self.__head = None
         self.__events = []
+        self.__master_index = None
 
     @property
     def head(self):
@@ -303,6 +537,32 @@ class FilmscribeList(object):
         :param event: Event to be appended to this Filmscribe list
         """
         self.__events.append(event)
+        self.__master_index = None
+
+    @property
+    def master_index(self):
+        """Interval index over the master frames of the events, built on first use.
+
+        :rtype: FilmscribeMasterIndex
+        """
+        if self.__master_index is None or len(self.__master_index) != len(self.__events):
+            self.__master_index = FilmscribeMasterIndex(self.__events)
+        return self.__master_index
+
+    def to_columns(self):
+        """Columnar copy of the events of this list.
+
+        :rtype: FilmscribeColumns
+        """
+        return FilmscribeColumns(self.__events)
+
+    def to_edl(self, outfile=None):
+        """Write this list as a CMX3600 edit decision list, see FilmscribeEdlWriter.
+
+        :param outfile: File name or binary file object, returns the bytes instead when None
+        :rtype: str or None
+        """
+        return _write_to(outfile, lambda stream: FilmscribeEdlWriter(stream).write(self))
 
 
 class FilmscribeAssembleList(FilmscribeList):
@@ -315,12 +575,809 @@ class FilmscribeOpticalList(FilmscribeList):
         super(FilmscribeOpticalList, self).__init__()
 
 
+class FilmscribeStringPool(object):
+    """Shares one object per distinct string and numbers the distinct strings.
+
+    Every parse pools the repeating source fields, see POOLED_FIELDS, the
+    Custom keys and values and the event types. Pass one pool to every parse
+    of a project so reels held in the same process share their clip names,
+    tapes and rolls as well. Codes index values, are handed out in the order
+    they are first asked for and stay stable for the life of the pool.
+    """
+    POOLED_FIELDS = ('clip_name', 'mob_id', 'unc', 'tape_name', 'cam_roll', 'lab_roll', 'slate', 'scene_take')
+
+    def __init__(self):
+        self.values = []
+        self.__strings = {}
+        self.__codes = {}
+        self.__lock = Lock()
+
+    def __len__(self):
+        return len(self.__strings)
+
+    def __contains__(self, value):
+        return value in self.__strings
+
+    def __getstate__(self):
+        return self.values, self.__strings, self.__codes
+
+    def __setstate__(self, state):
+        self.values, self.__strings, self.__codes = state
+        self.__lock = Lock()
+
+    def intern(self, value):
+        """Pooled object equal to value.
+
+        :type value: unicode or None
+        :rtype: unicode or None
+        """
+        return self.__strings.setdefault(value, value)
+
+    def code(self, value):
+        """Integer code of value, -1 for None.
+
+        :type value: unicode or None
+        :rtype: int
+        """
+        code = self.__codes.get(value)
+        if code is None:
+            if value is None:
+                return -1
+            with self.__lock:
+                code = _encode(self.intern(value), self.__codes, self.values)
+        return code
+
+    def codes(self, values):
+        """
+        :type values: collections.Iterable[unicode or None]
+        :rtype: array.array
+        """
+        return array('l', [self.code(value) for value in values])
+
+    def share(self, filmscribe_file):
+        """Point the strings of a file parsed with another pool, or decoded
+        from the binary format or from another process, to this pool.
+
+        :type filmscribe_file: FilmscribeFile
+        :rtype: FilmscribeFile
+        """
+        intern = self.intern
+        for filmscribe_list in filmscribe_file.assemble_lists + filmscribe_file.optical_lists:
+            for event in filmscribe_list.events:
+                event.type = intern(event.type)
+                source = _peek(event, 'source')
+                if source is None:
+                    continue
+                for name in self.POOLED_FIELDS:
+                    value = getattr(source, name)
+                    if value is not None:
+                        setattr(source, name, intern(value))
+                custom = _peek(source, 'custom')
+                if custom is not None:
+                    custom.keys[:] = [intern(key) for key in custom.keys]
+                    custom.values[:] = [intern(custom_value) for custom_value in custom.values]
+        filmscribe_file.strings = self
+        return filmscribe_file
+
+
+class FilmscribeColumns(object):
+    """Events of a filmscribe list as parallel typed arrays.
+
+    Columns are numpy arrays when numpy is installed and array.array otherwise,
+    so totals, gaps and per-clip sums can be computed without Python loops.
+    Missing integers are stored as -1. type holds EVENT_TYPE_CODES values,
+    clip_name and mob_id hold indices into clip_names and mob_ids. When a
+    FilmscribeStringPool is given they are pool codes instead, and clip_names
+    and mob_ids are both the values of the pool, so columns of different
+    lists can be compared directly.
+    """
+    EVENT_TYPE_CODES = {'Cut': 0, 'Optical': 1, 'Locator': 2}
+    NAMES = ('id', 'type', 'length', 'master_start', 'master_end', 'source_start', 'source_end', 'clip_name', 'mob_id')
+
+    def __init__(self, events=(), strings=None):
+        """
+
+        :type events: collections.Iterable[FilmscribeEvent]
+        :param events: Events in list order, may be a generator
+        :type strings: FilmscribeStringPool or None
+        :param strings: Encode clip names and mob ids with this pool
+        """
+        self.clip_names = []
+        self.mob_ids = []
+        clip_codes = {}
+        mob_codes = {}
+        encode = _encode
+        if strings is not None:
+            self.clip_names = self.mob_ids = strings.values
+            encode = lambda value, codes, values: strings.code(value)
+        type_codes = self.EVENT_TYPE_CODES
+        columns = [array('b' if name == 'type' else 'l') for name in self.NAMES]
+        (ids, types, lengths, master_starts, master_ends, source_starts, source_ends, clip_names,
+         mob_ids) = [column.append for column in columns]
+
+        for event in events:
+            master, source = _peek(event, 'master'), _peek(event, 'source')
+            ids(_or_missing(event.id))
+            types(type_codes.get(event.type, -1))
+            lengths(_or_missing(event.length))
+            master_starts(_peek_frame(master, 'start'))
+            master_ends(_peek_frame(master, 'end'))
+            source_starts(_peek_frame(source, 'start'))
+            source_ends(_peek_frame(source, 'end'))
+            clip_names(encode(source.clip_name, clip_codes, self.clip_names) if source is not None else -1)
+            mob_ids(encode(source.mob_id, mob_codes, self.mob_ids) if source is not None else -1)
+
+        for name, column in zip(self.NAMES, columns):
+            setattr(self, name, numpy.frombuffer(column, dtype=column.typecode) if numpy is not None else column)
+
+    def __len__(self):
+        return len(self.id)
+
+    @classmethod
+    def from_file(cls, filename):
+        """Build the columns of every list in a file straight from the parser,
+        without keeping the event objects around.
+
+        :type filename: str or unicode
+        :param filename:
+        :rtype: list of (FilmscribeListHead, FilmscribeColumns)
+        """
+        return [(head, cls(event for _, event in pairs)) for head, pairs in groupby(iter_events(filename),
+                                                                                      key=itemgetter(0))]
+
+
+def _peek(obj, name, default=None):
+    """Read a lazily allocated attribute without allocating it."""
+    try:
+        return object.__getattribute__(obj, name)
+    except AttributeError:
+        return default
+
+
+def _peek_frame(owner, name):
+    point = _peek(owner, name) if owner is not None else None
+    return -1 if point is None or point.frame is None else point.frame
+
+
+def _or_missing(value):
+    return -1 if value is None else value
+
+
+def _encode(value, codes, values):
+    if value is None:
+        return -1
+    code = codes.get(value)
+    if code is None:
+        code = codes[value] = len(values)
+        values.append(value)
+    return code
+
+
+class FilmscribeMasterIndex(object):
+    """Sorted interval index over the master frames of a list of events.
+
+    Events with a master start and end frame are stored as closed intervals,
+    locators and events without an end frame as points. Lookups return
+    positions in the event list.
+    """
+
+    def __init__(self, events):
+        """
+
+        :type events: list of FilmscribeEvent
+        :param events:
+        """
+        self.__size = len(events)
+        intervals = []
+        points = []
+        for position, event in enumerate(events):
+            master = _peek(event, 'master')
+            start = _peek_frame(master, 'start')
+            if start < 0:
+                continue
+            end = _peek_frame(master, 'end')
+            if end < 0 or isinstance(event, FilmscribeLocatorEvent):
+                points.append((start, position))
+                continue
+            source_start = _peek_frame(_peek(event, 'source'), 'start')
+            intervals.append((start, end, position, source_start - start if source_start >= 0 else None))
+        intervals.sort()
+        points.sort()
+
+        self.__starts = array('l', [interval[0] for interval in intervals])
+        self.__ends = array('l', [interval[1] for interval in intervals])
+        self.__positions = array('l', [interval[2] for interval in intervals])
+        self.__offsets = [interval[3] for interval in intervals]
+        # Running maximum of the end frames, so overlapping intervals are found
+        # by walking back only while an earlier interval can still reach frame.
+        self.__reach = array('l')
+        reach = None
+        for end in self.__ends:
+            reach = end if reach is None else max(reach, end)
+            self.__reach.append(reach)
+        self.__overlapping = any(self.__starts[i] <= self.__ends[i - 1] for i in range(1, len(intervals)))
+        self.__point_frames = array('l', [point[0] for point in points])
+        self.__point_positions = array('l', [point[1] for point in points])
+
+    def __len__(self):
+        """Number of events the index was built from."""
+        return self.__size
+
+    def __find(self, frame):
+        i = bisect_right(self.__starts, frame) - 1
+        while i >= 0 and self.__reach[i] >= frame:
+            if self.__ends[i] >= frame:
+                return i
+            i -= 1
+        return None
+
+    def find(self, frame):
+        """Position of the event under master frame, None if frame falls in a gap.
+
+        When events overlap the one that starts last wins.
+
+        :type frame: int
+        :rtype: int or None
+        """
+        i = self.__find(frame)
+        return self.__positions[i] if i is not None else None
+
+    def source_frame(self, frame):
+        """Map a master frame to (event position, source frame).
+
+        The source frame is offset from source.start.frame and is None when
+        the event has no source start frame.
+
+        :type frame: int
+        :rtype: (int, int) or None
+        """
+        i = self.__find(frame)
+        if i is None:
+            return None
+        offset = self.__offsets[i]
+        return self.__positions[i], frame + offset if offset is not None else None
+
+    def lookup(self, frames):
+        """Batch form of source_frame.
+
+        Returns two arrays aligned with frames, event positions and source
+        frames, using -1 where there is no event or no source frame. With numpy
+        installed the frames are searched without a Python loop.
+
+        :param frames: Sequence of master frames
+        :rtype: (array, array)
+        """
+        if numpy is None or self.__overlapping or not self.__starts:
+            positions = array('l')
+            source_frames = array('l')
+            for frame in frames:
+                found = self.source_frame(frame)
+                positions.append(found[0] if found is not None else -1)
+                source_frames.append(found[1] if found is not None and found[1] is not None else -1)
+            return positions, source_frames
+
+        frames = numpy.asarray(frames, dtype='l')
+        i = numpy.searchsorted(numpy.frombuffer(self.__starts, dtype='l'), frames, side='right') - 1
+        clipped = numpy.maximum(i, 0)
+        hit = (i >= 0) & (numpy.frombuffer(self.__ends, dtype='l')[clipped] >= frames)
+        offsets = numpy.array([-1 if offset is None else offset for offset in self.__offsets], dtype='l')
+        mapped = hit & numpy.array([offset is not None for offset in self.__offsets], dtype=bool)[clipped]
+        positions = numpy.where(hit, numpy.frombuffer(self.__positions, dtype='l')[clipped], -1)
+        return positions, numpy.where(mapped, frames + offsets[clipped], -1)
+
+    def locators(self, start, end=None):
+        """Positions of the point entries (locators) between two master frames.
+
+        :type start: int
+        :type end: int or None
+        :param end: Inclusive end frame, defaults to start
+        :rtype: list of int
+        """
+        lo = bisect_left(self.__point_frames, start)
+        hi = bisect_right(self.__point_frames, start if end is None else end)
+        return list(self.__point_positions[lo:hi])
+
+
+class FilmscribeOpticalIndex(object):
+    """Links the events of the optical lists of a file to the assemble events they belong to.
+
+    An optical event points at its cut through RefNum, the Num of the event
+    in the assemble list of the same sequence. An optical list is paired with
+    the assemble list of the same title when there is exactly one, the others
+    with the remaining assemble lists in order, unless pairs are given. Both
+    directions are dict lookups on the event objects.
+
+    motion holds every optical event with a Motion layer, precomputed as
+    (optical event, assemble event, layer) with the speed in layer.factor.
+    unresolved holds the optical events whose cut was not found, locators
+    are not linked.
+    """
+
+    def __init__(self, filmscribe_file, pairs=None):
+        """
+
+        :type filmscribe_file: FilmscribeFile
+        :type pairs: list of (FilmscribeAssembleList, FilmscribeOpticalList) or None
+        :param pairs: Assemble list of every optical list, instead of pairing them on title and order
+        """
+        self.size = self.size_of(filmscribe_file)
+        self.pairs = pairs if pairs is not None else self.__pair(filmscribe_file)
+        self.motion = []
+        self.unresolved = []
+        self.__assemble_events = {}
+        self.__optical_events = {}
+        for assemble_list, optical_list in self.pairs:
+            by_num = {}
+            for event in assemble_list.events:
+                if event.id is not None and not isinstance(event, FilmscribeLocatorEvent):
+                    by_num.setdefault(event.id, event)
+            for event in optical_list.events:
+                if isinstance(event, FilmscribeLocatorEvent):
+                    continue
+                assemble_event = by_num.get(event.ref_num) if event.ref_num is not None else None
+                if assemble_event is None:
+                    self.unresolved.append(event)
+                else:
+                    self.__assemble_events[event] = assemble_event
+                    self.__optical_events.setdefault(assemble_event, []).append(event)
+                for layer in getattr(event, 'layers', ()):
+                    if isinstance(layer.data, FilmscribeMotion):
+                        self.motion.append((event, assemble_event, layer))
+
+    @staticmethod
+    def size_of(filmscribe_file):
+        """Number of lists and events of a file, which tells when an index is out of date.
+
+        :rtype: (int, int, int)
+        """
+        return (len(filmscribe_file.assemble_lists), len(filmscribe_file.optical_lists),
+                sum(len(filmscribe_list.events)
+                    for filmscribe_list in filmscribe_file.assemble_lists + filmscribe_file.optical_lists))
+
+    @staticmethod
+    def __pair(filmscribe_file):
+        assemble_lists = list(filmscribe_file.assemble_lists)
+        titles = {}
+        for assemble_list in assemble_lists:
+            titles.setdefault(assemble_list.head.title if assemble_list.head else None, []).append(assemble_list)
+        pairs = []
+        unpaired = []
+        for optical_list in filmscribe_file.optical_lists:
+            same_title = titles.get(optical_list.head.title if optical_list.head else None, ())
+            if len(same_title) == 1 and same_title[0] in assemble_lists:
+                assemble_lists.remove(same_title[0])
+                pairs.append((same_title[0], optical_list))
+            else:
+                unpaired.append(optical_list)
+        pairs.extend(zip(assemble_lists, unpaired))
+        return pairs
+
+    def assemble_event(self, optical_event):
+        """Assemble event an optical event belongs to.
+
+        :type optical_event: FilmscribeEvent
+        :rtype: FilmscribeEvent or None
+        """
+        return self.__assemble_events.get(optical_event)
+
+    def optical_events(self, assemble_event):
+        """Optical events that belong to an assemble event, in list order.
+
+        :type assemble_event: FilmscribeEvent
+        :rtype: list of FilmscribeEvent
+        """
+        return self.__optical_events.get(assemble_event, [])
+
+
+class FilmscribeChange(object):
+    """One entry of a change list, see diff_lists.
+
+    master_delta is the shift of the master start frame for moved and trimmed
+    events, the length added for inserted and the (negative) length removed for
+    deleted events. head_trim and tail_trim are the source start and end frame
+    differences of a matched event.
+    """
+    INSERTED = 'inserted'
+    DELETED = 'deleted'
+    MOVED = 'moved'
+    TRIMMED = 'trimmed'
+
+    def __init__(self, kind, old_position=None, new_position=None, old_event=None, new_event=None, master_delta=0,
+                 head_trim=0, tail_trim=0):
+        self.kind = kind
+        self.old_position = old_position
+        self.new_position = new_position
+        self.old_event = old_event
+        self.new_event = new_event
+        self.master_delta = master_delta
+        self.head_trim = head_trim
+        self.tail_trim = tail_trim
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :return: JSON serializable form of the change
+        """
+        event = self.new_event if self.new_event is not None else self.old_event
+        master = _peek(event, 'master')
+        source = _peek(event, 'source')
+        return {'kind': self.kind,
+                'old_position': self.old_position,
+                'new_position': self.new_position,
+                'old_id': self.old_event.id if self.old_event is not None else None,
+                'new_id': self.new_event.id if self.new_event is not None else None,
+                'clip_name': source.clip_name if source is not None else None,
+                'mob_id': source.mob_id if source is not None else None,
+                'master_start': _or_none(_peek_frame(master, 'start')),
+                'master_end': _or_none(_peek_frame(master, 'end')),
+                'master_delta': self.master_delta,
+                'head_trim': self.head_trim,
+                'tail_trim': self.tail_trim}
+
+
+def _or_none(frame):
+    return None if frame < 0 else frame
+
+
+def _source_identity(event):
+    source = _peek(event, 'source')
+    if source is None:
+        return None
+    return source.mob_id or source.clip_name
+
+
+def _event_length(event):
+    if event.length is not None:
+        return event.length
+    master = _peek(event, 'master')
+    start, end = _peek_frame(master, 'start'), _peek_frame(master, 'end')
+    return end - start + 1 if start >= 0 and end >= 0 else 0
+
+
+def _increasing_subsequence(values):
+    """Indices of a longest strictly increasing subsequence of values."""
+    tails = []
+    tail_indices = []
+    previous = [None] * len(values)
+    for i, value in enumerate(values):
+        j = bisect_left(tails, value)
+        if j == len(tails):
+            tails.append(value)
+            tail_indices.append(i)
+        else:
+            tails[j] = value
+            tail_indices[j] = i
+        previous[i] = tail_indices[j - 1] if j else None
+    kept = set()
+    i = tail_indices[-1] if tail_indices else None
+    while i is not None:
+        kept.add(i)
+        i = previous[i]
+    return kept
+
+
+def diff_lists(old_list, new_list):
+    """Change list between two versions of an assemble list.
+
+    Events are matched on their source identity (MobID, or clip name without
+    one) and source frame range through hash lookups, so the diff runs in
+    O(n log n). Events whose identity matches with an overlapping source range
+    are reported as trimmed, matched events that changed order as moved.
+    Unchanged events that only rippled are not reported. Locators are ignored.
+
+    :type old_list: FilmscribeList
+    :type new_list: FilmscribeList
+    :rtype: list of FilmscribeChange
+    """
+    old_events = [(i, e) for i, e in enumerate(old_list.events) if not isinstance(e, FilmscribeLocatorEvent)]
+    new_events = [(i, e) for i, e in enumerate(new_list.events) if not isinstance(e, FilmscribeLocatorEvent)]
+
+    def source_range(event):
+        source = _peek(event, 'source')
+        return _peek_frame(source, 'start'), _peek_frame(source, 'end')
+
+    exact = {}
+    for position, event in old_events:
+        exact.setdefault((_source_identity(event), source_range(event)), deque()).append(position)
+
+    pairs = []
+    unmatched = []
+    for position, event in new_events:
+        bucket = exact.get((_source_identity(event), source_range(event)))
+        if bucket:
+            pairs.append((position, bucket.popleft()))
+        else:
+            unmatched.append((position, event))
+
+    # Left over old events of the same source, candidates for trims.
+    by_identity = {}
+    for bucket in exact.values():
+        for position in bucket:
+            by_identity.setdefault(_source_identity(old_list.events[position]), []).append(position)
+    for bucket in by_identity.values():
+        bucket.sort()
+
+    changes = []
+    for position, event in unmatched:
+        start, end = source_range(event)
+        bucket = by_identity.get(_source_identity(event)) if _source_identity(event) is not None else None
+        for i, old_position in enumerate(bucket or ()):
+            old_start, old_end = source_range(old_list.events[old_position])
+            if start <= old_end and old_start <= end:
+                pairs.append((position, bucket.pop(i)))
+                break
+        else:
+            changes.append(FilmscribeChange(FilmscribeChange.INSERTED, new_position=position, new_event=event,
+                                            master_delta=_event_length(event)))
+
+    for bucket in by_identity.values():
+        for old_position in bucket:
+            event = old_list.events[old_position]
+            changes.append(FilmscribeChange(FilmscribeChange.DELETED, old_position=old_position, old_event=event,
+                                            master_delta=-_event_length(event)))
+
+    pairs.sort()
+    in_order = _increasing_subsequence([old_position for _, old_position in pairs])
+    for i, (position, old_position) in enumerate(pairs):
+        old_event, new_event = old_list.events[old_position], new_list.events[position]
+        (old_start, old_end), (new_start, new_end) = source_range(old_event), source_range(new_event)
+        head_trim, tail_trim = new_start - old_start, new_end - old_end
+        if i in in_order and not head_trim and not tail_trim:
+            continue
+        changes.append(FilmscribeChange(FilmscribeChange.TRIMMED if i in in_order else FilmscribeChange.MOVED,
+                                        old_position, position, old_event, new_event,
+                                        _peek_frame(_peek(new_event, 'master'), 'start') -
+                                        _peek_frame(_peek(old_event, 'master'), 'start'),
+                                        head_trim, tail_trim))
+
+    changes.sort(key=lambda change: (change.new_position if change.new_position is not None else change.old_position,
+                                     change.kind != FilmscribeChange.DELETED))
+    return changes
+
+
+class FilmscribeDupe(object):
+    """Two events that use the same source frames, see FilmscribeSourceRanges.dupes.
+
+    Positions are (list, event) positions in the lists given to
+    FilmscribeSourceRanges. first comes before second in record order, so
+    second is the event that needs a dupe. start and end are the shared
+    source frames, inclusive.
+    """
+
+    def __init__(self, key, start, end, first_position, second_position, first_event, second_event):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.first_position = first_position
+        self.second_position = second_position
+        self.first_event = first_event
+        self.second_event = second_event
+
+    @property
+    def frames(self):
+        """
+        :rtype: int
+        :return: Number of shared frames
+        """
+        return self.end - self.start + 1
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :return: JSON serializable form of the dupe
+        """
+        return {'key': self.key,
+                'start': self.start,
+                'end': self.end,
+                'frames': self.frames,
+                'first_position': list(self.first_position),
+                'second_position': list(self.second_position),
+                'first_id': self.first_event.id,
+                'second_id': self.second_event.id}
+
+
+class FilmscribePullRange(object):
+    """Source frames to pull from one roll, see FilmscribeSourceRanges.pull_list.
+
+    start and end are inclusive and include the handles. positions are the
+    (list, event) positions of the events the range covers.
+    """
+
+    def __init__(self, key, start, end, positions):
+        self.key = key
+        self.start = start
+        self.end = end
+        self.positions = positions
+
+    @property
+    def frames(self):
+        """
+        :rtype: int
+        """
+        return self.end - self.start + 1
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        :return: JSON serializable form of the range
+        """
+        return {'key': self.key,
+                'start': self.start,
+                'end': self.end,
+                'frames': self.frames,
+                'positions': [list(position) for position in self.positions]}
+
+
+class FilmscribeSourceRanges(object):
+    """Source frame ranges of the events of many lists, for dupe checks and pull lists.
+
+    Events are grouped on a source field, the camera roll by default, and
+    sorted on (value, source start frame) once. dupes() and pull_list() then
+    sweep the sorted ranges, so a whole feature of 100k+ events across every
+    reel is handled in O(n log n), plus the number of dupes found.
+
+    Ranges are read from the source edgecode by default, which is what the
+    negative is cut on. 'frame' reads source.start.frame and source.end.frame,
+    'timecode' the source timecode. Both ends are inclusive. Locators and
+    events without the key or without both ends are left out, see skipped.
+
+        ranges = FilmscribeSourceRanges(filmscribe_file.assemble_lists)
+        for dupe in ranges.dupes():
+            ...
+        pulls = ranges.pull_list(handles=8)
+    """
+    KEYS = ('cam_roll', 'lab_roll', 'clip_name', 'mob_id', 'tape_name')
+    BASES = ('edgecode', 'frame', 'timecode')
+
+    def __init__(self, lists, key='cam_roll', basis='edgecode'):
+        """
+
+        :type lists: collections.Iterable[FilmscribeList]
+        :param lists: Lists of every reel, positions number them in this order
+        :type key: str
+        :param key: Source field the ranges are grouped on, one of KEYS
+        :type basis: str
+        :param basis: Where the source frames are read from, one of BASES
+        """
+        if key not in self.KEYS:
+            raise ValueError('Unknown key {0!r}, use one of {1}'.format(key, ', '.join(self.KEYS)))
+        if basis not in self.BASES:
+            raise ValueError('Unknown basis {0!r}, use one of {1}'.format(basis, ', '.join(self.BASES)))
+        self.key = key
+        self.basis = basis
+        self.lists = list(lists)
+        self.skipped = 0
+        entries = []
+        for i, filmscribe_list in enumerate(self.lists):
+            engine = FilmscribeTimeEngine.for_rate(filmscribe_list.head.edit_rate or 24)
+            frames = {'frame': lambda point: point.frame,
+                      'edgecode': lambda point: engine.edgecode_to_frames(point.edgecode),
+                      'timecode': lambda point: engine.timecode_to_frames(point.timecode)}[basis]
+            for k, event in enumerate(filmscribe_list.events):
+                if isinstance(event, FilmscribeLocatorEvent):
+                    continue
+                source = _peek(event, 'source')
+                value = getattr(source, key) if source is not None else None
+                start, end = _peek(source, 'start'), _peek(source, 'end')
+                start = frames(start) if start is not None else None
+                end = frames(end) if end is not None else None
+                if value is None or start is None or end is None:
+                    self.skipped += 1
+                    continue
+                entries.append((value, min(start, end), max(start, end), i, k))
+        entries.sort()
+        self.__entries = entries
+
+    def __len__(self):
+        """Number of events with a source range."""
+        return len(self.__entries)
+
+    def __event(self, position):
+        return self.lists[position[0]].events[position[1]]
+
+    def dupes(self):
+        """Every pair of events that use the same source frames.
+
+        Material reused many times makes many pairs, use iter_dupes or
+        dupe_count when only some of them or their number is needed.
+
+        :rtype: list of FilmscribeDupe
+        :return: Sorted on key and start frame
+        """
+        return sorted(self.iter_dupes(), key=lambda dupe: (dupe.key, dupe.start, dupe.first_position,
+                                                            dupe.second_position))
+
+    def iter_dupes(self):
+        """Lazy form of dupes, in sweep order, holding only the ranges that are still open.
+
+        :rtype: collections.Iterable[FilmscribeDupe]
+        """
+        active = []
+        current = None
+        for value, start, end, i, k in self.__entries:
+            if value != current:
+                current = value
+                active = []
+            # Drop the ranges that end before this one starts, the rest overlap it.
+            while active and active[0][0] < start:
+                heapq.heappop(active)
+            position = (i, k)
+            for other_end, other_position in active:
+                first, second = sorted((other_position, position))
+                yield FilmscribeDupe(value, start, min(end, other_end), first, second,
+                                     self.__event(first), self.__event(second))
+            heapq.heappush(active, (end, position))
+
+    def dupe_count(self):
+        """Number of events that reuse frames used by an event before them in record order.
+
+        Counted without listing the pairs, so heavily reused material costs
+        no more than the sort.
+
+        :rtype: int
+        """
+        return len(self.__reused(lambda value, i: value))
+
+    def dupe_counts(self):
+        """Dupe count of every list on its own, comparable to FilmscribeListHead.dupe_count.
+
+        :rtype: list of int
+        :return: One count per list, in the order of lists
+        """
+        counts = [0] * len(self.lists)
+        for i, _ in self.__reused(lambda value, i: (i, value)):
+            counts[i] += 1
+        return counts
+
+    def __reused(self, group):
+        """Positions of the events that overlap an event before them, within each group."""
+        reused = []
+        # Frames used so far in every group, as sorted disjoint [start, end] ranges.
+        used = {}
+        for value, start, end, i, k in sorted(self.__entries, key=itemgetter(3, 4)):
+            starts, ends = used.setdefault(group(value, i), (array('l'), array('l')))
+            lo, hi = bisect_left(ends, start), bisect_right(starts, end)
+            if lo < hi:
+                reused.append((i, k))
+                start, end = min(start, starts[lo]), max(end, ends[hi - 1])
+            starts[lo:hi] = array('l', [start])
+            ends[lo:hi] = array('l', [end])
+        return reused
+
+    def pull_list(self, handles=0):
+        """Merged source ranges to pull, per value of key.
+
+        Every range is padded with handles frames on both sides, frames below
+        0 are not pulled. Ranges that overlap or touch once padded are merged,
+        so every frame is pulled once.
+
+        :type handles: int
+        :param handles: Frames added before and after every event
+        :rtype: list of FilmscribePullRange
+        :return: Sorted on key and start frame
+        """
+        pulls = []
+        pull = None
+        for value, start, end, i, k in self.__entries:
+            start, end = max(start - handles, 0), end + handles
+            if pull is not None and pull.key == value and start <= pull.end + 1:
+                pull.end = max(pull.end, end)
+                pull.positions.append((i, k))
+                continue
+            pull = FilmscribePullRange(value, start, end, [(i, k)])
+            pulls.append(pull)
+        return pulls
+
+
 class FilmscribeFile(object):
     def __init__(self):
         self.__version = '1.0'
         self.__date = None
         self.__assemble_lists = []
         self.__optical_lists = []
+        self.__strings = None
+        self.__stats = None
+        self.__optical_index = None
 
     @property
     def version(self):
@@ -338,6 +1395,30 @@ class FilmscribeFile(object):
     def date(self, value):
         self.__date = value
 
+    @property
+    def strings(self):
+        """
+        :rtype: FilmscribeStringPool or None
+        :return: Pool the strings of this file were parsed into
+        """
+        return self.__strings
+
+    @strings.setter
+    def strings(self, value):
+        self.__strings = value
+
+    @property
+    def stats(self):
+        """
+        :rtype: FilmscribeParseStats or None
+        :return: Instrumentation of the parse that built this file, when it was asked for
+        """
+        return self.__stats
+
+    @stats.setter
+    def stats(self, value):
+        self.__stats = value
+
     @property
     def assemble_lists(self):
         """
@@ -354,32 +1435,183 @@ class FilmscribeFile(object):
         """
         return self.__optical_lists
 
+    @property
+    def optical_index(self):
+        """Links between optical and assemble events, built on first use and again once lists or events are added.
+
+        :rtype: FilmscribeOpticalIndex
+        """
+        if self.__optical_index is None or self.__optical_index.size != FilmscribeOpticalIndex.size_of(self):
+            self.__optical_index = FilmscribeOpticalIndex(self)
+        return self.__optical_index
+
     @classmethod
-    def from_file(cls, filename):
+    def from_file(cls, filename, convert_times=False, cache=None, heads_only=False, lists=None, max_lists=None,
+                  backend=None, fields=None, strings=None, stats=None, jobs=1):
         """Populate the filmscribe object from xml file.
 
-        :type filename: str or unicode
-        :param filename:
+        filename may also be a binary file object, or a document held in
+        memory as bytes, bytearray, memoryview or mmap. Bytes are a document
+        when they start with '<' or a BOM and a file name otherwise. Files
+        and documents compressed with gzip, bz2, xz or zstd are recognised by
+        their magic bytes and decompressed as they are parsed, xz and zstd
+        only when the lzma and zstandard modules are installed. Compressed
+        documents in memory are passed as bytearray, memoryview or mmap.
+
+        heads_only, lists and max_lists select part of the file. Events of
+        lists that are not wanted are skipped without building any objects,
+        and parsing stops as soon as max_lists lists have been read, so
+        indexing the heads of single list exports reads only the first few KB
+        of each file.
+
+        With jobs, a plain xml file of several lists is split at the list
+        boundaries by a byte scan, every list is parsed in a worker process
+        and the lists are put back in document order. The result is the same
+        as parsing in this process, which is also what happens when the file
+        cannot be split, is compressed or not a file name, is malformed, or
+        heads_only or max_lists is given.
+
+        :type filename: str or unicode or file or bytearray or memoryview or mmap.mmap
+        :param filename: File name, binary file object or document
+        :type convert_times: bool
+        :param convert_times: Convert timecode and edgecode to frame counts, see FilmscribeTimeEngine
+        :type cache: FilmscribeFileCache or None
+        :param cache: Serve unchanged files from this cache instead of parsing them again, file names only
+        :type heads_only: bool
+        :param heads_only: Read only the ListHead of each list, lists are returned without events
+        :type lists: list of str or None
+        :param lists: Titles of the lists to read, None for every list
+        :type max_lists: int or None
+        :param max_lists: Stop once this many lists have been read
+        :type backend: str or None
+        :param backend: Parser backend, see parser_backends. The default is the fastest one available.
+        :type fields: collections.Iterable[str] or None
+        :param fields: Event fields to read, None for every field, see PROJECTION_FIELDS.
+            Events still carry the others, unset.
+        :type strings: FilmscribeStringPool or None
+        :param strings: Pool shared with other parses, by default every parse has its own
+        :type stats: FilmscribeParseStats or bool or None
+        :param stats: Instrument the parse into these stats, or new ones when True. They are kept as
+            filmscribe_file.stats. Files served from the cache are not parsed and not instrumented.
+            Timings of a split parse add up the workers.
+        :type jobs: int or None
+        :param jobs: Number of worker processes parsing the lists of the file, None for one per CPU.
+            1 parses in this process, as does a machine with a single CPU.
         :rtype: FilmscribeFile
+        :raises ValueError: When backend or one of fields is unknown, parse errors are reported and give
+            an empty file instead
         """
+        # Checked here, the parse below reports its errors instead of raising them.
+        _backend_name(backend)
+        if fields is not None:
+            fields = frozenset(fields)
+            _projection(fields)
+        options = dict(convert_times=convert_times, heads_only=heads_only, lists=lists, max_lists=max_lists,
+                       backend=backend, fields=fields, stats=_parse_stats(stats))
+        if cache is not None:
+            return cache.get(filename, strings=strings, **options)
+
         filmscribe_file = cls.__new__(cls, object)
         filmscribe_file.__init__()
 
-        if filename.endswith('.xml'):
-            parser = make_parser()
-            parser.setContentHandler(FilmscribeHandler(filmscribe_file))
-            parser.setErrorHandler(FilmscribeErrorHandler())
-            with open(filename, 'r') as infile:
-                try:
-                    parser.parse(infile)
-                except FilmscribeBreakException:
-                    pass
-                except Exception as error:
-                    sys.stderr.write('ERROR: Unknown error {0}\n'.format(str(error)))
-                    print traceback.format_exc()
+        if jobs != 1 and cpu_count() > 1 and not heads_only and max_lists is None and not (
+                _is_document(filename) or hasattr(filename, 'read')):
+            if _parse_split(filmscribe_file, filename, jobs, strings, options):
+                return filmscribe_file
+
+        with _FilmscribeInput(filename) as infile:
+            try:
+                _parse(filmscribe_file, infile, FilmscribeErrorHandler(), strings=strings, **options)
+            except Exception as error:
+                sys.stderr.write('ERROR: Unknown error {0}\n'.format(str(error)))
+                print traceback.format_exc()
 
         return filmscribe_file
 
+    @classmethod
+    def from_files(cls, filenames, jobs=None, ordered=True, convert_times=False, heads_only=False, lists=None,
+                   max_lists=None, backend=None, fields=None, strings=None, stats=False):
+        """Parse many files on a pool of worker processes.
+
+        A file that cannot be parsed is reported as a failed result instead of
+        stopping the batch.
+
+        :type filenames: list of str
+        :param filenames:
+        :type jobs: int or None
+        :param jobs: Number of worker processes, defaults to the number of CPUs. 1 parses in this process.
+        :type ordered: bool
+        :param ordered: Yield results in input order, otherwise as each file completes
+        :type convert_times: bool
+        :param convert_times: Convert timecode and edgecode to frame counts, see FilmscribeTimeEngine
+        :param heads_only: See from_file
+        :param lists: See from_file
+        :param max_lists: See from_file
+        :param backend: See from_file
+        :param fields: See from_file
+        :type strings: FilmscribeStringPool or None
+        :param strings: Pool every file is shared into as it arrives, see FilmscribeStringPool.share.
+            Without one the files keep no pool.
+        :type stats: bool
+        :param stats: Instrument every parse, see FilmscribeParseResult.stats
+        :rtype: collections.Iterable[FilmscribeParseResult]
+        """
+        # Every parse gets its own stats, so this is only a flag.
+        options = dict(convert_times=convert_times, heads_only=heads_only, lists=lists, max_lists=max_lists,
+                       backend=backend, fields=fields, stats=_parse_stats(stats) is not None)
+        tasks = [(filename, options) for filename in filenames]
+        if jobs == 1 or len(tasks) < 2:
+            for filename, options in tasks:
+                yield _parse_batch_file((filename, dict(options, strings=strings)))
+            return
+
+        pool = Pool(jobs)
+        try:
+            for result in (pool.imap if ordered else pool.imap_unordered)(_parse_batch_file, tasks):
+                if strings is not None and result.filmscribe_file is not None:
+                    strings.share(result.filmscribe_file)
+                yield result
+            pool.close()
+        finally:
+            pool.terminate()
+            pool.join()
+
+    @classmethod
+    def from_binary(cls, filename):
+        """Load a file written by to_binary.
+
+        :type filename: str or unicode
+        :param filename:
+        :rtype: FilmscribeFile
+        """
+        with FilmscribeBinaryFile(filename) as binary_file:
+            return binary_file.to_filmscribe_file()
+
+    def to_binary(self, filename=None):
+        """Write this object in the compact binary list format.
+
+        Events are fixed-width records, so FilmscribeBinaryFile can memory-map
+        the file and decode single events.
+
+        :type filename: str or unicode or None
+        :param filename: Returns the bytes instead of writing a file when None
+        :rtype: str or None
+        """
+        if filename is None:
+            buf = BytesIO()
+            _FilmscribeBinaryWriter(buf).write(self)
+            return buf.getvalue()
+        with open(filename, 'wb') as outfile:
+            _FilmscribeBinaryWriter(outfile).write(self)
+
+    def to_xml(self, outfile=None):
+        """Write this object back to FilmScribe xml, see FilmscribeXmlWriter.
+
+        :param outfile: File name or binary file object, returns the bytes instead when None
+        :rtype: str or None
+        """
+        return _write_to(outfile, lambda stream: FilmscribeXmlWriter(stream).write(self))
+
     def add_assemble_list(self, value):
         """Adds the given list to this FSFile object.
 
@@ -397,168 +1629,1113 @@ class FilmscribeFile(object):
         self.__optical_lists.append(value)
 
 
-class FilmscribeEventMaster(object):
-    def __init__(self):
-        self.__reel = None
-        self.__start = FilmscribeTime()
-        self.__end = FilmscribeTime()
-        self.__endout = None
+class FilmscribeFileCache(object):
+    """In-process LRU cache for FilmscribeFile.from_file.
+
+    Entries are keyed on the resolved path, mtime and size of the file, so an
+    edited file is parsed again. Parsed files are kept in the binary list
+    format and every get() decodes a fresh copy, which is several times cheaper
+    than parsing and keeps callers from modifying the cached entry.
+    Files that fail to parse are not cached.
+    """
+
+    def __init__(self, max_entries=32, max_bytes=256 * 1024 * 1024):
+        """
+
+        :type max_entries: int
+        :param max_entries: Number of files kept
+        :type max_bytes: int or None
+        :param max_bytes: Total size of the cached binary data, None for no limit
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.__entries = OrderedDict()
+        self.__bytes = 0
+        self.__hits = 0
+        self.__misses = 0
+        self.__evictions = 0
+        self.__lock = Lock()
+
+    def __len__(self):
+        return len(self.__entries)
 
     @property
-    def reel(self):
+    def stats(self):
+        """
+        :rtype: dict
+        :return: Hits, misses, evictions, entries and bytes held
         """
+        with self.__lock:
+            return {'hits': self.__hits, 'misses': self.__misses, 'evictions': self.__evictions,
+                    'entries': len(self.__entries), 'bytes': self.__bytes}
 
+    def get(self, filename, strings=None, **options):
+        """Parsed copy of filename, see FilmscribeFile.from_file.
 
-        :return: Reel name
+        Files read with different options are cached separately. File
+        objects and documents in memory are parsed without caching. Hits
+        share their strings into a pool like a parse does.
+
+        :type filename: str or unicode or file or bytearray or memoryview or mmap.mmap
+        :param filename:
+        :type strings: FilmscribeStringPool or None
+        :param strings: Pool for the strings of the file, a new one when None
+        :param options: convert_times, heads_only, lists, max_lists, backend, fields and stats,
+            see FilmscribeFile.from_file
+        :rtype: FilmscribeFile
         """
-        return self.__reel
+        if 'stats' in options:
+            options['stats'] = _parse_stats(options['stats'])
+        if _is_document(filename) or hasattr(filename, 'read'):
+            return FilmscribeFile.from_file(filename, strings=strings, **options)
+
+        path = os.path.realpath(filename)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime, stat.st_size, _options_key(options))
+        with self.__lock:
+            data = self.__entries.pop(key, None)
+            if data is not None:
+                self.__entries[key] = data
+                self.__hits += 1
+            else:
+                self.__misses += 1
+        if data is not None:
+            strings = strings if strings is not None else FilmscribeStringPool()
+            return strings.share(FilmscribeBinaryFile.from_buffer(data).to_filmscribe_file())
+
+        filmscribe_file = FilmscribeFile()
+        try:
+            with _FilmscribeInput(path) as infile:
+                _parse(filmscribe_file, infile, ErrorHandler(), strings=strings, **options)
+        except Exception:
+            # Parse again the way from_file does, so the error is reported the same way.
+            return FilmscribeFile.from_file(filename, strings=strings, **options)
+        self.__store(key, filmscribe_file.to_binary())
+        return filmscribe_file
 
-    @reel.setter
-    def reel(self, value):
-        self.__reel = value
+    def __store(self, key, data):
+        with self.__lock:
+            # Older versions of the same file can no longer be hit.
+            self.__drop(lambda cached: cached[0] == key[0] and cached[1:3] != key[1:3])
+            if self.max_bytes is not None and len(data) > self.max_bytes:
+                return
+            self.__entries[key] = data
+            self.__bytes += len(data)
+            while len(self.__entries) > self.max_entries or (
+                    self.max_bytes is not None and self.__bytes > self.max_bytes):
+                self.__bytes -= len(self.__entries.popitem(last=False)[1])
+                self.__evictions += 1
+
+    def __drop(self, predicate):
+        for key in [key for key in self.__entries if predicate(key)]:
+            self.__bytes -= len(self.__entries.pop(key))
+
+    def invalidate(self, filename=None):
+        """Drop filename from the cache, or every entry when filename is None.
+
+        :type filename: str or unicode or None
+        """
+        path = os.path.realpath(filename) if filename is not None else None
+        with self.__lock:
+            self.__drop(lambda key: path is None or key[0] == path)
+
+
+class FilmscribeSourceIndex(object):
+    """Cross-reference index of the source fields of every event in a project.
+
+    Maps each value of FIELDS, and of every Custom field as 'custom.<Name>',
+    to the events that use it, so "every use of clip 76/2" is one dict
+    lookup instead of a scan of every list. Files are added as they are
+    parsed and can be removed or replaced on their own, without rebuilding
+    the rest. References are (name, list, event) positions, lists numbered
+    assemble lists first, then optical lists, as in FilmscribeBinaryFile.
+    They are held as two parallel arrays of 32 bit integers per value, the
+    file numbers and the list and event positions packed together, which
+    take the same space on every platform.
+
+        index = FilmscribeSourceIndex()
+        for result in FilmscribeFile.from_files(filenames):
+            index.add(result.filename, result.filmscribe_file)
+        index.lookup('cam_roll', 'A012')
+    """
+    FIELDS = ('clip_name', 'mob_id', 'tape_name', 'cam_roll', 'lab_roll', 'scene_take')
+    CUSTOM_PREFIX = 'custom.'
+
+    # Bits of a packed position taken by the event and the list positions.
+    __EVENT_BITS = 20
+    __LIST_BITS = 12
+
+    def __init__(self, custom=True):
+        """
 
-    @property
-    def start(self):
-        return self.__start
+        :type custom: bool
+        :param custom: Index the Custom fields as well
+        """
+        self.custom = custom
+        self.__postings = {}
+        self.__files = OrderedDict()
+        self.__numbers = {}
+        self.__names = {}
+        self.__keys = {}
+        self.__next_number = 0
+        self.__lock = Lock()
+
+    def __len__(self):
+        return len(self.__files)
 
-    @start.setter
-    def start(self, value):
-        self.__start = value
+    def __contains__(self, name):
+        return name in self.__files
 
     @property
-    def end(self):
-        return self.__end
+    def files(self):
+        """
+        :rtype: list of str
+        :return: Names of the indexed files, in the order they were added
+        """
+        return list(self.__files)
 
-    @end.setter
-    def end(self, value):
-        self.__end = value
+    def fields(self):
+        """Fields that have at least one value, custom fields included.
 
-    @property
-    def endout(self):
-        return self.__endout
+        :rtype: list of str
+        """
+        with self.__lock:
+            return sorted(self.__postings)
 
-    @endout.setter
-    def endout(self, value):
-        self.__endout = value
+    def values(self, field):
+        """Distinct values of a field.
 
+        :type field: str
+        :rtype: list of unicode
+        """
+        with self.__lock:
+            return list(self.__postings.get(field, ()))
 
-class FilmscribeCustomRecord(object):
-    def __init__(self):
-        self.__keys = []
-        self.__values = []
+    def add(self, name, filmscribe_file):
+        """Index the events of a file, replacing an earlier file of the same name.
 
-    def add_key(self, value):
-        self.__keys.append(value)
+        :type name: str or unicode
+        :param name: Any key for the file, usually its path
+        :type filmscribe_file: FilmscribeFile
+        """
+        lists = filmscribe_file.assemble_lists + filmscribe_file.optical_lists
+        if len(lists) >> self.__LIST_BITS:
+            raise ValueError('{0} has more than {1} lists'.format(name, (1 << self.__LIST_BITS) - 1))
+        entries = []
+        for i, filmscribe_list in enumerate(lists):
+            events = filmscribe_list.events
+            if len(events) >> self.__EVENT_BITS:
+                raise ValueError('{0} has a list of more than {1} events'.format(name, (1 << self.__EVENT_BITS) - 1))
+            for k, event in enumerate(events):
+                source = _peek(event, 'source')
+                if source is None:
+                    continue
+                position = i << self.__EVENT_BITS | k
+                for field in self.FIELDS:
+                    value = getattr(source, field)
+                    if value is not None:
+                        entries.append((field, value, position))
+                custom = _peek(source, 'custom') if self.custom else None
+                if custom is not None:
+                    prefix = self.CUSTOM_PREFIX
+                    entries.extend((prefix + key, value, position) for key, value in zip(custom.keys, custom.values)
+                                   if key is not None and value is not None)
+
+        with self.__lock:
+            self.__remove(name)
+            number = self.__next_number
+            self.__next_number += 1
+            self.__files[name] = filmscribe_file
+            self.__numbers[name] = number
+            self.__names[number] = name
+            keys = self.__keys[number] = set()
+            postings = self.__postings
+            for field, value, position in entries:
+                values = postings.get(field)
+                if values is None:
+                    values = postings[field] = {}
+                refs = values.get(value)
+                if refs is None:
+                    refs = values[value] = (array('I'), array('I'))
+                refs[0].append(number)
+                refs[1].append(position)
+                keys.add((field, value))
+
+    def remove(self, name):
+        """Drop a file from the index, only the entries it used are touched.
+
+        :type name: str or unicode
+        :return: True when the file was indexed
+        :rtype: bool
+        """
+        with self.__lock:
+            return self.__remove(name)
+
+    def __remove(self, name):
+        number = self.__numbers.pop(name, None)
+        if number is None:
+            return False
+        del self.__files[name]
+        del self.__names[number]
+        postings = self.__postings
+        for field, value in self.__keys.pop(number):
+            values = postings[field]
+            numbers, positions = values[value]
+            kept = [i for i, other in enumerate(numbers) if other != number]
+            if kept:
+                values[value] = (array('I', [numbers[i] for i in kept]), array('I', [positions[i] for i in kept]))
+                continue
+            del values[value]
+            if not values:
+                del postings[field]
+        return True
+
+    def lookup(self, field, value):
+        """Events whose field has value.
+
+        :type field: str
+        :param field: One of FIELDS, or 'custom.<Name>' for a Custom field
+        :type value: unicode
+        :rtype: list of (str, int, int)
+        :return: (name, list, event) positions, in the order the files were added
+        """
+        with self.__lock:
+            numbers, positions = self.__postings.get(field, {}).get(value, ((), ()))
+            return [self.__unpack(number, position) for number, position in zip(numbers, positions)]
 
-    def add_value(self, value):
-        self.__values.append(value)
+    def count(self, field, value):
+        """Number of events whose field has value, without decoding them.
 
-    @property
-    def data(self):
-        return dict(zip(self.__keys, self.__values))
+        :rtype: int
+        """
+        with self.__lock:
+            return len(self.__postings.get(field, {}).get(value, ((),))[0])
 
+    def events(self, field, value):
+        """Events whose field has value, with their file and list.
+
+        :type field: str
+        :type value: unicode
+        :rtype: list of (str, FilmscribeList, FilmscribeEvent)
+        """
+        found = []
+        lists = {}
+        for name, i, k in self.lookup(field, value):
+            if name not in lists:
+                filmscribe_file = self.__files[name]
+                lists[name] = filmscribe_file.assemble_lists + filmscribe_file.optical_lists
+            filmscribe_list = lists[name][i]
+            found.append((name, filmscribe_list, filmscribe_list.events[k]))
+        return found
+
+    def __unpack(self, number, position):
+        return self.__names[number], position >> self.__EVENT_BITS, position & (1 << self.__EVENT_BITS) - 1
+
+
+class FilmscribeParseStats(object):
+    """Counters and timings of one or more parses, see FilmscribeFile.from_file.
+
+    Seconds are split in phases: io reading the input, parser inside the xml
+    parser itself, handler dispatching the callbacks and model building the
+    filmscribe objects. Peak memory is the peak RSS of the process, as Python 2
+    has no tracemalloc.
+    """
+    PHASES = ('io', 'parser', 'handler', 'model')
 
-class FilmscribeEventSource(object):
     def __init__(self):
-        self.__clip_name = None
-        self.__mob_id = None
-        self.__start = FilmscribeTime()
-        self.__end = FilmscribeTime()
-        self.__endout = None
-        self.__unc = None
-        self.__custom = FilmscribeCustomRecord()
-        self.__tape_name = None
-        self.__cam_roll = None
-        self.__slate = None
-        self.__scene_take = None
+        self.files = 0
+        self.bytes_read = 0
+        self.peak_rss_bytes = 0
+        self.elements = {}
+        self.events = {}
+        # Raw timings, handler includes model and total includes everything.
+        self.seconds = {'io': 0.0, 'handler': 0.0, 'model': 0.0, 'total': 0.0}
 
     @property
-    def clip_name(self):
-        return self.__clip_name
+    def phases(self):
+        """
+        :rtype: dict
+        :return: Seconds spent in each of PHASES and in total
+        """
+        seconds = self.seconds
+        return {'io': seconds['io'],
+                'parser': max(0.0, seconds['total'] - seconds['io'] - seconds['handler']),
+                'handler': max(0.0, seconds['handler'] - seconds['model']),
+                'model': seconds['model'],
+                'total': seconds['total']}
+
+    def add(self, other):
+        """Add the counters and timings of other, to aggregate the stats of many files.
+
+        :type other: FilmscribeParseStats
+        :rtype: FilmscribeParseStats
+        """
+        self.files += other.files
+        self.bytes_read += other.bytes_read
+        self.peak_rss_bytes = max(self.peak_rss_bytes, other.peak_rss_bytes)
+        for mine, theirs in ((self.elements, other.elements), (self.events, other.events),
+                             (self.seconds, other.seconds)):
+            for key, value in theirs.items():
+                mine[key] = mine.get(key, 0) + value
+        return self
+
+    def to_dict(self):
+        """
+        :rtype: dict
+        """
+        return {'files': self.files, 'bytes_read': self.bytes_read, 'peak_rss_bytes': self.peak_rss_bytes,
+                'elements': dict(self.elements), 'events': dict((unicode(key), value)
+                                                                for key, value in self.events.items()),
+                'seconds': dict((phase, round(value, 6)) for phase, value in self.phases.items())}
 
-    @clip_name.setter
-    def clip_name(self, value):
-        self.__clip_name = value
+    def to_json(self, **kwargs):
+        """
+        :param kwargs: Passed on to json.dumps
+        :rtype: str
+        """
+        return json.dumps(self.to_dict(), sort_keys=True, **kwargs)
 
-    @property
-    def mob_id(self):
-        return self.__mob_id
+    def to_prometheus(self, prefix='filmscribe_parse', labels=None):
+        """Prometheus text exposition of the stats.
 
-    @mob_id.setter
-    def mob_id(self, value):
-        self.__mob_id = value
+        :type prefix: str
+        :param prefix: Prefix of the metric names
+        :type labels: dict or None
+        :param labels: Labels added to every sample, such as the host
+        :rtype: str
+        """
+        def sample(name, value, **extra):
+            pairs = sorted((labels or {}).items()) + sorted(extra.items())
+            label_text = u','.join(u'{0}="{1}"'.format(key, unicode(label).replace('\\', '\\\\').replace(
+                '"', '\\"').replace('\n', '\\n')) for key, label in pairs)
+            return u'{0}_{1}{2} {3}'.format(prefix, name, u'{' + label_text + u'}' if label_text else u'',
+                                            _format_number(value))
+
+        lines = []
+        for name, kind, text, samples in (
+                ('files_total', 'counter', 'Files parsed.', [sample('files_total', self.files)]),
+                ('bytes_read_total', 'counter', 'Bytes read from the input.',
+                 [sample('bytes_read_total', self.bytes_read)]),
+                ('seconds_total', 'counter', 'Seconds spent parsing, by phase.',
+                 [sample('seconds_total', round(self.phases[phase], 6), phase=phase) for phase in self.PHASES]),
+                ('elements_total', 'counter', 'Elements parsed, by tag.',
+                 [sample('elements_total', count, tag=tag) for tag, count in sorted(self.elements.items())]),
+                ('events_total', 'counter', 'Events parsed, by type.',
+                 [sample('events_total', count, type=kind or u'') for kind, count in sorted(self.events.items())]),
+                ('peak_rss_bytes', 'gauge', 'Peak resident set size of the process.',
+                 [sample('peak_rss_bytes', self.peak_rss_bytes)])):
+            lines.append(u'# HELP {0}_{1} {2}'.format(prefix, name, text))
+            lines.append(u'# TYPE {0}_{1} {2}'.format(prefix, name, kind))
+            lines.extend(samples)
+        return u'\n'.join(lines) + u'\n'
+
+
+class _FilmscribeCountingReader(object):
+    """File object wrapper that adds the bytes read and the time spent reading to stats."""
+
+    def __init__(self, infile, stats):
+        self.__infile = infile
+        self.__stats = stats
+        self.name = getattr(infile, 'name', None)
+
+    def read(self, size=-1):
+        started = time.time()
+        data = self.__infile.read(size)
+        self.__stats.seconds['io'] += time.time() - started
+        self.__stats.bytes_read += len(data)
+        return data
+
+    def close(self):
+        self.__infile.close()
+
+
+# Compressed bytes read at a time, see _FilmscribeDecompressingReader.
+_DECOMPRESS_CHUNK_SIZE = 1 << 20
+
+# Magic bytes of the compressed formats read by from_file, with the module each one needs.
+_COMPRESSIONS = (
+    ('gzip', b'\x1f\x8b', lambda: zlib.decompressobj(16 + zlib.MAX_WBITS), zlib),
+    ('bz2', b'BZh', lambda: bz2.BZ2Decompressor(), bz2),
+    ('xz', b'\xfd7zXZ\x00', lambda: lzma.LZMADecompressor(), lzma),
+    ('zstd', b'\x28\xb5\x2f\xfd', lambda: zstandard.ZstdDecompressor().decompressobj(), zstandard),
+)
+
+# Suffixes of the files picked up when expanding directories.
+_XML_SUFFIXES = ('.xml', '.xml.gz', '.xml.bz2', '.xml.xz', '.xml.zst')
+
+_DOCUMENT_START = re.compile(br'(\xef\xbb\xbf)?\s*<')
+
+
+def _is_document(source):
+    """True when source holds a document rather than naming a file.
+
+    Byte strings are documents when they start like xml, and file names
+    otherwise, even when they start like the magic bytes of a compressed
+    format. Compressed documents are passed as bytearray, memoryview or
+    mmap. Unicode strings are always file names.
+    """
+    if isinstance(source, (bytearray, memoryview, mmap.mmap)):
+        return True
+    return isinstance(source, bytes) and bool(_DOCUMENT_START.match(source[:64]))
+
+
+class _FilmscribeBufferReader(object):
+    """Reads bytes held in memory as a file, one slice at a time, without copying the whole buffer."""
+
+    def __init__(self, data):
+        self.__data = data if isinstance(data, (bytes, mmap.mmap)) else memoryview(data)
+        self.__position = 0
+        self.name = None
+
+    def read(self, size=-1):
+        start = self.__position
+        end = len(self.__data) if size is None or size < 0 else min(start + size, len(self.__data))
+        self.__position = end
+        data = self.__data[start:end]
+        return data if isinstance(data, bytes) else data.tobytes()
+
+    def close(self):
+        pass
 
-    @property
-    def start(self):
-        return self.__start
 
-    @start.setter
-    def start(self, value):
-        self.__start = value
+class _FilmscribeDecompressingReader(object):
+    """Decompresses a file as it is read, in _DECOMPRESS_CHUNK_SIZE steps.
 
-    @property
-    def end(self):
-        return self.__end
+    Files made of several concatenated members, as written by pigz or
+    pbzip2, are read through to the end.
+    """
 
-    @end.setter
-    def end(self, value):
-        self.__end = value
+    def __init__(self, infile, head, magic, factory):
+        """
 
-    @property
-    def endout(self):
-        return self.__endout
+        :param infile: Binary file object, positioned after head
+        :type head: str
+        :param head: Bytes already read from infile
+        :type magic: str
+        :param magic: Magic bytes that start every member
+        :param factory: Makes the decompressor of one member
+        """
+        self.__infile = infile
+        self.__magic = magic
+        self.__factory = factory
+        self.__decompressor = None
+        self.__pending = head
+        self.__unused = b''
+        self.__buffer = b''
+        self.__offset = 0
+        self.__eof = False
+        self.name = getattr(infile, 'name', None)
+
+    def read(self, size=-1):
+        while not self.__eof and (size is None or size < 0 or len(self.__buffer) - self.__offset < size):
+            self.__fill()
+        if size is None or size < 0:
+            size = len(self.__buffer) - self.__offset
+        data = self.__buffer[self.__offset:self.__offset + size]
+        self.__offset += len(data)
+        return data
+
+    def __fill(self):
+        data = self.__pending or self.__infile.read(_DECOMPRESS_CHUNK_SIZE)
+        self.__pending = b''
+        chunks = [self.__buffer[self.__offset:]]
+        if not data:
+            self.__eof = True
+            flush = getattr(self.__decompressor, 'flush', None)
+            if flush is not None:
+                chunks.append(flush())
+        # Bytes left over by the last read, such as the first bytes of a member cut by the read size.
+        data, self.__unused = (self.__unused + data) if data else b'', b''
+        while data:
+            if self.__decompressor is None:
+                if len(data) < len(self.__magic) and self.__magic.startswith(data):
+                    self.__unused = data
+                    break
+                if not data.startswith(self.__magic):
+                    # Anything but another member past the end of a stream is padding.
+                    self.__eof = True
+                    break
+                self.__decompressor = self.__factory()
+            try:
+                chunks.append(self.__decompressor.decompress(data))
+            except EOFError:
+                # bz2 finds out only now that its member ended exactly at the end of the last read.
+                self.__decompressor = None
+                continue
+            data = getattr(self.__decompressor, 'unused_data', b'')
+            if data or getattr(self.__decompressor, 'eof', False):
+                self.__decompressor = None
+        self.__buffer = b''.join(chunks)
+        self.__offset = 0
+
+    def close(self):
+        # infile is closed by _FilmscribeInput, and only when it opened infile.
+        pass
 
-    @endout.setter
-    def endout(self, value):
-        self.__endout = value
 
-    @property
-    def unc(self):
-        return self.__unc
+class _FilmscribePrefixedReader(object):
+    """File object that returns bytes already read from infile before the rest of it."""
+
+    def __init__(self, infile, head):
+        self.__infile = infile
+        self.__head = head
+        self.name = getattr(infile, 'name', None)
+        # Once the head is returned, reads go straight to infile.
+        self.read = self.__read_head if head else infile.read
+
+    def __read_head(self, size=-1):
+        if size is None or size < 0:
+            data = self.__head + self.__infile.read()
+        else:
+            data = self.__head[:size]
+            if len(data) < size:
+                data += self.__infile.read(size - len(data))
+        self.__head = self.__head[len(data):]
+        if not self.__head:
+            self.read = self.__infile.read
+        return data
+
+    def close(self):
+        pass
 
-    @unc.setter
-    def unc(self, value):
-        self.__unc = value
 
-    @property
-    def custom(self):
-        return self.__custom
+class _FilmscribeInput(object):
+    """Opens any source from_file accepts as a binary file object of xml.
 
-    @custom.setter
-    def custom(self, value):
-        self.__custom = value
+    Used as a context manager, it closes only the files it opened itself.
 
-    @property
-    def tape_name(self):
-        return self.__tape_name
+        with _FilmscribeInput(source) as infile:
+            ...
+    """
+
+    def __init__(self, source):
+        """
 
-    @tape_name.setter
-    def tape_name(self, value):
-        self.__tape_name = value
+        :type source: str or unicode or file or bytearray or memoryview or mmap.mmap
+        :param source: File name, binary file object, or a document in memory, plain or compressed
+        """
+        self.__source = source
+        self.__opened = None
+
+    def __enter__(self):
+        source = self.__source
+        if _is_document(source):
+            infile = _FilmscribeBufferReader(source)
+        elif hasattr(source, 'read'):
+            infile = source
+        else:
+            infile = self.__opened = open(source, 'rb')
+
+        head = infile.read(8)
+        for name, magic, factory, module in _COMPRESSIONS:
+            if head.startswith(magic):
+                if module is None:
+                    raise ValueError('Reading {0} compressed input needs the {1} module'.format(
+                        name, {'xz': 'lzma', 'zstd': 'zstandard'}[name]))
+                return _FilmscribeDecompressingReader(infile, head, magic, factory)
+        return _FilmscribePrefixedReader(infile, head)
+
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        if self.__opened is not None:
+            self.__opened.close()
+
+
+def _peak_rss_bytes():
+    if resource is None:
+        return 0
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * (1 if sys.platform == 'darwin' else 1024)
+
+
+class FilmscribeParseResult(object):
+    """Outcome of parsing one file of a batch, see FilmscribeFile.from_files."""
+
+    def __init__(self, filename, filmscribe_file=None, error=None, elapsed=0.0, stats=None):
+        """
+
+        :type filename: str
+        :type filmscribe_file: FilmscribeFile or None
+        :param filmscribe_file: Parsed file, None when parsing failed
+        :type error: str or None
+        :param error: Reason the file could not be parsed
+        :type elapsed: float
+        :param elapsed: Seconds spent parsing
+        :type stats: FilmscribeParseStats or None
+        :param stats: Instrumentation of the parse, also kept when it failed
+        """
+        self.filename = filename
+        self.filmscribe_file = filmscribe_file
+        self.error = error
+        self.elapsed = elapsed
+        self.stats = stats
 
     @property
-    def cam_roll(self):
-        return self.__cam_roll
+    def ok(self):
+        return self.error is None
+
+    def summary(self):
+        """
+        :rtype: dict
+        :return: JSON serializable summary of the result
+        """
+        summary = {'filename': self.filename, 'ok': self.ok, 'error': self.error, 'elapsed': round(self.elapsed, 6)}
+        if self.filmscribe_file is not None:
+            summary['lists'] = [{'kind': kind,
+                                 'title': filmscribe_list.head.title if filmscribe_list.head else None,
+                                 'events': len(filmscribe_list.events)}
+                                for kind, lists in (('assemble', self.filmscribe_file.assemble_lists),
+                                                    ('optical', self.filmscribe_file.optical_lists))
+                                for filmscribe_list in lists]
+        if self.stats is not None:
+            summary['stats'] = self.stats.to_dict()
+        return summary
+
+
+# Bytes read at a time when parsing may stop early, see FilmscribeHandler.stops_early.
+_SELECTIVE_CHUNK_SIZE = 8192
+
+
+def _options_key(options):
+    """Hashable form of the from_file options, defaults left out.
+
+    Every backend builds the same model and stats only observe the parse, so
+    neither is part of the key.
+    """
+    return tuple(sorted((name, tuple(sorted(value)) if isinstance(value, (list, set, frozenset)) else value)
+                        for name, value in options.items()
+                        if value not in (None, False) and name not in ('backend', 'stats')))
+
+
+class _FilmscribeErrorLocator(Locator):
+    """Position of a parse error reported by a backend other than sax."""
+
+    def __init__(self, line, column, system_id=None):
+        self.__line = line
+        self.__column = column
+        self.__system_id = system_id
+
+    def getLineNumber(self):
+        return self.__line
+
+    def getColumnNumber(self):
+        return self.__column
+
+    def getSystemId(self):
+        return self.__system_id
+
+
+class _FilmscribeSaxBackend(object):
+    """The xml.sax reader, the reference backend."""
+    name = 'sax'
+
+    def __init__(self, handler, error_handler):
+        self.__parser = make_parser()
+        self.__parser.setContentHandler(handler)
+        self.__parser.setErrorHandler(error_handler)
+
+    def parse(self, infile):
+        self.__parser.parse(infile)
+
+    def feed(self, data):
+        self.__parser.feed(data)
+
+    def close(self):
+        self.__parser.close()
+
+
+class _FilmscribeExpatBackend(object):
+    """Drives the handler straight from pyexpat, without the xml.sax reader layer.
+
+    Text is buffered by expat, so characters() is called once per text node,
+    and element names are interned in one table shared by every parser.
+    """
+    name = 'expat'
+    names = {}
+
+    def __init__(self, handler, error_handler):
+        self.__error_handler = error_handler
+        self.__failed = False
+        self.__parser = parser = expat.ParserCreate(intern=self.names)
+        parser.buffer_text = True
+        parser.buffer_size = 65536
+        parser.StartElementHandler = handler.startElement
+        parser.EndElementHandler = handler.endElement
+        parser.CharacterDataHandler = handler.characters
+
+    def parse(self, infile):
+        if not self.__failed:
+            try:
+                self.__parser.ParseFile(infile)
+            except expat.ExpatError as error:
+                self.__fatal_error(error, getattr(infile, 'name', None))
+
+    def feed(self, data, is_final=False):
+        if not self.__failed:
+            try:
+                self.__parser.Parse(data, is_final)
+            except expat.ExpatError as error:
+                self.__fatal_error(error)
+
+    def close(self):
+        self.feed(b'', True)
+
+    def __fatal_error(self, error, system_id=None):
+        # Reported like the sax backend reports it, the parser is unusable after it.
+        self.__failed = True
+        locator = _FilmscribeErrorLocator(error.lineno, error.offset, system_id)
+        self.__error_handler.fatalError(SAXParseException(expat.ErrorString(error.code), error, locator))
+
+
+class _FilmscribeLxmlBackend(object):
+    """Drives the handler from lxml.etree.iterparse, or XMLPullParser when fed.
+
+    Names, attributes and text are converted to unicode, as the other
+    backends deliver them. Closed elements are cleared, so the tree lxml
+    builds on the side stays small.
+    """
+    name = 'lxml'
+
+    def __init__(self, handler, error_handler):
+        self.__handler = handler
+        self.__error_handler = error_handler
+        self.__pull_parser = None
+        self.__names = {}
+
+    def parse(self, infile):
+        try:
+            self.__dispatch(etree.iterparse(infile, events=('start', 'end')))
+        except etree.XMLSyntaxError as error:
+            self.__fatal_error(error, getattr(infile, 'name', None))
+
+    def feed(self, data):
+        if self.__pull_parser is None:
+            self.__pull_parser = etree.XMLPullParser(events=('start', 'end'))
+        try:
+            self.__pull_parser.feed(data)
+        except etree.XMLSyntaxError as error:
+            self.__fatal_error(error)
+        self.__dispatch(self.__pull_parser.read_events())
+
+    def close(self):
+        if self.__pull_parser is not None:
+            try:
+                self.__pull_parser.close()
+            except etree.XMLSyntaxError as error:
+                self.__fatal_error(error)
+            self.__dispatch(self.__pull_parser.read_events())
+
+    def __dispatch(self, events):
+        handler = self.__handler
+        names = self.__names
+        for event, element in events:
+            name = names.get(element.tag)
+            if name is None:
+                name = names[element.tag] = unicode(element.tag)
+            if event == 'start':
+                handler.startElement(name, dict((unicode(k), unicode(v)) for k, v in element.attrib.items()))
+                continue
+            if element.text is not None and not len(element):
+                handler.characters(unicode(element.text))
+            handler.endElement(name)
+            element.clear()
+            while element.getprevious() is not None:
+                del element.getparent()[0]
+
+    def __fatal_error(self, error, system_id=None):
+        line, column = getattr(error, 'position', (0, 0))
+        locator = _FilmscribeErrorLocator(line, column, system_id)
+        self.__error_handler.fatalError(SAXParseException(error.msg, error, locator))
+
+
+_BACKENDS = OrderedDict((backend.name, backend) for backend in (
+    _FilmscribeExpatBackend,
+    _FilmscribeLxmlBackend,
+    _FilmscribeSaxBackend,
+))
+
+
+def parser_backends():
+    """Names of the parser backends that can be used here, the default first.
+
+    :rtype: list of str
+    """
+    return [name for name in _BACKENDS if name != 'lxml' or etree is not None]
+
+
+def _backend_name(backend):
+    """
+    :type backend: str or None
+    :param backend: Name of the backend, None for the default, see parser_backends
+    :rtype: str
+    :raises ValueError: When the backend is unknown or cannot be used here
+    """
+    if backend is None:
+        return parser_backends()[0]
+    if backend not in parser_backends():
+        raise ValueError('Unknown or unavailable parser backend {0!r}, use one of {1}'.format(
+            backend, ', '.join(parser_backends())))
+    return backend
+
+
+def _make_backend(backend, handler, error_handler):
+    """
+    :type backend: str or None
+    :param backend: Name of the backend, None for the default, see parser_backends
+    """
+    return _BACKENDS[_backend_name(backend)](handler, error_handler)
+
+
+def _parse_stats(stats):
+    """Stats to instrument a parse into, from the stats argument of the parse entry points.
+
+    :type stats: FilmscribeParseStats or bool or None
+    :param stats: These stats, True for new ones, False or None for none
+    :rtype: FilmscribeParseStats or None
+    """
+    if stats is True:
+        return FilmscribeParseStats()
+    return None if stats is False else stats
+
+
+def _parse(filmscribe_file, infile, error_handler, backend=None, stats=None, **options):
+    """Run a parser backend over infile into filmscribe_file.
+
+    :type backend: str or None
+    :param backend: Name of the backend, see parser_backends
+    :type stats: FilmscribeParseStats or bool or None
+    :param stats: Instrument the parse into stats, see _parse_stats
+    :param options: Passed on to FilmscribeHandler
+    """
+    started = time.time()
+    stats = _parse_stats(stats)
+    if stats is not None:
+        infile = _FilmscribeCountingReader(infile, stats)
+        filmscribe_file.stats = stats
+    handler = FilmscribeHandler(filmscribe_file, stats=stats, **options)
+    parser = _make_backend(backend, handler, error_handler)
+    try:
+        if handler.stops_early:
+            # Small chunks, so little is read past the point where parsing stops.
+            for chunk in iter(lambda: infile.read(_SELECTIVE_CHUNK_SIZE), b''):
+                parser.feed(chunk)
+            parser.close()
+        else:
+            parser.parse(infile)
+    except FilmscribeBreakException:
+        pass
+    finally:
+        if stats is not None:
+            stats.files += 1
+            stats.seconds['total'] += time.time() - started
+            stats.peak_rss_bytes = max(stats.peak_rss_bytes, _peak_rss_bytes())
+
+
+def _parse_batch_file(task):
+    """Worker of FilmscribeFile.from_files, never raises."""
+    filename, options = task
+    started = time.time()
+    stats = FilmscribeParseStats() if options.get('stats') else None
+    try:
+        filmscribe_file = FilmscribeFile()
+        with _FilmscribeInput(filename) as infile:
+            _parse(filmscribe_file, infile, ErrorHandler(), **dict(options, stats=stats))
+        if options.get('strings') is None:
+            # The pool of the file is not sent back from a worker, the parent shares the strings into its own.
+            filmscribe_file.strings = None
+        return FilmscribeParseResult(filename, filmscribe_file, elapsed=time.time() - started, stats=stats)
+    except Exception as error:
+        return FilmscribeParseResult(filename, error='{0}: {1}'.format(type(error).__name__, error),
+                                     elapsed=time.time() - started, stats=stats)
+
+
+# Top level elements a document is split at, see _list_sections.
+_SECTION_TAGS = (b'AssembleList', b'OpticalList')
+
+
+def _list_sections(data):
+    """Byte ranges of the lists of a document, found with plain searches instead of parsing it.
+
+    :type data: str or mmap.mmap
+    :rtype: (int, list of (int, int)) or None
+    :return: Offset of the first list, which ends the prelude holding the FilmScribeFile start tag, and
+        the (start, end) of every list. None when there are fewer than two lists or the tags are not
+        plain enough to split at safely.
+    """
+    sections = []
+    position = 0
+    starts = dict((tag, data.find(b'<' + tag)) for tag in _SECTION_TAGS)
+    while True:
+        for tag, start in starts.items():
+            if 0 <= start < position:
+                starts[tag] = data.find(b'<' + tag, position)
+        found = [(start, tag) for tag, start in starts.items() if start >= 0]
+        if not found:
+            break
+        start, tag = min(found)
+        name_end = start + 1 + len(tag)
+        if data[name_end:name_end + 1] not in (b'>', b' ', b'\t', b'\r', b'\n'):
+            # A self-closing list, or another element whose name starts the same.
+            return None
+        closing = b'</' + tag + b'>'
+        end = data.find(closing, name_end)
+        if end < 0:
+            return None
+        position = end + len(closing)
+        sections.append((start, position))
+    if len(sections) < 2 or data.find(b'<FilmScribeFile', 0, sections[0][0]) < 0:
+        return None
+    return sections[0][0], sections
+
+
+def _parse_section(task):
+    """Worker of _parse_split, parses one list wrapped in the prelude of its document.
+
+    The list is sent back in the binary list format, which the parent
+    decodes faster than it would unpickle the objects.
+
+    :return: (index, data, stats), data is None when the list cannot be parsed
+    """
+    index, (filename, prelude_end, start, end, options) = task
+    stats = FilmscribeParseStats() if options.get('stats') else None
+    try:
+        with open(filename, 'rb') as infile:
+            prelude = infile.read(prelude_end)
+            infile.seek(start)
+            data = prelude + infile.read(end - start) + b'</FilmScribeFile>'
+        filmscribe_file = FilmscribeFile()
+        _parse(filmscribe_file, _FilmscribeBufferReader(data), ErrorHandler(), **dict(options, stats=stats))
+        return index, filmscribe_file.to_binary(), stats
+    except Exception:
+        return index, None, stats
+
+
+def _parse_split(filmscribe_file, filename, jobs, strings, options):
+    """Parse the lists of one file on worker processes into filmscribe_file, see FilmscribeFile.from_file.
+
+    :return: False when the file was not split, nothing has been parsed then
+    """
+    with open(filename, 'rb') as infile:
+        try:
+            data = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, mmap.error):
+            # Empty files cannot be mapped.
+            return False
+        try:
+            if any(data[:8].startswith(magic) for _, magic, _, _ in _COMPRESSIONS):
+                return False
+            found = _list_sections(data)
+        finally:
+            data.close()
+    if found is None:
+        return False
+
+    prelude_end, sections = found
+    stats = options.get('stats')
+    task_options = dict(options, stats=stats is not None)
+    # Largest lists first, so the workers finish close together.
+    order = sorted(range(len(sections)), key=lambda i: sections[i][0] - sections[i][1])
+    tasks = [(i, (filename, prelude_end, sections[i][0], sections[i][1], task_options)) for i in order]
+    parsed = [None] * len(sections)
+    strings = strings if strings is not None else FilmscribeStringPool()
+    pool = Pool(min(jobs or cpu_count(), len(sections)))
+    try:
+        for i, data, section_stats in pool.imap_unordered(_parse_section, tasks):
+            if data is None:
+                # Parse in this process, so errors are reported as they are without jobs.
+                return False
+            # Decoded while the other lists are still parsed.
+            parsed[i] = strings.share(FilmscribeBinaryFile.from_buffer(data).to_filmscribe_file())
+            if stats is not None:
+                stats.add(section_stats)
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+    filmscribe_file.version, filmscribe_file.date = parsed[0].version, parsed[0].date
+    for section_file in parsed:
+        for filmscribe_list in section_file.assemble_lists:
+            filmscribe_file.add_assemble_list(filmscribe_list)
+        for filmscribe_list in section_file.optical_lists:
+            filmscribe_file.add_optical_list(filmscribe_list)
+    filmscribe_file.strings = strings
+    if stats is not None:
+        # Every section parsed the FilmScribeFile root as a file of its own.
+        stats.files -= len(parsed) - 1
+        stats.elements['FilmScribeFile'] -= len(parsed) - 1
+        filmscribe_file.stats = stats
+    return True
+
+
+class FilmscribeEventMaster(_FilmscribeSlots):
+    """Record side of an event. start and end are allocated on first access."""
+    __slots__ = ('reel', 'start', 'end', 'endout')
+
+    def __init__(self):
+        self.reel = None
+        self.endout = None
+
+    def __getattr__(self, name):
+        # Only reached for slots that have not been assigned yet.
+        if name in ('start', 'end'):
+            value = FilmscribeTime()
+            setattr(self, name, value)
+            return value
+        raise AttributeError(name)
 
-    @cam_roll.setter
-    def cam_roll(self, value):
-        self.__cam_roll = value
+
+class FilmscribeCustomRecord(_FilmscribeSlots):
+    __slots__ = ('__keys', '__values')
+
+    def __init__(self):
+        self.__keys = []
+        self.__values = []
+
+    def add_key(self, value):
+        self.__keys.append(value)
+
+    def add_value(self, value):
+        self.__values.append(value)
 
     @property
-    def slate(self):
-        return self.__slate
+    def keys(self):
+        return self.__keys
 
-    @slate.setter
-    def slate(self, value):
-        self.__slate = value
+    @property
+    def values(self):
+        return self.__values
 
     @property
-    def scene_take(self):
-        return self.__scene_take
+    def data(self):
+        return dict(zip(self.__keys, self.__values))
 
-    @scene_take.setter
-    def scene_take(self, value):
-        self.__scene_take = value
+
+class FilmscribeEventSource(_FilmscribeSlots):
+    """Source side of an event. start, end and custom are allocated on first access."""
+    __slots__ = ('clip_name', 'mob_id', 'start', 'end', 'endout', 'unc', 'custom', 'tape_name', 'cam_roll',
+                 'lab_roll', 'slate', 'scene_take')
+
+    def __init__(self):
+        self.clip_name = None
+        self.mob_id = None
+        self.endout = None
+        self.unc = None
+        self.tape_name = None
+        self.cam_roll = None
+        self.lab_roll = None
+        self.slate = None
+        self.scene_take = None
+
+    def __getattr__(self, name):
+        # Only reached for slots that have not been assigned yet.
+        if name in ('start', 'end'):
+            value = FilmscribeTime()
+        elif name == 'custom':
+            value = FilmscribeCustomRecord()
+        else:
+            raise AttributeError(name)
+        setattr(self, name, value)
+        return value
 
 
 class FilmscribeMotion(object):
@@ -610,56 +2787,1152 @@ class FilmscribeOpticalLayer(object):
     def name(self):
         return self.__name
 
+    @property
+    def factor(self):
+        return self.__factor
+
     @property
     def data(self):
         return self.__data
 
 
 class FilmscribeLocatorEvent(FilmscribeEvent):
+    __slots__ = ('color', 'text')
+
     def __init__(self, **kwargs):
         super(FilmscribeLocatorEvent, self).__init__(**kwargs)
-        self.__color = None
-        self.__text = ''
+        self.color = None
+        self.text = ''
+
+
+# Binary list format, see FilmscribeFile.to_binary and FilmscribeBinaryFile.
+# Integers are stored with _NONE_INT for None, strings as indices into the
+# string table with -1 for None.
+_BINARY_MAGIC = b'FSB\x00'
+_BINARY_VERSION = 2
+_NONE_INT = -2 ** 63
+_NONE_STR = -1
+_TIME = 'qiiqq'
+_HEADER = struct.Struct('<4sHHIIQQQQii')
+_VALUE = 'Bqd'
+_LIST = struct.Struct('<BB' + _VALUE * 6 + 'B' + _TIME + 'QI')
+_EVENT = struct.Struct('<BBqqqqii' + 'ii' + _TIME * 2 + 'i' * 9 + _TIME * 2 + 'IHH' + 'IH' + 'ii')
+_LAYER = struct.Struct('<iiBd')
+_STRING_OFFSET = struct.Struct('<QQ')
+_REF = struct.Struct('<i')
+
+_EVENT_CLASSES = (FilmscribeCutEvent, FilmscribeOpticalEvent, FilmscribeLocatorEvent, FilmscribeEvent)
+_LIST_CLASSES = (FilmscribeAssembleList, FilmscribeOpticalList)
+
+# Presence bits for the lazily allocated parts of an event.
+_HAS_MASTER, _HAS_SOURCE, _HAS_MASTER_START, _HAS_MASTER_END, _HAS_SOURCE_START, _HAS_SOURCE_END, _HAS_CUSTOM = [
+    1 << bit for bit in range(7)]
+
+
+class _FilmscribeBinaryWriter(object):
+    """Writes one FilmscribeFile, see FilmscribeFile.to_binary."""
+
+    def __init__(self, outfile):
+        self.__outfile = outfile
+        self.__strings = {}
+        self.__refs = []
+        self.__layers = []
 
-    @property
-    def color(self):
-        return self.__color
+    def string(self, value):
+        if value is None:
+            return _NONE_STR
+        index = self.__strings.get(value)
+        if index is None:
+            index = self.__strings[value] = len(self.__strings)
+        return index
+
+    def time(self, point):
+        if point is None:
+            return (_NONE_INT, _NONE_STR, _NONE_STR, _NONE_INT, _NONE_INT)
+        return (_int(point.frame), self.string(point.timecode), self.string(point.edgecode),
+                _int(point.timecode_frames), _int(point.edgecode_frames))
+
+    def value(self, value):
+        if value is None:
+            return 0, 0, 0.0
+        if isinstance(value, basestring):
+            return 1, self.string(value), 0.0
+        if isinstance(value, float):
+            return 3, 0, value
+        return 2, value, 0.0
+
+    def write(self, filmscribe_file):
+        outfile = self.__outfile
+        outfile.write(b'\0' * _HEADER.size)
+        offset = _HEADER.size
+        list_records = []
+        for filmscribe_list in filmscribe_file.assemble_lists + filmscribe_file.optical_lists:
+            events_offset = offset
+            for event in filmscribe_list.events:
+                outfile.write(self.event(event))
+                offset += _EVENT.size
+            head = filmscribe_list.head
+            values = []
+            for name in ('title', 'tracks', 'event_count', 'optical_count', 'dupe_count', 'edit_rate'):
+                values.extend(self.value(getattr(head, name) if head is not None else None))
+            duration = head.master_duration if head is not None else None
+            list_records.append(_LIST.pack(_LIST_CLASSES.index(type(filmscribe_list)), head is not None, *(
+                values + [duration is not None] + list(self.time(duration)) +
+                [events_offset, len(filmscribe_list.events)])))
+
+        refs_offset = offset
+        for ref in self.__refs:
+            outfile.write(_REF.pack(ref))
+        offset += _REF.size * len(self.__refs)
+        layers_offset = offset
+        for layer in self.__layers:
+            outfile.write(_LAYER.pack(*layer))
+        offset += _LAYER.size * len(self.__layers)
+
+        version, date = self.string(filmscribe_file.version), self.string(filmscribe_file.date)
+        strings = sorted(self.__strings, key=self.__strings.get)
+        encoded = [value.encode('utf-8') for value in strings]
+        strings_offset = offset
+        blob_offset = offset + _STRING_OFFSET.size * len(encoded)
+        for value in encoded:
+            outfile.write(_STRING_OFFSET.pack(blob_offset, len(value)))
+            blob_offset += len(value)
+        for value in encoded:
+            outfile.write(value)
+        lists_offset = blob_offset
+        for record in list_records:
+            outfile.write(record)
+
+        outfile.seek(0)
+        outfile.write(_HEADER.pack(_BINARY_MAGIC, _BINARY_VERSION, 0, len(list_records), len(strings),
+                                   strings_offset, lists_offset, refs_offset, layers_offset, version, date))
+
+    def event(self, event):
+        string = self.string
+        flags = 0
+        master = _peek(event, 'master')
+        source = _peek(event, 'source')
+        master_times = (None, None)
+        source_times = (None, None)
+        source_fields = (None,) * 9
+        custom = (0, 0, 0)
+        if master is not None:
+            flags |= _HAS_MASTER
+            master_times = (_peek(master, 'start'), _peek(master, 'end'))
+            flags |= (_HAS_MASTER_START if master_times[0] is not None else 0) | (
+                _HAS_MASTER_END if master_times[1] is not None else 0)
+        if source is not None:
+            flags |= _HAS_SOURCE
+            source_times = (_peek(source, 'start'), _peek(source, 'end'))
+            flags |= (_HAS_SOURCE_START if source_times[0] is not None else 0) | (
+                _HAS_SOURCE_END if source_times[1] is not None else 0)
+            source_fields = (source.clip_name, source.mob_id, source.endout, source.unc, source.tape_name,
+                             source.cam_roll, source.lab_roll, source.slate, source.scene_take)
+            record = _peek(source, 'custom')
+            if record is not None:
+                flags |= _HAS_CUSTOM
+                keys, values = record.keys, record.values
+                custom = (len(self.__refs), len(keys), len(values))
+                self.__refs.extend(string(value) for value in keys + values)
+
+        layers = getattr(event, 'layers', ())
+        layers_ref = (len(self.__layers), len(layers))
+        for layer in layers:
+            factor = layer.factor
+            self.__layers.append((string(layer.name), string(layer.type), factor is not None, factor or 0.0))
+
+        fields = [_EVENT_CLASSES.index(type(event)), flags, _int(event.id), _int(event.length),
+                  _int(event.source_count), _int(event.ref_num), string(event.reference), string(event.type),
+                  string(master.reel) if master is not None else _NONE_STR,
+                  string(master.endout) if master is not None else _NONE_STR]
+        fields.extend(self.time(master_times[0]))
+        fields.extend(self.time(master_times[1]))
+        fields.extend(string(value) for value in source_fields)
+        fields.extend(self.time(source_times[0]))
+        fields.extend(self.time(source_times[1]))
+        fields.extend(custom)
+        fields.extend(layers_ref)
+        fields.append(string(getattr(event, 'color', None)))
+        fields.append(string(getattr(event, 'text', None)))
+        return _EVENT.pack(*fields)
+
+
+def _int(value):
+    return _NONE_INT if value is None else value
+
+
+class FilmscribeBinaryFile(object):
+    """Memory-mapped reader of the binary list format written by FilmscribeFile.to_binary.
+
+    Opening only reads the header and the list table. Event k of list j is
+    decoded on its own, without touching the rest of the file. Lists are
+    numbered assemble lists first, then optical lists.
+    """
+
+    def __init__(self, filename):
+        """
+
+        :type filename: str or unicode
+        :param filename:
+        """
+        with open(filename, 'rb') as infile:
+            self.__open(mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ), filename)
+
+    @classmethod
+    def from_buffer(cls, data):
+        """Read the binary list format from memory.
+
+        :type data: str or bytearray
+        :param data: Bytes written by FilmscribeFile.to_binary
+        :rtype: FilmscribeBinaryFile
+        """
+        binary_file = cls.__new__(cls)
+        binary_file.__open(data, '<buffer>')
+        return binary_file
+
+    def __open(self, data, name):
+        self.__map = data
+        (magic, version, _, list_count, self.__string_count, self.__strings_offset, lists_offset, self.__refs_offset,
+         self.__layers_offset, version_ref, date_ref) = _HEADER.unpack_from(self.__map, 0)
+        if magic != _BINARY_MAGIC or version != _BINARY_VERSION:
+            self.close()
+            raise ValueError('{0} is not a filmscribe binary file of version {1}'.format(name, _BINARY_VERSION))
+        self.__strings = {}
+        self.__table = None
+        self.__lists = [_LIST.unpack_from(self.__map, lists_offset + j * _LIST.size) for j in range(list_count)]
+        self.version = self.string(version_ref)
+        self.date = self.string(date_ref)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return len(self.__lists)
+
+    def close(self):
+        if isinstance(self.__map, mmap.mmap):
+            self.__map.close()
+
+    def string(self, index):
+        """
+        :type index: int
+        :rtype: unicode or None
+        """
+        if index == _NONE_STR:
+            return None
+        value = self.__strings.get(index)
+        if value is None:
+            offset, length = _STRING_OFFSET.unpack_from(self.__map, self.__strings_offset + index * _STRING_OFFSET.size)
+            value = self.__strings[index] = self.__map[offset:offset + length].decode('utf-8')
+        return value
+
+    def __string_table(self):
+        """Every string of the file, decoded once, with None last so that _NONE_STR indexes it."""
+        if self.__table is None:
+            data = self.__map
+            offsets = struct.unpack_from('<' + 'QQ' * self.__string_count, data, self.__strings_offset)
+            self.__table = [data[offsets[i]:offsets[i] + offsets[i + 1]].decode('utf-8')
+                            for i in range(0, len(offsets), 2)]
+            self.__table.append(None)
+        return self.__table
+
+    @staticmethod
+    def __time(fields, string):
+        point = FilmscribeTime.__new__(FilmscribeTime)
+        frame, timecode, edgecode, timecode_frames, edgecode_frames = fields
+        point.frame = None if frame == _NONE_INT else frame
+        point.timecode = string(timecode)
+        point.edgecode = string(edgecode)
+        point.timecode_frames = None if timecode_frames == _NONE_INT else timecode_frames
+        point.edgecode_frames = None if edgecode_frames == _NONE_INT else edgecode_frames
+        return point
+
+    def __value(self, tag, integer, real):
+        if tag == 1:
+            return self.string(integer)
+        return (None, None, integer, real)[tag]
+
+    def event_count(self, j):
+        """
+        :type j: int
+        :rtype: int
+        """
+        return self.__lists[j][-1]
+
+    def list(self, j, events=True):
+        """Decode list j.
+
+        :type j: int
+        :type events: bool
+        :param events: Decode the events as well, otherwise only the head
+        :rtype: FilmscribeAssembleList or FilmscribeOpticalList
+        """
+        record = self.__lists[j]
+        filmscribe_list = _LIST_CLASSES[record[0]]()
+        if record[1]:
+            head = filmscribe_list.head = FilmscribeListHead()
+            values = record[2:20]
+            for i, name in enumerate(('title', 'tracks', 'event_count', 'optical_count', 'dupe_count', 'edit_rate')):
+                setattr(head, name, self.__value(*values[i * 3:i * 3 + 3]))
+            if record[20]:
+                head.master_duration = self.__time(record[21:26], self.string)
+        if events:
+            # Decoding every event, so every string is decoded up front and looked up by index.
+            string = self.__string_table().__getitem__
+            data, offset, size, event = self.__map, record[-2], _EVENT.size, self.__event
+            unpack = _EVENT.unpack_from
+            filmscribe_list.events.extend(event(unpack(data, offset + k * size), string) for k in range(record[-1]))
+        return filmscribe_list
+
+    def event(self, j, k):
+        """Decode event k of list j.
+
+        :type j: int
+        :type k: int
+        :rtype: FilmscribeEvent
+        """
+        record = self.__lists[j]
+        if not 0 <= k < record[-1]:
+            raise IndexError(k)
+        return self.__event(_EVENT.unpack_from(self.__map, record[-2] + k * _EVENT.size), self.string)
+
+    def __event(self, fields, string):
+        event_class = _EVENT_CLASSES[fields[0]]
+        event = event_class.__new__(event_class)
+        flags = fields[1]
+        event.id, event.length, event.source_count, event.ref_num = [
+            None if value == _NONE_INT else value for value in fields[2:6]]
+        event.reference, event.type = string(fields[6]), string(fields[7])
+        if flags & _HAS_MASTER:
+            master = event.master = FilmscribeEventMaster()
+            master.reel, master.endout = string(fields[8]), string(fields[9])
+            if flags & _HAS_MASTER_START:
+                master.start = self.__time(fields[10:15], string)
+            if flags & _HAS_MASTER_END:
+                master.end = self.__time(fields[15:20], string)
+        if flags & _HAS_SOURCE:
+            source = event.source = FilmscribeEventSource()
+            (source.clip_name, source.mob_id, source.endout, source.unc, source.tape_name, source.cam_roll,
+             source.lab_roll, source.slate, source.scene_take) = [string(value) for value in fields[20:29]]
+            if flags & _HAS_SOURCE_START:
+                source.start = self.__time(fields[29:34], string)
+            if flags & _HAS_SOURCE_END:
+                source.end = self.__time(fields[34:39], string)
+            if flags & _HAS_CUSTOM:
+                record = source.custom = FilmscribeCustomRecord()
+                offset, key_count, value_count = fields[39:42]
+                refs = [string(_REF.unpack_from(self.__map, self.__refs_offset + (offset + i) * _REF.size)[0])
+                        for i in range(key_count + value_count)]
+                for key in refs[:key_count]:
+                    record.add_key(key)
+                for value in refs[key_count:]:
+                    record.add_value(value)
+        if isinstance(event, FilmscribeOpticalEvent):
+            event.layers = []
+            offset, count = fields[42:44]
+            for i in range(count):
+                name, layer_type, has_factor, factor = _LAYER.unpack_from(
+                    self.__map, self.__layers_offset + (offset + i) * _LAYER.size)
+                kwargs = {}
+                if layer_type != _NONE_STR:
+                    kwargs['type'] = string(layer_type)
+                if has_factor:
+                    kwargs['factor'] = factor
+                event.add_layer(FilmscribeOpticalLayer(string(name), **kwargs))
+        if isinstance(event, FilmscribeLocatorEvent):
+            event.color, event.text = string(fields[44]), string(fields[45])
+        return event
+
+    def to_filmscribe_file(self):
+        """Decode the whole file.
+
+        :rtype: FilmscribeFile
+        """
+        filmscribe_file = FilmscribeFile()
+        filmscribe_file.version = self.version
+        filmscribe_file.date = self.date
+        for j in range(len(self)):
+            filmscribe_list = self.list(j)
+            if isinstance(filmscribe_list, FilmscribeOpticalList):
+                filmscribe_file.add_optical_list(filmscribe_list)
+            else:
+                filmscribe_file.add_assemble_list(filmscribe_list)
+        return filmscribe_file
+
+
+class _FilmscribeTextWriter(object):
+    """Buffers text and writes it to outfile as utf-8 every buffer_size characters."""
+
+    def __init__(self, outfile, buffer_size=65536):
+        self.buffer_size = buffer_size
+        self.__outfile = outfile
+        self.__pieces = []
+        self.__size = 0
+
+    def _write(self, text):
+        self.__pieces.append(text)
+        self.__size += len(text)
+        if self.__size >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.__pieces:
+            self.__outfile.write(u''.join(self.__pieces).encode('utf-8'))
+            del self.__pieces[:]
+            self.__size = 0
+
+
+def _format_number(value):
+    """Numbers as FilmScribe writes them, 24 rather than 24.0."""
+    if isinstance(value, float):
+        text = repr(value)
+        return text[:-2] if text.endswith('.0') else text
+    return unicode(value)
+
+
+def _write_to(outfile, write):
+    """Run write(stream) on a file name, a file object or, when outfile is None, a buffer whose bytes are returned."""
+    if outfile is None:
+        buf = BytesIO()
+        write(buf)
+        return buf.getvalue()
+    if hasattr(outfile, 'write'):
+        write(outfile)
+    else:
+        with open(outfile, 'wb') as stream:
+            write(stream)
+
+
+class FilmscribeXmlWriter(_FilmscribeTextWriter):
+    """Streams the model back to FilmScribe xml.
+
+    Everything the parser reads is written, so parsing the output builds the
+    same model. Lists are written event by event, the events can come from a
+    generator such as iter_events, and memory stays flat regardless of the
+    length of the list.
+    """
+
+    def __init__(self, outfile, buffer_size=65536):
+        """
+
+        :param outfile: Binary file object
+        :type buffer_size: int
+        :param buffer_size: Characters collected before each write to outfile
+        """
+        super(FilmscribeXmlWriter, self).__init__(outfile, buffer_size)
+        self.__list_tag = None
+
+    def start_file(self, version='1.0', date=None):
+        """
+        :type version: str or None
+        :type date: str or None
+        """
+        attributes = u''.join(u' {0}={1}'.format(name, quoteattr(value))
+                              for name, value in (('Version', version), ('Date', date)) if value is not None)
+        self._write(u'<?xml version="1.0" encoding="UTF-8"?>\n<FilmScribeFile{0}>\n'.format(attributes))
+
+    def end_file(self):
+        self._write(u'</FilmScribeFile>\n')
+        self.flush()
+
+    def start_list(self, head, optical=False):
+        """
+        :type head: FilmscribeListHead or None
+        :type optical: bool
+        :param optical: Write an OpticalList instead of an AssembleList
+        """
+        self.__list_tag = 'OpticalList' if optical else 'AssembleList'
+        self._write(u'    <{0}>\n'.format(self.__list_tag))
+        if head is not None:
+            write = self._write
+            write(u'        <ListHead>\n')
+            for tag, value in (('Title', head.title), ('Tracks', head.tracks), ('EventCount', head.event_count),
+                               ('OpticalCount', head.optical_count), ('DupeCount', head.dupe_count)):
+                self.__text(u'            ', tag, value)
+            self.__time(u'            ', 'MasterDuration', head.master_duration, 'FrameCount')
+            self.__text(u'            ', 'EditRate', head.edit_rate)
+            write(u'        </ListHead>\n')
+        self._write(u'        <Events>\n')
+
+    def end_list(self):
+        self._write(u'        </Events>\n    </{0}>\n'.format(self.__list_tag))
+        self.__list_tag = None
+
+    def write_event(self, event):
+        """
+        :type event: FilmscribeEvent
+        """
+        write = self._write
+        indent = u'                '
+        master = _peek(event, 'master')
+        source = _peek(event, 'source')
+        if isinstance(event, FilmscribeLocatorEvent):
+            write(u'            <Comment{0}>\n'.format(self.__event_attributes(event)))
+            self.__text(indent, 'Color', event.color)
+            if master is not None:
+                write(indent + u'<Master>\n')
+                self.__point(indent + u'    ', _peek(master, 'start'), 'Frame')
+                write(indent + u'</Master>\n')
+            if source is not None and source.clip_name is not None:
+                write(indent + u'<Source>\n')
+                self.__text(indent + u'    ', 'ClipName', source.clip_name)
+                write(indent + u'</Source>\n')
+            self.__text(indent, 'Text', event.text)
+            write(u'            </Comment>\n')
+            return
+
+        write(u'            <Event{0}>\n'.format(self.__event_attributes(event)))
+        if master is not None:
+            inner = indent + u'    '
+            write(indent + u'<Master>\n')
+            self.__text(inner, 'Reel', master.reel)
+            self.__time(inner, 'Start', _peek(master, 'start'))
+            self.__time(inner, 'End', _peek(master, 'end'))
+            self.__end_out(inner, master.endout)
+            write(indent + u'</Master>\n')
+        if source is not None:
+            self.__source(indent, source)
+        for layer in getattr(event, 'layers', ()):
+            attributes = u''.join(u' {0}={1}'.format(name, quoteattr(_format_number(value)))
+                                  for name, value in (('Type', layer.type), ('Factor', layer.factor))
+                                  if value is not None)
+            write(u'{0}<Layer>\n{0}    <{1}{2}/>\n{0}</Layer>\n'.format(indent, layer.name, attributes))
+        write(u'            </Event>\n')
+
+    def write_list(self, head, events, optical=False):
+        """
+        :type head: FilmscribeListHead or None
+        :type events: collections.Iterable[FilmscribeEvent]
+        :param events: May be a generator
+        :type optical: bool
+        """
+        self.start_list(head, optical)
+        for event in events:
+            self.write_event(event)
+        self.end_list()
+
+    def write(self, filmscribe_file):
+        """
+        :type filmscribe_file: FilmscribeFile
+        """
+        self.start_file(filmscribe_file.version, filmscribe_file.date)
+        for filmscribe_list in filmscribe_file.assemble_lists:
+            self.write_list(filmscribe_list.head, filmscribe_list.events)
+        for filmscribe_list in filmscribe_file.optical_lists:
+            self.write_list(filmscribe_list.head, filmscribe_list.events, optical=True)
+        self.end_file()
+
+    @staticmethod
+    def __event_attributes(event):
+        return u''.join(u' {0}={1}'.format(name, quoteattr(_format_number(value))) for name, value in (
+            ('Num', event.id), ('Type', event.type), ('Length', event.length), ('SourceCount', event.source_count),
+            ('RefNum', event.ref_num), ('Reference', event.reference)) if value is not None)
+
+    def __text(self, indent, tag, value):
+        if value is not None:
+            self._write(u'{0}<{1}>{2}</{1}>\n'.format(indent, tag, escape(_format_number(value))))
+
+    def __point(self, indent, point, frame_tag):
+        if point is not None:
+            self.__text(indent, 'Timecode', point.timecode)
+            self.__text(indent, 'Edgecode', point.edgecode)
+            self.__text(indent, frame_tag, point.frame)
+
+    def __time(self, indent, tag, point, frame_tag='Frame'):
+        if point is not None:
+            self._write(u'{0}<{1}>\n'.format(indent, tag))
+            self.__point(indent + u'    ', point, frame_tag)
+            self._write(u'{0}</{1}>\n'.format(indent, tag))
+
+    def __end_out(self, indent, timecode):
+        if timecode is not None:
+            self._write(u'{0}<EndOut>\n'.format(indent))
+            self.__text(indent + u'    ', 'Timecode', timecode)
+            self._write(u'{0}</EndOut>\n'.format(indent))
+
+    def __source(self, indent, source):
+        inner = indent + u'    '
+        self._write(indent + u'<Source>\n')
+        self.__text(inner, 'ClipName', source.clip_name)
+        self.__text(inner, 'MobID', source.mob_id)
+        self.__time(inner, 'Start', _peek(source, 'start'))
+        self.__time(inner, 'End', _peek(source, 'end'))
+        self.__end_out(inner, source.endout)
+        for tag, value in (('UNC', source.unc), ('TapeName', source.tape_name), ('LabRoll', source.lab_roll),
+                           ('CamRoll', source.cam_roll), ('SceneTake', source.scene_take), ('Slate', source.slate)):
+            self.__text(inner, tag, value)
+        custom = _peek(source, 'custom')
+        if custom is not None:
+            for key, value in zip(custom.keys, custom.values):
+                self._write(u'{0}<Custom Name={1}>{2}</Custom>\n'.format(
+                    inner, quoteattr(key or u''), escape(value or u'')))
+        self._write(indent + u'</Source>\n')
+
+
+class FilmscribeEdlWriter(_FilmscribeTextWriter):
+    """Streams lists as CMX3600 edit decision lists.
+
+    Record points come from the master Frame, placed on the master timecode
+    by the first point that has both, so record ranges follow the event
+    lengths and do not overlap. Source points come from the source timecode
+    or else the source frame, and the out points from the event length.
+    Timecode is written at the timecode rate of the list, see
+    FilmscribeTimeEngine. Reels are the tape names cut to 8 characters, AX
+    when there is none, with the clip name in a FROM CLIP NAME comment.
+    Motion layers are written as M2 lines, effects as EFFECT NAME comments
+    on cuts, and locators as LOC comments.
+    """
+
+    def write_list(self, head, events):
+        """
+        :type head: FilmscribeListHead or None
+        :type events: collections.Iterable[FilmscribeEvent]
+        :param events: May be a generator
+        """
+        engine = FilmscribeTimeEngine.for_rate(head.edit_rate if head is not None and head.edit_rate else 24)
+        tracks = head.tracks if head is not None else None
+        channel = u'V' if not tracks or 'V' in tracks.upper() else u'A'
+        write = self._write
+        write(u'TITLE: {0}\n'.format(head.title if head is not None and head.title else u'UNTITLED'))
+        write(u'FCM: {0}\n'.format(u'DROP FRAME' if engine.drop_frame else u'NON-DROP FRAME'))
+        number = 0
+        offset = None
+        for event in events:
+            master = _peek(event, 'master')
+            start = _peek(master, 'start') if master is not None else None
+            if offset is None:
+                offset = self.__offset(engine, start)
+            record_in = self.__record(engine, start, offset)
+            if isinstance(event, FilmscribeLocatorEvent):
+                # Locators of optical lists are read without their master point.
+                if record_in is not None:
+                    write(u'* LOC: {0} {1:<7} {2}\n'.format(
+                        engine.frames_to_timecode(record_in), (event.color or u'').upper(),
+                        u' '.join((event.text or u'').split())))
+                continue
+
+            number += 1
+            source = _peek(event, 'source')
+            length = _event_length(event)
+            source_in = self.__frames(engine, _peek(source, 'start') if source is not None else None) or 0
+            record_in = record_in or 0
+            reel = self.__reel(source)
+            write(u'\n{0:03d}  {1:<8} {2:<5} {3:<8} {4} {5} {6} {7}\n'.format(
+                (number - 1) % 999 + 1, reel, channel, u'C',
+                engine.frames_to_timecode(source_in), engine.frames_to_timecode(source_in + length),
+                engine.frames_to_timecode(record_in), engine.frames_to_timecode(record_in + length)))
+            for layer in getattr(event, 'layers', ()):
+                if isinstance(layer.data, FilmscribeMotion) and layer.factor is not None:
+                    write(u'M2   {0:<8} {1:05.1f}                {2}\n'.format(
+                        reel, layer.factor * engine.timecode_rate, engine.frames_to_timecode(source_in)))
+                elif isinstance(layer.data, FilmscribeEffect) and layer.type:
+                    write(u'* EFFECT NAME: {0}\n'.format(layer.type))
+            if source is not None and source.clip_name:
+                write(u'* FROM CLIP NAME: {0}\n'.format(source.clip_name))
+        self.flush()
+
+    def write(self, filmscribe_list):
+        """
+        :type filmscribe_list: FilmscribeList
+        """
+        self.write_list(filmscribe_list.head, filmscribe_list.events)
+
+    @staticmethod
+    def __offset(engine, point):
+        """Timecode frames less the Frame of a master point, None when it does not have both."""
+        if point is None or point.frame is None or point.timecode is None:
+            return None
+        frames = engine.timecode_to_frames(point.timecode)
+        return frames - point.frame if frames is not None else None
+
+    def __record(self, engine, point, offset):
+        if point is not None and point.frame is not None and offset is not None:
+            return point.frame + offset
+        return self.__frames(engine, point)
+
+    @staticmethod
+    def __frames(engine, point):
+        if point is None:
+            return None
+        if point.timecode is not None:
+            frames = engine.timecode_to_frames(point.timecode)
+            if frames is not None:
+                return frames
+        return point.frame
+
+    @staticmethod
+    def __reel(source):
+        tape = source.tape_name if source is not None else None
+        if not tape:
+            return u'AX'
+        return u'_'.join(tape.split())[:8]
+
+
+# Tables of FilmscribeSqliteStore. Rows are numbered by the store, so every
+# table of a batch can be written with executemany without reading ids back.
+_SQLITE_TIME_COLUMNS = '{0}_frame INTEGER, {0}_timecode TEXT, {0}_edgecode TEXT'
+_SQLITE_TABLES = (
+    ('files', 'id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE, version TEXT, date TEXT'),
+    ('lists', 'id INTEGER PRIMARY KEY, file_id INTEGER NOT NULL REFERENCES files, position INTEGER, kind TEXT, '
+              'title TEXT, tracks TEXT, event_count INTEGER, optical_count INTEGER, dupe_count INTEGER, '
+              'edit_rate REAL, ' + _SQLITE_TIME_COLUMNS.format('duration')),
+    ('events', 'id INTEGER PRIMARY KEY, list_id INTEGER NOT NULL REFERENCES lists, position INTEGER, num INTEGER, '
+               'type TEXT, length INTEGER, source_count INTEGER, ref_num INTEGER, reference TEXT, reel TEXT, ' +
+               _SQLITE_TIME_COLUMNS.format('master_start') + ', ' + _SQLITE_TIME_COLUMNS.format('master_end') +
+               ', master_endout TEXT'),
+    ('sources', 'event_id INTEGER PRIMARY KEY REFERENCES events, clip_name TEXT, mob_id TEXT, tape_name TEXT, '
+                'cam_roll TEXT, lab_roll TEXT, scene_take TEXT, slate TEXT, unc TEXT, ' +
+                _SQLITE_TIME_COLUMNS.format('start') + ', ' + _SQLITE_TIME_COLUMNS.format('end') + ', endout TEXT'),
+    ('custom', 'event_id INTEGER NOT NULL REFERENCES events, position INTEGER, name TEXT, value TEXT'),
+    ('layers', 'event_id INTEGER NOT NULL REFERENCES events, position INTEGER, name TEXT, type TEXT, factor REAL'),
+    ('locators', 'event_id INTEGER PRIMARY KEY REFERENCES events, color TEXT, text TEXT'),
+)
+_SQLITE_INDEXES = (
+    ('lists', 'file_id'), ('events', 'list_id'), ('custom', 'event_id'), ('layers', 'event_id'),
+    ('sources', 'clip_name'), ('sources', 'mob_id'), ('sources', 'tape_name'), ('sources', 'cam_roll'),
+    ('sources', 'lab_roll'), ('custom', 'name, value'),
+)
+
+
+class FilmscribeSqliteStore(object):
+    """Normalized SQLite copy of parsed files, for ad-hoc SQL over a whole show.
+
+    Files are written with one executemany per table and batch inside a
+    single transaction, and the indexes are created once the rows are in.
+    Writing a file under a name that is already stored replaces it, so a
+    changed reel is updated on its own. Lists are numbered per file
+    assemble lists first, then optical lists, events per list.
+
+        store = FilmscribeSqliteStore('show.db')
+        store.write((result.filename, result.filmscribe_file) for result in FilmscribeFile.from_files(paths))
+        store.query('SELECT cam_roll, COUNT(*) FROM sources GROUP BY cam_roll')
+    """
+
+    def __init__(self, path=':memory:', batch_size=20000):
+        """
+
+        :type path: str or unicode
+        :param path: Database file, created when missing
+        :type batch_size: int
+        :param batch_size: Events buffered before they are written
+        """
+        if sqlite3 is None:
+            raise RuntimeError('FilmscribeSqliteStore needs the sqlite3 module')
+        self.path = path
+        self.batch_size = batch_size
+        self.connection = sqlite3.connect(path)
+        with self.connection:
+            for table, columns in _SQLITE_TABLES:
+                self.connection.execute('CREATE TABLE IF NOT EXISTS {0} ({1})'.format(table, columns))
+
+    def __enter__(self):
+        return self
 
-    @color.setter
-    def color(self, value):
-        self.__color = value
+    def __exit__(self, exc_type, exc_value, exc_traceback):
+        self.close()
+
+    def close(self):
+        self.connection.close()
 
     @property
-    def text(self):
-        return self.__text
+    def files(self):
+        """
+        :rtype: list of unicode
+        :return: Names of the stored files
+        """
+        return [row[0] for row in self.connection.execute('SELECT name FROM files ORDER BY id')]
 
-    @text.setter
-    def text(self, value):
-        self.__text = value
+    def query(self, sql, parameters=()):
+        """
+        :type sql: str
+        :param parameters: Values of the ? placeholders
+        :rtype: list of tuple
+        """
+        return self.connection.execute(sql, parameters).fetchall()
+
+    def upsert(self, name, filmscribe_file):
+        """Store one file, replacing an earlier version stored under the same name.
+
+        :type name: str or unicode
+        :type filmscribe_file: FilmscribeFile
+        """
+        self.write([(name, filmscribe_file)])
+
+    def remove(self, name):
+        """
+        :type name: str or unicode
+        :return: True when the file was stored
+        :rtype: bool
+        """
+        with self.connection:
+            return self.__remove(name)
+
+    def write(self, files):
+        """Store many files in one transaction.
+
+        :type files: collections.Iterable[(str, FilmscribeFile)]
+        :param files: (name, file) pairs, may be a generator
+        :rtype: int
+        :return: Number of events written
+        """
+        connection = self.connection
+        written = 0
+        with connection:
+            file_id, list_id, event_id = [connection.execute('SELECT COALESCE(MAX({0}), 0) FROM {1}'.format(
+                column, table)).fetchone()[0] for table, column in (('files', 'id'), ('lists', 'id'),
+                                                                      ('events', 'id'))]
+            rows = dict((table, []) for table, _ in _SQLITE_TABLES)
+            names = set()
+            for name, filmscribe_file in files:
+                if name in names:
+                    # The earlier copy may still be buffered.
+                    self.__flush(rows)
+                names.add(name)
+                self.__remove(name)
+                file_id += 1
+                rows['files'].append((file_id, name, filmscribe_file.version, filmscribe_file.date))
+                lists = [('assemble', filmscribe_list) for filmscribe_list in filmscribe_file.assemble_lists] + [
+                    ('optical', filmscribe_list) for filmscribe_list in filmscribe_file.optical_lists]
+                for position, (kind, filmscribe_list) in enumerate(lists):
+                    list_id += 1
+                    head = filmscribe_list.head
+                    rows['lists'].append((list_id, file_id, position, kind) + tuple(
+                        getattr(head, name) if head is not None else None for name in
+                        ('title', 'tracks', 'event_count', 'optical_count', 'dupe_count', 'edit_rate')) +
+                        self.__time(head.master_duration if head is not None else None))
+                    for k, event in enumerate(filmscribe_list.events):
+                        event_id += 1
+                        self.__event(rows, event_id, list_id, k, event)
+                        written += 1
+                        if len(rows['events']) >= self.batch_size:
+                            self.__flush(rows)
+            self.__flush(rows)
+            for table, columns in _SQLITE_INDEXES:
+                connection.execute('CREATE INDEX IF NOT EXISTS {0}_{1} ON {0} ({2})'.format(
+                    table, '_'.join(columns.split(', ')), columns))
+        return written
+
+    def __event(self, rows, event_id, list_id, position, event):
+        master = _peek(event, 'master')
+        rows['events'].append(
+            (event_id, list_id, position, event.id, event.type, event.length, event.source_count, event.ref_num,
+             event.reference, master.reel if master is not None else None) +
+            self.__time(_peek(master, 'start') if master is not None else None) +
+            self.__time(_peek(master, 'end') if master is not None else None) +
+            (master.endout if master is not None else None,))
+        source = _peek(event, 'source')
+        if source is not None:
+            rows['sources'].append(
+                (event_id, source.clip_name, source.mob_id, source.tape_name, source.cam_roll, source.lab_roll,
+                 source.scene_take, source.slate, source.unc) +
+                self.__time(_peek(source, 'start')) + self.__time(_peek(source, 'end')) + (source.endout,))
+            custom = _peek(source, 'custom')
+            if custom is not None:
+                rows['custom'].extend((event_id, i, key, value)
+                                      for i, (key, value) in enumerate(zip(custom.keys, custom.values)))
+        for i, layer in enumerate(getattr(event, 'layers', ())):
+            rows['layers'].append((event_id, i, layer.name, layer.type, layer.factor))
+        if isinstance(event, FilmscribeLocatorEvent):
+            rows['locators'].append((event_id, event.color, event.text))
+
+    @staticmethod
+    def __time(point):
+        if point is None:
+            return None, None, None
+        return point.frame, point.timecode, point.edgecode
+
+    def __flush(self, rows):
+        for table, _ in _SQLITE_TABLES:
+            if rows[table]:
+                self.connection.executemany('INSERT INTO {0} VALUES ({1})'.format(
+                    table, ', '.join('?' * len(rows[table][0]))), rows[table])
+                del rows[table][:]
+
+    def __remove(self, name):
+        connection = self.connection
+        row = connection.execute('SELECT id FROM files WHERE name = ?', (name,)).fetchone()
+        if row is None:
+            return False
+        events = 'SELECT events.id FROM events JOIN lists ON events.list_id = lists.id WHERE lists.file_id = ?'
+        for table in ('custom', 'layers', 'locators', 'sources'):
+            connection.execute('DELETE FROM {0} WHERE event_id IN ({1})'.format(table, events), row)
+        connection.execute('DELETE FROM events WHERE list_id IN (SELECT id FROM lists WHERE file_id = ?)', row)
+        connection.execute('DELETE FROM lists WHERE file_id = ?', row)
+        connection.execute('DELETE FROM files WHERE id = ?', row)
+        return True
+
+
+# Scope of an element, keyed on (scope of its parent, tag). Tags that are not
+# listed inherit the scope of their parent, so e.g. every element below an
+# <Event>'s <Master> is in the 'event_master' scope.
+_SCOPES = {
+    (None, 'AssembleList'): 'assemble',
+    (None, 'OpticalList'): 'optical',
+    ('assemble', 'ListHead'): 'head',
+    ('optical', 'ListHead'): 'head',
+    ('assemble', 'Event'): 'event',
+    ('optical', 'Event'): 'event',
+    ('assemble', 'Comment'): 'locator',
+    ('optical', 'Comment'): 'optical_locator',
+    ('event', 'Master'): 'event_master',
+    ('event', 'Source'): 'event_source',
+    ('event', 'Layer'): 'layer',
+    ('layer', 'Master'): 'event_master',
+    ('layer', 'Source'): 'event_source',
+    ('locator', 'Master'): 'locator_master',
+    ('locator', 'Source'): 'locator_source',
+}
+
+# Text fields set when an element closes, keyed on (parent scope, parent tag, tag).
+# Values are (root, owner, attribute, converter) where owner is the dotted path
+# of the object that receives the attribute, relative to the current event or
+# the current list.
+_END_FIELDS = {
+    ('head', 'ListHead', 'Title'): ('list', 'head', 'title', None),
+    ('head', 'ListHead', 'Tracks'): ('list', 'head', 'tracks', None),
+    ('head', 'ListHead', 'EventCount'): ('list', 'head', 'event_count', None),
+    ('head', 'ListHead', 'EditRate'): ('list', 'head', 'edit_rate', float),
+    ('head', 'ListHead', 'OpticalCount'): ('list', 'head', 'optical_count', None),
+    ('head', 'ListHead', 'DupeCount'): ('list', 'head', 'dupe_count', int),
+    ('head', 'MasterDuration', 'FrameCount'): ('list', 'head.master_duration', 'frame', int),
+    ('head', 'MasterDuration', 'Edgecode'): ('list', 'head.master_duration', 'edgecode', None),
+    ('head', 'MasterDuration', 'Timecode'): ('list', 'head.master_duration', 'timecode', None),
+    ('event_master', 'Start', 'Frame'): ('event', 'master.start', 'frame', int),
+    ('event_master', 'Start', 'Timecode'): ('event', 'master.start', 'timecode', None),
+    ('event_master', 'Start', 'Edgecode'): ('event', 'master.start', 'edgecode', None),
+    ('event_master', 'End', 'Frame'): ('event', 'master.end', 'frame', int),
+    ('event_master', 'End', 'Timecode'): ('event', 'master.end', 'timecode', None),
+    ('event_master', 'End', 'Edgecode'): ('event', 'master.end', 'edgecode', None),
+    ('event_master', 'EndOut', 'Timecode'): ('event', 'master', 'endout', None),
+    ('event_source', 'Source', 'ClipName'): ('event', 'source', 'clip_name', None),
+    ('event_source', 'Source', 'MobID'): ('event', 'source', 'mob_id', None),
+    ('event_source', 'Source', 'UNC'): ('event', 'source', 'unc', None),
+    ('event_source', 'Source', 'TapeName'): ('event', 'source', 'tape_name', None),
+    ('event_source', 'Source', 'LabRoll'): ('event', 'source', 'lab_roll', None),
+    ('event_source', 'Source', 'CamRoll'): ('event', 'source', 'cam_roll', None),
+    ('event_source', 'Source', 'SceneTake'): ('event', 'source', 'scene_take', None),
+    ('event_source', 'Source', 'Slate'): ('event', 'source', 'slate', None),
+    ('event_source', 'Start', 'Frame'): ('event', 'source.start', 'frame', int),
+    ('event_source', 'Start', 'Timecode'): ('event', 'source.start', 'timecode', None),
+    ('event_source', 'Start', 'Edgecode'): ('event', 'source.start', 'edgecode', None),
+    ('event_source', 'End', 'Frame'): ('event', 'source.end', 'frame', int),
+    ('event_source', 'End', 'Timecode'): ('event', 'source.end', 'timecode', None),
+    ('event_source', 'End', 'Edgecode'): ('event', 'source.end', 'edgecode', None),
+    ('event_source', 'EndOut', 'Timecode'): ('event', 'source', 'endout', None),
+    ('locator_master', 'Master', 'Frame'): ('event', 'master.start', 'frame', int),
+    ('locator_master', 'Master', 'Timecode'): ('event', 'master.start', 'timecode', None),
+    ('locator_master', 'Master', 'Edgecode'): ('event', 'master.start', 'edgecode', None),
+    ('locator_source', 'Source', 'ClipName'): ('event', 'source', 'clip_name', None),
+    ('locator', 'Comment', 'Color'): ('event', None, 'color', None),
+    ('locator', 'Comment', 'Text'): ('event', None, 'text', None),
+}
+
+# Event fields a projection can name, see FilmscribeHandler. source.custom
+# covers the Custom records and layers the layers of optical events.
+PROJECTION_FIELDS = frozenset(['.'.join(filter(None, (owner, attr)))
+                               for root, owner, attr, _ in _END_FIELDS.values() if root == 'event'] +
+                              ['source.custom', 'layers'])
+
+# Handler methods called when an element opens, keyed like _END_FIELDS.
+_START_ACTIONS = {
+    (None, '', 'FilmScribeFile'): '_start_file',
+    (None, 'FilmScribeFile', 'AssembleList'): '_start_assemble_list',
+    (None, 'FilmScribeFile', 'OpticalList'): '_start_optical_list',
+    ('assemble', 'AssembleList', 'ListHead'): '_start_head',
+    ('optical', 'OpticalList', 'ListHead'): '_start_head',
+    ('head', 'ListHead', 'MasterDuration'): '_start_master_duration',
+    ('assemble', 'AssembleList', 'Events'): '_start_events',
+    ('optical', 'OpticalList', 'Events'): '_start_events',
+    ('assemble', 'Events', 'Event'): '_start_event',
+    ('optical', 'Events', 'Event'): '_start_event',
+    ('assemble', 'Events', 'Comment'): '_start_comment',
+    ('optical', 'Events', 'Comment'): '_start_comment',
+    ('event_source', 'Source', 'Custom'): '_start_custom',
+}
+
+# Handler methods called when an element closes, keyed like _END_FIELDS.
+_END_ACTIONS = {
+    (None, '', 'FilmScribeFile'): '_end_file',
+    (None, 'FilmScribeFile', 'AssembleList'): '_end_assemble_list',
+    (None, 'FilmScribeFile', 'OpticalList'): '_end_optical_list',
+    ('assemble', 'AssembleList', 'ListHead'): '_end_head',
+    ('optical', 'OpticalList', 'ListHead'): '_end_head',
+    ('assemble', 'Events', 'Event'): '_end_event',
+    ('optical', 'Events', 'Event'): '_end_event',
+    ('assemble', 'Events', 'Comment'): '_end_event',
+    ('optical', 'Events', 'Comment'): '_end_event',
+    ('event_source', 'Source', 'Custom'): '_end_custom',
+}
+
+
+def _projection(fields):
+    """Predicate telling whether an event field is read under the projection fields.
+
+    A field is read when it is named or one of the objects holding it is,
+    so 'source' reads every field of the source.
+
+    :type fields: collections.Iterable[str] or None
+    :rtype: (str) -> bool
+    """
+    if fields is None:
+        return lambda path: True
+    fields = frozenset(fields)
+    unknown = [field for field in fields
+               if not any(path == field or path.startswith(field + '.') for path in PROJECTION_FIELDS)]
+    if unknown:
+        raise ValueError('Unknown fields {0}, use any of {1}'.format(
+            ', '.join(sorted(unknown)), ', '.join(sorted(PROJECTION_FIELDS))))
+    return lambda path: any(path == field or path.startswith(field + '.') for field in fields)
 
 
 class FilmscribeHandler(ContentHandler):
-    def __init__(self, filmscribe_file):
+    """Builds the filmscribe model from SAX callbacks.
+
+    Every element is dispatched with a single dictionary lookup on
+    (parent scope, parent tag, tag), see _SCOPES, _START_ACTIONS, _END_FIELDS
+    and _END_ACTIONS. Events that are not wanted are read in the 'skip' scope,
+    which matches none of the tables. Fields left out of a projection have no
+    entry in the tables, so their text is not collected and the objects that
+    would hold them are never allocated.
+    """
+
+    def __init__(self, filmscribe_file, event_callback=None, keep_events=True, convert_times=False,
+                 heads_only=False, lists=None, max_lists=None, fields=None, strings=None, stats=None):
         """
 
         :type filmscribe_file: FilmscribeFile
         :param filmscribe_file:
+        :param event_callback: Called with (list_head, event) as each event closes
+        :type keep_events: bool
+        :param keep_events: Keep closed events in their list. Disable when streaming.
+        :type convert_times: bool
+        :param convert_times: Convert timecode and edgecode to frame counts as events close
+        :type heads_only: bool
+        :param heads_only: Skip the events of every list
+        :type lists: list of str or None
+        :param lists: Titles of the lists to read, None for every list
+        :type max_lists: int or None
+        :param max_lists: Stop parsing once this many lists have been read
+        :type fields: collections.Iterable[str] or None
+        :param fields: Event fields to read, such as 'master.start.frame' or 'source', None for every field.
+            See PROJECTION_FIELDS. Event attributes and list heads are always read.
+        :type strings: FilmscribeStringPool or None
+        :param strings: Pool for the repeating strings, a new one when None. Set as filmscribe_file.strings.
+        :type stats: FilmscribeParseStats or None
+        :param stats: Count elements and events and time the callbacks into stats. Without stats the
+            callbacks are not wrapped at all.
         """
         ContentHandler.__init__(self)
         self.__filmscribe_file = filmscribe_file
+        self.__event_callback = event_callback
+        self.__keep_events = keep_events
+        self.__convert_times = convert_times
+        self.__heads_only = heads_only
+        self.__lists = frozenset(lists) if lists is not None else None
+        self.__max_lists = max_lists
+        self.__list_count = 0
+        self.__wanted = True
+        self.__time_engine = None
         self.__current_list = None
-        self.__xpath = []
-        self.__xpath_set = set()
-        self.__parent = None
-        self.__element_text = ''
+        self.__event = None
+        self.__open_event = None
+        self.__stack = []
+        self.__scope = None
+        self.__name = ''
+        self.__element_text = u''
+        self.__capture = False
+        self.__strings = strings if strings is not None else FilmscribeStringPool()
+        filmscribe_file.strings = self.__strings
+
+        projected = _projection(fields)
+        self.__keep_layers = projected('layers')
+        self.__start_dispatch = dict((key, getattr(self, action)) for key, action in _START_ACTIONS.items()
+                                     if action != '_start_custom' or projected('source.custom'))
+        self.__end_dispatch = dict((key, self.__field_setter(*field)) for key, field in _END_FIELDS.items()
+                                   if field[0] != 'event' or projected('.'.join(filter(None, field[1:3]))))
+        self.__end_dispatch.update((key, getattr(self, action)) for key, action in _END_ACTIONS.items()
+                                   if action != '_end_custom' or projected('source.custom'))
+        if stats is not None:
+            self.__instrument(stats)
+
+    def __instrument(self, stats):
+        """Wrap the dispatch tables and the callbacks of this handler to fill stats."""
+        clock = time.time
+        seconds = stats.seconds
+        elements = stats.elements
+        events = stats.events
+
+        def timed(action):
+            def run(value):
+                started = clock()
+                try:
+                    action(value)
+                finally:
+                    seconds['model'] += clock() - started
+            return run
+
+        for dispatch in (self.__start_dispatch, self.__end_dispatch):
+            for key, action in dispatch.items():
+                dispatch[key] = timed(action)
+
+        start_element, end_element, characters = self.startElement, self.endElement, self.characters
+
+        def counted_start_element(name, attrs):
+            started = clock()
+            elements[name] = elements.get(name, 0) + 1
+            if name == 'Event' or name == 'Comment':
+                kind = attrs.get('Type')
+                events[kind] = events.get(kind, 0) + 1
+            try:
+                start_element(name, attrs)
+            finally:
+                seconds['handler'] += clock() - started
+
+        def timed_end_element(name):
+            started = clock()
+            try:
+                end_element(name)
+            finally:
+                seconds['handler'] += clock() - started
+
+        def timed_characters(content):
+            started = clock()
+            characters(content)
+            seconds['handler'] += clock() - started
+
+        # Instance attributes shadow the methods, and backends look them up when they are created.
+        self.startElement = counted_start_element
+        self.endElement = timed_end_element
+        self.characters = timed_characters
+
+    def __field_setter(self, root, owner, attr, convert):
+        get_owner = attrgetter(owner) if owner else None
+        if owner == 'source' and attr in FilmscribeStringPool.POOLED_FIELDS:
+            convert = self.__strings.intern
+
+        def set_field(text):
+            target = self.__event if root == 'event' else self.__current_list
+            if get_owner is not None:
+                target = get_owner(target)
+            setattr(target, attr, text if convert is None else convert(text))
+
+        return set_field
+
+    @property
+    def stops_early(self):
+        """True when parsing may stop before the end of the file."""
+        return self.__max_lists is not None
 
     def get_parent(self):
-        if len(self.__xpath) > 1:
-            return self.__xpath[-2]
+        if self.__stack:
+            return self.__stack[-1][1]
         return ''
 
     def is_descendant_of(self, name):
-        return name in self.__xpath_set
+        return self.__name == name or any(parent == name for _, parent in self.__stack)
 
     def handle_start(self, root, name):
         if name == 'Frame':
@@ -678,214 +3951,544 @@ class FilmscribeHandler(ContentHandler):
             root.end.edgecode = self.__element_text
 
     def startElement(self, name, attrs):
-        self.__element_text = ''
-        self.__xpath.append(name)
-        self.__xpath_set.add(name)
-        parent = self.get_parent()
-
-        if name == 'FilmScribeFile':
-            self.__filmscribe_file.date = attrs.get('Date')
-            self.__filmscribe_file.version = attrs.get('Version')
-
-        if name == 'AssembleList':
-            self.__current_list = FilmscribeAssembleList()
-
-        if name == 'OpticalList':
-            self.__current_list = FilmscribeOpticalList()
-
-        if name == 'ListHead':
-            self.__current_list.head = FilmscribeListHead()
-
-        if name == 'MasterDuration':
-            self.__current_list.head.master_duration = FilmscribeTime()
-
-        if name == 'Event':
-            if attrs.get('Type') == 'Cut':
-                kwargs = dict((k.lower(), v) for k, v in attrs.items())
-                e = FilmscribeCutEvent(**kwargs)
-                self.__current_list.add_event(e)
-            if attrs.get('Type') == 'Optical':
-                kwargs = dict((k.lower(), v) for k, v in attrs.items())
-                e = FilmscribeOpticalEvent(**kwargs)
-                self.__current_list.add_event(e)
-
-        if name == 'Comment' and parent == 'Events':
-            if attrs.get('Type') == 'Locator':
-                kwargs = dict((k.lower(), v) for k, v in attrs.items())
-                e = FilmscribeLocatorEvent(**kwargs)
-                self.__current_list.add_event(e)
-
-        if name == 'Custom' and self.is_descendant_of('Event') and parent == 'Source':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                e.source.custom.add_key(attrs.get('Name'))
-
-        if parent == 'Layer' and self.is_descendant_of('Event'):
-            e = self.__current_list.events[-1]
-            if isinstance(e, FilmscribeOpticalEvent) and isinstance(self.__current_list, FilmscribeOpticalList):
-                kwargs = dict((k.lower(), v) for k, v in attrs.items())
-                e.add_layer(FilmscribeOpticalLayer(name, **kwargs))
+        parent_scope, parent = self.__scope, self.__name
+        self.__stack.append((parent_scope, parent))
+        self.__scope = _SCOPES.get((parent_scope, name), parent_scope)
+        self.__name = name
+        # u'' + content returns content itself, so single text nodes are not copied.
+        self.__element_text = u''
+        key = (parent_scope, parent, name)
+        self.__capture = key in self.__end_dispatch
+
+        action = self.__start_dispatch.get(key)
+        if action is not None:
+            action(attrs)
+        elif parent_scope == 'layer' and parent == 'Layer' and self.__keep_layers:
+            self._add_layer(name, attrs)
 
     def endElement(self, name):
-        if name == 'FilmScribeFile':
-            raise FilmscribeBreakException
+        parent_scope, parent = self.__scope, self.__name = self.__stack.pop()
 
-        parent = self.get_parent()
+        action = self.__end_dispatch.get((parent_scope, parent, name))
+        if action is not None:
+            action(self.__element_text)
 
-        if name == 'AssembleList':
+    def characters(self, content):
+        if self.__capture:
+            self.__element_text += content
+
+    def _start_file(self, attrs):
+        self.__filmscribe_file.date = attrs.get('Date')
+        self.__filmscribe_file.version = attrs.get('Version')
+
+    def _start_assemble_list(self, attrs):
+        self.__current_list = FilmscribeAssembleList()
+        self.__event = None
+        self.__wanted = self.__lists is None
+
+    def _start_optical_list(self, attrs):
+        self.__current_list = FilmscribeOpticalList()
+        self.__event = None
+        self.__wanted = self.__lists is None
+
+    def _start_head(self, attrs):
+        self.__current_list.head = FilmscribeListHead()
+
+    def _start_master_duration(self, attrs):
+        self.__current_list.head.master_duration = FilmscribeTime()
+
+    def _start_events(self, attrs):
+        if self.__heads_only or not self.__wanted:
+            self.__scope = 'skip'
+
+    def _start_event(self, attrs):
+        if attrs.get('Type') == 'Cut':
+            self.__add_event(FilmscribeCutEvent(**dict((k.lower(), v) for k, v in attrs.items())))
+        if attrs.get('Type') == 'Optical':
+            self.__add_event(FilmscribeOpticalEvent(**dict((k.lower(), v) for k, v in attrs.items())))
+
+    def _start_comment(self, attrs):
+        if attrs.get('Type') == 'Locator':
+            self.__add_event(FilmscribeLocatorEvent(**dict((k.lower(), v) for k, v in attrs.items())))
+
+    def __add_event(self, event):
+        event.type = self.__strings.intern(event.type)
+        self.__current_list.add_event(event)
+        self.__event = self.__open_event = event
+
+    def _start_custom(self, attrs):
+        self.__event.source.custom.add_key(self.__strings.intern(attrs.get('Name')))
+
+    def _add_layer(self, name, attrs):
+        e = self.__event
+        if isinstance(e, FilmscribeOpticalEvent) and isinstance(self.__current_list, FilmscribeOpticalList):
+            kwargs = dict((k.lower(), v) for k, v in attrs.items())
+            e.add_layer(FilmscribeOpticalLayer(name, **kwargs))
+
+    def _end_file(self, text):
+        raise FilmscribeBreakException
+
+    def _end_assemble_list(self, text):
+        if self.__wanted and not self.__heads_only:
+            self.__add_list()
+
+    def _end_optical_list(self, text):
+        if self.__wanted and not self.__heads_only:
+            self.__add_list()
+
+    def __add_list(self):
+        if isinstance(self.__current_list, FilmscribeOpticalList):
+            self.__filmscribe_file.add_optical_list(self.__current_list)
+        else:
             self.__filmscribe_file.add_assemble_list(self.__current_list)
+        self.__list_count += 1
+        if self.__max_lists is not None and self.__list_count >= self.__max_lists:
+            raise FilmscribeBreakException
 
-        if name == 'OpticalList':
-            self.__filmscribe_file.add_optical_list(self.__current_list)
+    def _end_custom(self, text):
+        self.__event.source.custom.add_value(self.__strings.intern(text))
+
+    def _end_head(self, text):
+        head = self.__current_list.head
+        if self.__lists is not None:
+            self.__wanted = head.title in self.__lists
+        if not self.__wanted:
+            return
+        if self.__convert_times:
+            self.__time_engine = FilmscribeTimeEngine.for_rate(head.edit_rate)
+            if head.master_duration is not None:
+                self.__time_engine.convert(head.master_duration)
+        if self.__heads_only:
+            self.__add_list()
+
+    def _end_event(self, text):
+        if self.__open_event is not None:
+            if self.__time_engine is not None:
+                self.__time_engine.convert_event(self.__open_event)
+            self.close_event()
+
+    def close_event(self):
+        """Hands the event that just closed to the event callback.
+
+        When events are not kept the event is dropped from its list, so only the
+        list heads stay in memory while streaming.
+        """
+        event, self.__open_event = self.__open_event, None
+        if self.__event_callback is not None:
+            self.__event_callback(self.__current_list.head, event)
+        if not self.__keep_events:
+            self.__current_list.events.pop()
+
+
+class FilmscribeIncrementalParser(object):
+    """Parses FilmScribe xml pushed to it in chunks of bytes.
+
+    Suits services that receive exports over a socket or a queue: every
+    feed() parses what has arrived and returns the events it completed, so
+    nothing is buffered to disk and no call blocks on input. The list heads
+    and, with keep_events, the events collect in filmscribe_file.
+
+        parser = FilmscribeIncrementalParser()
+        for chunk in chunks:
+            for head, event in parser.feed(chunk):
+                ...
+        for head, event in parser.close():
+            ...
+    """
+
+    def __init__(self, keep_events=False, backend=None, error_handler=None, **options):
+        """
 
-        if name == 'Title':
-            self.__current_list.head.title = self.__element_text
-
-        if name == 'Tracks':
-            self.__current_list.head.tracks = self.__element_text
-
-        if name == 'EventCount':
-            self.__current_list.head.event_count = self.__element_text
-
-        if name == 'EditRate':
-            self.__current_list.head.edit_rate = float(self.__element_text)
-
-        if name == 'OpticalCount':
-            self.__current_list.head.optical_count = self.__element_text
-
-        if name == 'FrameCount' and parent == 'MasterDuration':
-            self.__current_list.head.master_duration.frame = int(self.__element_text)
-
-        if name == 'Edgecode' and parent == 'MasterDuration':
-            self.__current_list.head.master_duration.edgecode = self.__element_text
-
-        if name == 'Timecode' and parent == 'MasterDuration':
-            self.__current_list.head.master_duration.timecode = self.__element_text
-
-        # Master
-        # Start
-        if parent == 'Start' and self.is_descendant_of('Event') and self.is_descendant_of('Master'):
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                self.handle_start(e.master, name)
-
-        # End
-        if parent == 'End' and self.is_descendant_of('Event') and self.is_descendant_of('Master'):
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                self.handle_end(e.master, name)
-
-        # Endout
-        if parent == 'EndOut' and self.is_descendant_of('Event') and self.is_descendant_of('Master'):
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                if name == 'Timecode':
-                    e.master.endout = self.__element_text
-
-        # Source
-        # ClipName
-        if name == 'ClipName' and self.is_descendant_of('Event') and parent == 'Source':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                e.source.clip_name = self.__element_text
-
-        # MobID
-        if name == 'MobID' and self.is_descendant_of('Event') and parent == 'Source':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                e.source.mob_id = self.__element_text
-
-        # Start
-        if parent == 'Start' and self.is_descendant_of('Event') and self.is_descendant_of('Source'):
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                self.handle_start(e.source, name)
-
-        # End
-        if parent == 'End' and self.is_descendant_of('Event') and self.is_descendant_of('Source'):
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                self.handle_end(e.source, name)
-
-        # Endout
-        if parent == 'EndOut' and self.is_descendant_of('Event') and self.is_descendant_of('Source'):
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                if name == 'Timecode':
-                    e.source.endout = self.__element_text
-
-        # UNC
-        if name == 'UNC' and self.is_descendant_of('Event') and parent == 'Source':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                e.source.unc = self.__element_text
-
-        # Custom
-        if name == 'Custom' and self.is_descendant_of('Event') and parent == 'Source':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                e.source.custom.add_value(self.__element_text)
-
-        # TypeName
-        if name == 'TapeName' and self.is_descendant_of('Event') and parent == 'Source':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                e.source.tape_name = self.__element_text
-
-        # CamRoll
-        if name == 'CamRoll' and self.is_descendant_of('Event') and parent == 'Source':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                e.source.cam_roll = self.__element_text
-
-        # SceneTake
-        if name == 'SceneTake' and self.is_descendant_of('Event') and parent == 'Source':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                e.source.scene_take = self.__element_text
-
-        # Slate
-        if name == 'Slate' and self.is_descendant_of('Event') and parent == 'Source':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, (FilmscribeAssembleList, FilmscribeOpticalList)):
-                e.source.slate = self.__element_text
-
-        # Comment
-        # Master
-        if parent == 'Master' and self.is_descendant_of('Comment'):
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, FilmscribeAssembleList):
-                self.handle_start(e.master, name)
-
-        # Source
-        if parent == 'Source' and self.is_descendant_of('Comment'):
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, FilmscribeAssembleList):
-                if name == 'ClipName':
-                    e.source.clip_name = self.__element_text
-
-        # Color
-        if name == 'Color' and parent == 'Comment':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, FilmscribeAssembleList):
-                e.color = self.__element_text
-
-        # Text
-        if name == 'Text' and parent == 'Comment':
-            e = self.__current_list.events[-1]
-            if isinstance(self.__current_list, FilmscribeAssembleList):
-                e.text = self.__element_text
-
-        self.__xpath_set.remove(name)
-        self.__xpath.pop()
+        :type keep_events: bool
+        :param keep_events: Keep the events in filmscribe_file as well as returning them
+        :type backend: str or None
+        :param backend: Parser backend, see parser_backends
+        :type error_handler: xml.sax.handler.ErrorHandler or None
+        :param error_handler: Receives parse errors, by default they are raised from feed and close
+        :param options: Passed on to FilmscribeHandler, such as convert_times, lists, fields or stats.
+            stats may also be True for new ones, or False.
+        """
+        if 'stats' in options:
+            options['stats'] = _parse_stats(options['stats'])
+        self.filmscribe_file = FilmscribeFile()
+        self.__pending = []
+        self.__done = False
+        handler = FilmscribeHandler(self.filmscribe_file, keep_events=keep_events,
+                                    event_callback=lambda head, event: self.__pending.append((head, event)),
+                                    **options)
+        self.__parser = _make_backend(backend, handler, error_handler or ErrorHandler())
 
-    def characters(self, content):
-        self.__element_text += content
+    @property
+    def done(self):
+        """True once the document or the lists that were asked for are complete, or parsing failed.
+        Data fed after that is ignored.
+
+        :rtype: bool
+        """
+        return self.__done
 
+    def feed(self, data):
+        """Parse the next chunk of the document.
 
-def main():
-    filename = 'testdata/filmscribe.xml'
-    filmscribe = FilmscribeFile.from_file(filename)
+        :type data: str or bytearray
+        :rtype: list of (FilmscribeListHead, FilmscribeEvent)
+        :return: Events completed by this chunk
+        """
+        if not self.__done:
+            self.__run(self.__parser.feed, data)
+        return self.__drain()
+
+    def close(self):
+        """Finish the document, reporting it when it is incomplete.
+
+        :rtype: list of (FilmscribeListHead, FilmscribeEvent)
+        :return: Events not returned yet
+        """
+        if not self.__done:
+            self.__run(self.__parser.close)
+            self.__done = True
+        return self.__drain()
+
+    def parse_chunks(self, chunks):
+        """Feed chunks as they come and yield the events as they complete.
+
+        :type chunks: collections.Iterable[str]
+        :param chunks: Any iterable of byte strings, such as the blocks of a request body
+        :rtype: collections.Iterable[(FilmscribeListHead, FilmscribeEvent)]
+        """
+        for chunk in chunks:
+            for item in self.feed(chunk):
+                yield item
+            if self.__done:
+                break
+        for item in self.close():
+            yield item
+
+    def __run(self, step, *args):
+        try:
+            step(*args)
+        except FilmscribeBreakException:
+            self.__done = True
+        except Exception:
+            self.__done = True
+            raise
+
+    def __drain(self):
+        pending, self.__pending = self.__pending, []
+        return pending
+
+
+def iter_events(filename, chunk_size=65536, convert_times=False, lists=None, max_lists=None, backend=None,
+                fields=None, strings=None, stats=None):
+    """Parse a filmscribe xml file lazily.
+
+    Yields (list_head, event) pairs as each </Event> or </Comment> closes. Events
+    are not kept after they have been yielded, so memory stays flat regardless
+    of the size of the file. Parse errors are reported on stderr, errors
+    reading the file are raised once stats have been updated.
+
+    :type filename: str or unicode or file or bytearray or memoryview or mmap.mmap
+    :param filename: File name, binary file object or document, plain or compressed, see FilmscribeFile.from_file
+    :type chunk_size: int
+    :param chunk_size: Number of bytes fed to the parser at a time
+    :type convert_times: bool
+    :param convert_times: Convert timecode and edgecode to frame counts, see FilmscribeTimeEngine
+    :type lists: list of str or None
+    :param lists: Titles of the lists to read, None for every list
+    :type max_lists: int or None
+    :param max_lists: Stop once this many lists have been read
+    :type backend: str or None
+    :param backend: Parser backend, see parser_backends
+    :type fields: collections.Iterable[str] or None
+    :param fields: Event fields to read, None for every field, see PROJECTION_FIELDS
+    :type strings: FilmscribeStringPool or None
+    :param strings: Pool for the repeating strings, see FilmscribeStringPool
+    :type stats: FilmscribeParseStats or bool or None
+    :param stats: Instrument the parse into these stats, or new ones when True, see FilmscribeParseStats
+    :rtype: collections.Iterable[(FilmscribeListHead, FilmscribeEvent)]
+    """
+    stats = _parse_stats(stats)
+    parser = FilmscribeIncrementalParser(convert_times=convert_times, lists=lists, max_lists=max_lists,
+                                         fields=fields, strings=strings, stats=stats, backend=backend,
+                                         error_handler=FilmscribeErrorHandler())
+    with _FilmscribeInput(filename) as infile:
+        if stats is not None:
+            infile = _FilmscribeCountingReader(infile, stats)
+        # Time spent by the consumer between two items is left out of the stats.
+        started = time.time()
+        try:
+            for chunk in iter(lambda: infile.read(chunk_size), b''):
+                pairs = parser.feed(chunk)
+                if pairs:
+                    if stats is not None:
+                        stats.seconds['total'] += time.time() - started
+                        started = None
+                    for item in pairs:
+                        yield item
+                    started = time.time()
+                if parser.done:
+                    break
+        finally:
+            if stats is not None:
+                stats.files += 1
+                stats.seconds['total'] += time.time() - started if started is not None else 0.0
+                stats.peak_rss_bytes = max(stats.peak_rss_bytes, _peak_rss_bytes())
+
+    for item in parser.close():
+        yield item
+
+
+# Seconds between two checks of the stop flag and of the parses in flight of FilmscribeWatcher.
+_WATCH_STEP = 0.05
+
+
+def _ignore_interrupts():
+    """Initializer of worker processes that leave Ctrl-C to the parent, so it can shut down cleanly."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+
+class FilmscribeWatcher(object):
+    """Long running ingest of the exports dropped into watched directories.
+
+    Directories are polled with os.stat, which works on network file systems.
+    A file is parsed once its size and mtime have not changed for settle
+    seconds, and again only when they change. Parses run on a pool of jobs
+    workers with at most max_pending files in flight; ready files wait for a
+    free slot. Every FilmscribeParseResult is handed to sink in the thread
+    that called run(), failed parses included. A parse still running after
+    timeout seconds is given up and reported as failed; its worker stays
+    busy until the parse ends, as a pool worker cannot be stopped alone.
+
+    stop(), from a signal handler or another thread, only sets a flag that
+    run() checks every fraction of a second. The files in flight finish, or
+    time out, and reach the sink before run() returns. Files already
+    parsed are remembered in state_file, when given, so a restart does not
+    parse unchanged exports again. status() and status_file report progress.
+
+        watcher = FilmscribeWatcher(['/mnt/editorial/exports'], sink=store_result, jobs=4)
+        signal.signal(signal.SIGTERM, lambda *args: watcher.stop())
+        watcher.run()
+    """
+
+    def __init__(self, paths, sink, jobs=None, interval=2.0, settle=5.0, max_pending=None, timeout=600.0,
+                 status_file=None, state_file=None, **options):
+        """
+
+        :type paths: list of str
+        :param paths: Directories, files or glob patterns, expanded on every poll, see expand_paths
+        :param sink: Called with each FilmscribeParseResult
+        :type jobs: int or None
+        :param jobs: Number of worker processes, defaults to the number of CPUs. 1 parses in this process.
+        :type interval: float
+        :param interval: Seconds between two polls
+        :type settle: float
+        :param settle: Seconds a file must stay unchanged before it is parsed
+        :type max_pending: int or None
+        :param max_pending: Files in flight at once, defaults to twice the number of workers
+        :type timeout: float or None
+        :param timeout: Seconds after which a file in flight is given up, None waits for every parse
+        :type status_file: str or None
+        :param status_file: Rewrite this file with status() as JSON after every poll
+        :type state_file: str or None
+        :param state_file: Keep the size and mtime of the files parsed in this JSON file
+        :param options: Passed on to FilmscribeFile.from_file, such as convert_times, fields or stats
+        """
+        self.paths = paths
+        self.sink = sink
+        self.jobs = jobs if jobs is not None else cpu_count()
+        self.interval = interval
+        self.settle = settle
+        self.max_pending = max_pending if max_pending is not None else 2 * self.jobs
+        self.timeout = timeout
+        self.status_file = status_file
+        self.state_file = state_file
+        self.options = options
+        self.stats = FilmscribeParseStats() if options.get('stats') else None
+        # A plain flag, setting it is all a signal handler does.
+        self.__stopping = False
+        # path -> (mtime, size) of the version parsed last
+        self.__parsed = self.__load_state()
+        # path -> ((mtime, size), time that version was first seen)
+        self.__settling = {}
+        self.__ready = deque()
+        # path -> ((mtime, size), time submitted, AsyncResult)
+        self.__in_flight = {}
+        # (path, (mtime, size), FilmscribeParseResult) waiting for the sink
+        self.__done = deque()
+        self.__counts = {'polls': 0, 'watched': 0, 'parsed': 0, 'failed': 0, 'timed_out': 0, 'sink_errors': 0}
+        self.__started = None
+        self.__last_poll = None
+
+    def stop(self):
+        """Ask run() to return once the files in flight have reached the sink. Safe to call from a signal handler."""
+        self.__stopping = True
+
+    @property
+    def stopping(self):
+        return self.__stopping
+
+    def status(self):
+        """
+        :rtype: dict
+        :return: JSON serializable counters and queue lengths
+        """
+        status = dict(self.__counts, started=self.__started, last_poll=self.__last_poll, stopping=self.stopping,
+                      settling=len(self.__settling), queued=len(self.__ready), in_flight=len(self.__in_flight),
+                      known=len(self.__parsed))
+        if self.stats is not None:
+            status['stats'] = self.stats.to_dict()
+        return status
+
+    def run(self, once=False):
+        """Poll and parse until stop() is called.
+
+        :type once: bool
+        :param once: Return as soon as every file found has been parsed, to ingest a backlog and exit
+        """
+        self.__started = time.time()
+        pool = Pool(self.jobs, _ignore_interrupts) if self.jobs != 1 else None
+        try:
+            while not self.stopping:
+                self.poll()
+                self.__submit(pool)
+                # Files queued behind max_pending go out as results come back, without waiting for a poll.
+                while self.__ready and not self.stopping:
+                    self.__deliver(block=True)
+                    self.__submit(pool)
+                    self.__write_status()
+                self.__deliver(block=False)
+                if once:
+                    while self.__in_flight and not self.stopping:
+                        self.__deliver(block=True)
+                    if not self.__settling:
+                        break
+                self.__write_status()
+                self.__sleep(self.interval)
+            if pool is not None:
+                pool.close()
+            while self.__in_flight or self.__done:
+                self.__deliver(block=True)
+        finally:
+            if pool is not None:
+                pool.terminate()
+                pool.join()
+            self.__write_status()
+
+    def poll(self):
+        """Look for new and changed files, moving the settled ones to the queue."""
+        now = time.time()
+        found = set()
+        for filename in expand_paths(self.paths):
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                # Removed or renamed since the directory was listed.
+                continue
+            found.add(filename)
+            version = (stat.st_mtime, stat.st_size)
+            if self.__parsed.get(filename) == version or filename in self.__in_flight or filename in self.__ready:
+                continue
+            settling = self.__settling.get(filename)
+            if settling is None or settling[0] != version:
+                self.__settling[filename] = settling = (version, now)
+            # Files that have not been written to for settle seconds are ready on the first poll.
+            if now - settling[1] >= self.settle or now - stat.st_mtime >= self.settle:
+                del self.__settling[filename]
+                self.__ready.append(filename)
+        for filename in [filename for filename in self.__settling if filename not in found]:
+            del self.__settling[filename]
+        self.__counts['polls'] += 1
+        self.__counts['watched'] = len(found)
+        self.__last_poll = now
+
+    def __sleep(self, seconds):
+        """Sleep in short steps, so a stop() from a signal handler is seen soon."""
+        deadline = time.time() + seconds
+        while not self.stopping and time.time() < deadline:
+            time.sleep(min(_WATCH_STEP, max(deadline - time.time(), 0.0)))
+
+    def __submit(self, pool):
+        while self.__ready and len(self.__in_flight) < self.max_pending and not self.stopping:
+            filename = self.__ready.popleft()
+            try:
+                stat = os.stat(filename)
+            except OSError:
+                continue
+            version = (stat.st_mtime, stat.st_size)
+            task = (filename, self.options)
+            if pool is None:
+                self.__done.append((filename, version, _parse_batch_file(task)))
+            else:
+                self.__in_flight[filename] = (version, time.time(), pool.apply_async(_parse_batch_file, (task,)))
+
+    def __collect(self):
+        """Move the parses that finished or timed out from the files in flight to the ones done."""
+        now = time.time()
+        for filename, (version, submitted, handle) in self.__in_flight.items():
+            if handle.ready():
+                try:
+                    result = handle.get(0)
+                except Exception as error:
+                    result = FilmscribeParseResult(filename, error='{0}: {1}'.format(type(error).__name__, error))
+            elif self.timeout is not None and now - submitted >= self.timeout:
+                self.__counts['timed_out'] += 1
+                result = FilmscribeParseResult(filename, error='Timed out after {0:.0f}s'.format(now - submitted),
+                                               elapsed=now - submitted)
+            else:
+                continue
+            del self.__in_flight[filename]
+            self.__done.append((filename, version, result))
+
+    def __deliver(self, block):
+        """Hand the finished parses to the sink, with block waiting up to interval seconds for one."""
+        deadline = time.time() + (self.interval if block else 0.0)
+        self.__collect()
+        while not self.__done and self.__in_flight and time.time() < deadline:
+            time.sleep(_WATCH_STEP)
+            self.__collect()
+        changed = bool(self.__done)
+        while self.__done:
+            filename, version, result = self.__done.popleft()
+            self.__parsed[filename] = version
+            self.__counts['parsed' if result.ok else 'failed'] += 1
+            if self.stats is not None and result.stats is not None:
+                self.stats.add(result.stats)
+            try:
+                self.sink(result)
+            except Exception as error:
+                self.__counts['sink_errors'] += 1
+                sys.stderr.write('ERROR: Sink failed on {0}: {1}\n'.format(result.filename, error))
+        if changed:
+            self.__save_state()
+
+    def __load_state(self):
+        if self.state_file is None or not os.path.exists(self.state_file):
+            return {}
+        with open(self.state_file, 'r') as infile:
+            return dict((filename, tuple(version)) for filename, version in json.load(infile).items())
+
+    def __save_state(self):
+        if self.state_file is not None:
+            _write_json_atomic(self.state_file, self.__parsed)
+
+    def __write_status(self):
+        if self.status_file is not None:
+            _write_json_atomic(self.status_file, self.status())
+
+
+def _write_json_atomic(filename, value):
+    """Replace filename with value as JSON, readers never see a partial file."""
+    temporary = '{0}.{1}.tmp'.format(filename, os.getpid())
+    with open(temporary, 'w') as outfile:
+        json.dump(value, outfile, indent=2, sort_keys=True)
+    os.rename(temporary, filename)
+
+
+def print_listing(filmscribe):
+    """Print a human readable listing of a parsed file.
+
+    :type filmscribe: FilmscribeFile
+    """
     for alist in filmscribe.assemble_lists:
         print 'AssembleList - {title} - {track} ( {edit_rate}/{duration} )'.format(
             title=alist.head.title,
@@ -914,18 +4517,134 @@ def main():
 
     for optical in filmscribe.optical_lists:
         print 'OpticalList - {title} - {track} ( {edit_rate}/{duration} )'.format(
-            title=alist.head.title,
-            track=alist.head.tracks,
-            edit_rate=alist.head.edit_rate,
-            duration=alist.head.master_duration.frame)
+            title=optical.head.title,
+            track=optical.head.tracks,
+            edit_rate=optical.head.edit_rate,
+            duration=optical.head.master_duration.frame if optical.head.master_duration else None)
 
         for event in optical.events:
             print '#{id:<3} SOURCE {v} {type:>8} {layers}'.format(
                 id=event.id,
-                v=alist.head.tracks,
+                v=optical.head.tracks,
                 type=event.type,
-                layers=','.join([layer.name for layer in event.layers]))
+                layers=','.join([layer.name for layer in getattr(event, 'layers', [])]))
+
+
+def expand_paths(paths):
+    """Expand directories (recursively, xml files plain or compressed) and glob patterns to file names.
+
+    :type paths: list of str
+    :rtype: list of str
+    """
+    filenames = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in sorted(os.walk(path)):
+                filenames.extend(os.path.join(root, name) for name in sorted(names)
+                                 if name.lower().endswith(_XML_SUFFIXES))
+        elif glob.has_magic(path):
+            filenames.extend(sorted(glob.glob(path)))
+        else:
+            filenames.append(path)
+    return filenames
+
+
+def _watch(args):
+    """--watch mode of main, a listing or JSON summary line per file on stdout."""
+    store = FilmscribeSqliteStore(args.sqlite) if args.sqlite else None
+
+    def sink(result):
+        if not result.ok:
+            sys.stderr.write('ERROR {0}: {1}\n'.format(result.filename, result.error))
+        if args.json:
+            print json.dumps(result.summary())
+        elif result.ok:
+            print_listing(result.filmscribe_file)
+        if store is not None and result.ok:
+            store.upsert(result.filename, result.filmscribe_file)
+        sys.stdout.flush()
+
+    watcher = FilmscribeWatcher(args.paths, sink, jobs=args.jobs or None, interval=args.interval,
+                                settle=args.settle, status_file=args.status_file, state_file=args.state_file,
+                                heads_only=args.heads_only, lists=args.lists, max_lists=args.max_lists,
+                                backend=args.backend, stats=args.stats is not None)
+    for number in (signal.SIGINT, signal.SIGTERM):
+        signal.signal(number, lambda *_: watcher.stop())
+    try:
+        watcher.run()
+    finally:
+        if store is not None:
+            store.close()
+    if args.stats == 'json':
+        sys.stderr.write(watcher.stats.to_json(indent=2) + '\n')
+    elif args.stats == 'prometheus':
+        sys.stderr.write(watcher.stats.to_prometheus())
+    return 0
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Parse Avid FilmScribe xml exports.')
+    parser.add_argument('paths', nargs='+', help='Files, directories or glob patterns')
+    parser.add_argument('-j', '--jobs', type=int, default=1, help='Number of worker processes, 0 for one per CPU')
+    parser.add_argument('--unordered', action='store_true', help='Report files as they complete')
+    parser.add_argument('--json', action='store_true', help='Print a JSON summary instead of the event listing')
+    parser.add_argument('--heads-only', action='store_true', help='Read only the list heads')
+    parser.add_argument('--list', action='append', dest='lists', metavar='TITLE',
+                        help='Read only lists with this title')
+    parser.add_argument('--max-lists', type=int, help='Stop reading a file after this many lists')
+    parser.add_argument('--backend', choices=parser_backends(), help='Parser backend, the fastest one by default')
+    parser.add_argument('--stats', choices=('json', 'prometheus'),
+                        help='Instrument the parses and write the totals to stderr in this format')
+    parser.add_argument('--sqlite', metavar='DATABASE', help='Also store the files in this SQLite database')
+    parser.add_argument('--watch', action='store_true',
+                        help='Keep polling the paths and parse new and changed files until interrupted')
+    parser.add_argument('--interval', type=float, default=2.0, help='Seconds between two polls with --watch')
+    parser.add_argument('--settle', type=float, default=5.0,
+                        help='Seconds a file must stay unchanged before it is parsed with --watch')
+    parser.add_argument('--status-file', help='Keep the status of --watch in this JSON file')
+    parser.add_argument('--state-file', help='Remember the files parsed by --watch across restarts in this file')
+    args = parser.parse_args(argv)
+    if args.watch:
+        return _watch(args)
+
+    failures = []
+    summaries = []
+    stats = FilmscribeParseStats()
+    results = FilmscribeFile.from_files(expand_paths(args.paths), jobs=args.jobs or None, ordered=not args.unordered,
+                                        heads_only=args.heads_only, lists=args.lists, max_lists=args.max_lists,
+                                        backend=args.backend, stats=args.stats is not None)
+
+    def report():
+        for result in results:
+            if result.stats is not None:
+                stats.add(result.stats)
+            if not result.ok:
+                failures.append(result.filename)
+                sys.stderr.write('ERROR {0}: {1}\n'.format(result.filename, result.error))
+            if args.json:
+                summaries.append(result.summary())
+            elif result.ok:
+                print_listing(result.filmscribe_file)
+            if result.ok:
+                yield result.filename, result.filmscribe_file
+
+    if args.sqlite:
+        with FilmscribeSqliteStore(args.sqlite) as store:
+            # Every file goes in one transaction, as the results come in.
+            store.write(report())
+    else:
+        for _ in report():
+            pass
+    failed = len(failures)
+
+    if args.json:
+        print json.dumps({'files': summaries, 'ok': len(summaries) - failed, 'failed': failed}, indent=2)
+    if args.stats == 'json':
+        sys.stderr.write(stats.to_json(indent=2) + '\n')
+    elif args.stats == 'prometheus':
+        sys.stderr.write(stats.to_prometheus())
+    return 1 if failed else 0
 
 
 if __name__ == '__main__':
-    main()
+    sys.exit(main())
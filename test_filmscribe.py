@@ -0,0 +1,841 @@
+# The MIT License (MIT)
+#
+# Copyright (c) [2015] [Dobri Georgiev]
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in all
+# copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+# SOFTWARE.
+
+"""Tests of the filmscribe parser, run with
+
+    python -m unittest test_filmscribe
+"""
+
+from io import BytesIO
+
+import bz2
+import gzip
+import json
+import os
+import pickle
+import shutil
+import signal
+import tempfile
+import unittest
+
+import benchmark
+import filmscribe
+
+__author__ = 'dobri.georgiev'
+
+TESTDATA = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'testdata', 'filmscribe.xml')
+
+
+def _time(point):
+    if point is None:
+        return None
+    return point.frame, point.timecode, point.edgecode, point.timecode_frames, point.edgecode_frames
+
+
+def _event(event):
+    """Every field of event as plain values, without allocating the parts it does not have."""
+    master = filmscribe._peek(event, 'master')
+    source = filmscribe._peek(event, 'source')
+    model = [type(event).__name__, event.id, event.type, event.length, event.source_count, event.ref_num,
+             event.reference]
+    if master is not None:
+        model.append((master.reel, _time(filmscribe._peek(master, 'start')),
+                      _time(filmscribe._peek(master, 'end')), master.endout))
+    if source is not None:
+        custom = filmscribe._peek(source, 'custom')
+        model.append((source.clip_name, source.mob_id, source.unc, source.tape_name, source.lab_roll,
+                      source.cam_roll, source.scene_take, source.slate, source.endout,
+                      _time(filmscribe._peek(source, 'start')), _time(filmscribe._peek(source, 'end')),
+                      (custom.keys, custom.values) if custom is not None else None))
+    if isinstance(event, filmscribe.FilmscribeLocatorEvent):
+        model.append((event.color, event.text))
+    if isinstance(event, filmscribe.FilmscribeOpticalEvent):
+        model.append([(layer.name, layer.type, type(layer.data).__name__, layer.factor) for layer in event.layers])
+    return model
+
+
+def model(filmscribe_file):
+    """The lists and events of filmscribe_file as plain values that compare equal when the models do.
+
+    :type filmscribe_file: filmscribe.FilmscribeFile
+    :rtype: list
+    """
+    lists = []
+    for filmscribe_list in filmscribe_file.assemble_lists + filmscribe_file.optical_lists:
+        head = filmscribe_list.head
+        lists.append((type(filmscribe_list).__name__, head.title, head.tracks, head.event_count, head.optical_count,
+                      head.dupe_count, head.edit_rate, _time(head.master_duration),
+                      [_event(event) for event in filmscribe_list.events]))
+    return [filmscribe_file.version, filmscribe_file.date, lists]
+
+
+def _assemble_list(sources):
+    """Assemble list of back to back cuts, one per (clip name, source start frame, length)."""
+    filmscribe_list = filmscribe.FilmscribeAssembleList()
+    master = 0
+    for number, (clip_name, start, length) in enumerate(sources, 1):
+        event = filmscribe.FilmscribeCutEvent(num=number, length=length)
+        event.master.start.frame, event.master.end.frame = master, master + length
+        event.source.clip_name = clip_name
+        event.source.start.frame, event.source.end.frame = start, start + length
+        filmscribe_list.add_event(event)
+        master += length
+    return filmscribe_list
+
+
+class FilmscribeTestCase(unittest.TestCase):
+    """Shares a temporary directory and a synthetic export between the tests of a class."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = tempfile.mkdtemp(prefix='filmscribe-test-')
+        cls.synthetic = os.path.join(cls.directory, 'synthetic.xml')
+        benchmark.FilmscribeGenerator(events=300, assemble_lists=3, optical_lists=2, optical_events=40,
+                                      locator_density=0.1, seed=7).write(cls.synthetic)
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+
+    def path(self, name):
+        return os.path.join(self.directory, name)
+
+
+class ParserTest(FilmscribeTestCase):
+
+    def test_testdata(self):
+        filmscribe_file = filmscribe.FilmscribeFile.from_file(TESTDATA)
+        self.assertEqual(1, len(filmscribe_file.assemble_lists))
+        scene = filmscribe_file.assemble_lists[0]
+        self.assertEqual('SCENE 76', scene.head.title)
+        self.assertEqual(24.0, scene.head.edit_rate)
+        cuts = [event for event in scene.events if isinstance(event, filmscribe.FilmscribeCutEvent)]
+        self.assertEqual(int(scene.head.event_count), len(cuts))
+        self.assertEqual(scene.head.master_duration.frame, sum(int(event.length) for event in cuts))
+
+    def test_iter_events(self):
+        expected = filmscribe.FilmscribeFile.from_file(TESTDATA)
+        heads = [filmscribe_list.head.title for filmscribe_list in expected.assemble_lists + expected.optical_lists
+                 for _ in filmscribe_list.events]
+        pairs = list(filmscribe.iter_events(TESTDATA, chunk_size=4096))
+        self.assertEqual(heads, [head.title for head, _ in pairs])
+        self.assertEqual([_event(event) for filmscribe_list in expected.assemble_lists + expected.optical_lists
+                          for event in filmscribe_list.events], [_event(event) for _, event in pairs])
+
+        with open(TESTDATA, 'rb') as infile:
+            data = infile.read()
+
+        class FailingReader(object):
+            def __init__(self):
+                self.chunks = [data[:len(data) // 2]]
+
+            def read(self, size=-1):
+                if not self.chunks:
+                    raise IOError('connection lost')
+                return self.chunks.pop()
+
+        stats = filmscribe.FilmscribeParseStats()
+        events = filmscribe.iter_events(FailingReader(), stats=stats)
+        self.assertRaises(IOError, list, events)
+        self.assertEqual(1, stats.files)
+
+    def test_lazy_parts(self):
+        events = filmscribe.FilmscribeFile.from_file(TESTDATA).assemble_lists[0].events
+        locator = next(event for event in events if isinstance(event, filmscribe.FilmscribeLocatorEvent))
+        self.assertRaises(AttributeError, object.__getattribute__, locator.source, 'start')
+        self.assertIsNone(locator.source.start.frame)
+        event = filmscribe.FilmscribeCutEvent()
+        self.assertFalse(hasattr(event, '__dict__'))
+        self.assertRaises(AttributeError, object.__getattribute__, event, 'master')
+        self.assertIsNone(event.master.start.frame)
+        self.assertIs(event.master, object.__getattribute__(event, 'master'))
+
+    def test_selective_parse(self):
+        expected = model(filmscribe.FilmscribeFile.from_file(TESTDATA))
+        heads = filmscribe.FilmscribeFile.from_file(TESTDATA, heads_only=True)
+        self.assertEqual(['SCENE 76'], [filmscribe_list.head.title for filmscribe_list in heads.assemble_lists])
+        self.assertEqual([], heads.assemble_lists[0].events)
+        self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(TESTDATA, lists=['SCENE 76'])))
+        self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(TESTDATA, max_lists=1)))
+        self.assertEqual([], filmscribe.FilmscribeFile.from_file(TESTDATA, lists=['SCENE 77']).assemble_lists)
+        self.assertEqual([], list(filmscribe.iter_events(TESTDATA, lists=['SCENE 77'])))
+
+    def test_projection(self):
+        full = filmscribe.FilmscribeFile.from_file(TESTDATA).assemble_lists[0].events
+        fields = ['master.start.frame', 'source.clip_name']
+        projected = filmscribe.FilmscribeFile.from_file(TESTDATA, fields=fields).assemble_lists[0].events
+        self.assertEqual([(event.id, event.master.start.frame, event.source.clip_name) for event in full],
+                         [(event.id, event.master.start.frame, event.source.clip_name) for event in projected])
+        for event in projected:
+            self.assertIsNone(filmscribe._peek(event.master, 'end'))
+            self.assertIsNone(filmscribe._peek(event.source, 'start'))
+            self.assertIsNone(filmscribe._peek(event.source, 'custom'))
+            self.assertEqual((None, None), (event.master.start.timecode, event.source.mob_id))
+        streamed = [event for _, event in filmscribe.iter_events(TESTDATA, fields=fields)]
+        self.assertEqual([(event.id, event.source.clip_name) for event in projected],
+                         [(event.id, event.source.clip_name) for event in streamed])
+
+    def test_unknown_field_raises(self):
+        self.assertRaises(ValueError, filmscribe.FilmscribeFile.from_file, TESTDATA, fields={'bogus'})
+        self.assertRaises(ValueError, filmscribe.FilmscribeFile.from_file, TESTDATA, fields=['master', 'bogus'],
+                          cache=filmscribe.FilmscribeFileCache())
+        projected = filmscribe.FilmscribeFile.from_file(TESTDATA, fields=(field for field in ['source.cam_roll']))
+        event = projected.assemble_lists[0].events[0]
+        self.assertEqual(u'122', event.source.cam_roll)
+        self.assertIsNone(event.source.clip_name)
+
+    def test_stats(self):
+        stats = filmscribe.FilmscribeParseStats()
+        for _ in range(2):
+            filmscribe_file = filmscribe.FilmscribeFile.from_file(TESTDATA, stats=stats)
+        self.assertIs(stats, filmscribe_file.stats)
+        self.assertEqual((2, 2 * os.path.getsize(TESTDATA)), (stats.files, stats.bytes_read))
+        events = {}
+        for event in filmscribe_file.assemble_lists[0].events:
+            events[event.type] = events.get(event.type, 0) + 2
+        self.assertEqual(events, stats.events)
+        self.assertEqual(2, stats.elements['AssembleList'])
+        self.assertTrue(all(seconds >= 0 for seconds in stats.phases.values()))
+        self.assertEqual(stats.to_dict(), json.loads(stats.to_json()))
+        self.assertIn('filmscribe_parse_files_total{host="a"} 2', stats.to_prometheus(labels={'host': 'a'}))
+        self.assertIsNone(filmscribe.FilmscribeFile.from_file(TESTDATA).stats)
+
+        streamed = filmscribe.FilmscribeParseStats()
+        list(filmscribe.iter_events(TESTDATA, stats=streamed))
+        self.assertEqual((1, stats.bytes_read // 2), (streamed.files, streamed.bytes_read))
+        self.assertEqual(events, streamed.add(streamed).events)
+
+    def test_stats_flags(self):
+        expected = model(filmscribe.FilmscribeFile.from_file(TESTDATA))
+        events = list(filmscribe.iter_events(TESTDATA))
+        cache = filmscribe.FilmscribeFileCache()
+        for flag in (False, True):
+            filmscribe_file = filmscribe.FilmscribeFile.from_file(TESTDATA, stats=flag)
+            self.assertEqual(expected, model(filmscribe_file))
+            self.assertEqual(flag, isinstance(filmscribe_file.stats, filmscribe.FilmscribeParseStats))
+            cached = filmscribe.FilmscribeFile.from_file(TESTDATA, stats=flag, cache=cache)
+            self.assertEqual(expected, model(cached))
+            self.assertEqual(len(events), len(list(filmscribe.iter_events(TESTDATA, stats=flag))))
+            parser = filmscribe.FilmscribeIncrementalParser(stats=flag)
+            with open(TESTDATA, 'rb') as infile:
+                self.assertEqual(len(events), len(parser.feed(infile.read()) + parser.close()))
+            result, = filmscribe.FilmscribeFile.from_files([TESTDATA], stats=flag)
+            self.assertEqual(expected, model(result.filmscribe_file))
+            self.assertEqual(flag, result.stats is not None)
+
+    def test_incremental_parse(self):
+        expected = filmscribe.FilmscribeFile.from_file(self.synthetic)
+        parser = filmscribe.FilmscribeIncrementalParser(keep_events=True)
+        with open(self.synthetic, 'rb') as infile:
+            data = infile.read()
+        events = []
+        for offset in range(0, len(data), 1000):
+            events.extend(parser.feed(data[offset:offset + 1000]))
+        events.extend(parser.close())
+        self.assertTrue(parser.done)
+        self.assertEqual(model(expected), model(parser.filmscribe_file))
+        self.assertEqual([_event(event) for filmscribe_list in expected.assemble_lists + expected.optical_lists
+                          for event in filmscribe_list.events], [_event(event) for _, event in events])
+
+        parser = filmscribe.FilmscribeIncrementalParser(max_lists=1)
+        pairs = list(parser.parse_chunks(data[offset:offset + 4096] for offset in range(0, len(data), 4096)))
+        self.assertTrue(parser.done)
+        self.assertEqual([_event(event) for event in expected.assemble_lists[0].events],
+                         [_event(event) for _, event in pairs])
+
+    def test_compressed_input(self):
+        with open(self.synthetic, 'rb') as infile:
+            data = infile.read()
+        expected = model(filmscribe.FilmscribeFile.from_file(self.synthetic))
+        for name, compress in (('synthetic.xml.gz', _gzip), ('synthetic.xml.bz2', bz2.compress)):
+            path = self.path(name)
+            with open(path, 'wb') as outfile:
+                outfile.write(compress(data))
+            self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(path)), name)
+            with open(path, 'rb') as infile:
+                self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(infile)), name)
+        self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(bytearray(data))))
+        self.assertRaises(IOError, filmscribe.FilmscribeFile.from_file, self.path('missing.xml'))
+
+    def test_file_names_like_magic_bytes(self):
+        with open(TESTDATA, 'rb') as infile:
+            data = infile.read()
+        expected = model(filmscribe.FilmscribeFile.from_file(TESTDATA))
+        cwd = os.getcwd()
+        os.chdir(self.directory)
+        try:
+            for name in ('BZh_reel.xml', '\x1f\x8breel.xml'):
+                with open(name, 'wb') as outfile:
+                    outfile.write(data)
+                self.assertFalse(filmscribe._is_document(name))
+                self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(name)), repr(name))
+            self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(u'BZh_reel.xml')))
+        finally:
+            os.chdir(cwd)
+        for document in (data, b'\xef\xbb\xbf' + data):
+            self.assertTrue(filmscribe._is_document(document))
+            self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(document)))
+        self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(bytearray(bz2.compress(data)))))
+        self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(memoryview(_gzip(data)))))
+
+    def test_compressed_members(self):
+        with open(TESTDATA, 'rb') as infile:
+            data = infile.read()
+        expected = model(filmscribe.FilmscribeFile.from_file(TESTDATA))
+        chunk_size = filmscribe._DECOMPRESS_CHUNK_SIZE
+        try:
+            for compress in (_gzip, bz2.compress):
+                members = [compress(data[:5000]), compress(data[5000:12000]), compress(data[12000:])]
+                stream = b''.join(members)
+                # The first 8 bytes are read on their own, then every read is a chunk.
+                for chunk in range(len(members[0]) - 8 - 8, len(members[0]) - 8 + 9):
+                    filmscribe._DECOMPRESS_CHUNK_SIZE = chunk
+                    for document in (stream, stream + b'\0' * 100):
+                        with filmscribe._FilmscribeInput(bytearray(document)) as infile:
+                            self.assertEqual(data, infile.read(), (compress, chunk))
+                        with filmscribe._FilmscribeInput(bytearray(document)) as infile:
+                            self.assertEqual(data, b''.join(iter(lambda: infile.read(1000), b'')))
+                filmscribe._DECOMPRESS_CHUNK_SIZE = len(members[0]) - 8
+                path = self.path('members')
+                with open(path, 'wb') as outfile:
+                    outfile.write(stream)
+                self.assertEqual(expected, model(filmscribe.FilmscribeFile.from_file(path)))
+        finally:
+            filmscribe._DECOMPRESS_CHUNK_SIZE = chunk_size
+
+
+class BackendConformanceTest(FilmscribeTestCase):
+
+    def test_backends_build_the_same_model(self):
+        backends = filmscribe.parser_backends()
+        for path in (TESTDATA, self.synthetic):
+            for options in ({}, {'convert_times': True}, {'fields': ['master', 'source.cam_roll']}):
+                files = [filmscribe.FilmscribeFile.from_file(path, backend=backend, **options)
+                         for backend in backends]
+                self.assertTrue(files[0].assemble_lists, path)
+                for backend, filmscribe_file in zip(backends[1:], files[1:]):
+                    self.assertEqual(model(files[0]), model(filmscribe_file), (path, backend, options))
+                    self.assertEqual(files[0].to_binary(), filmscribe_file.to_binary(), (path, backend, options))
+            events = [[_event(event) for _, event in filmscribe.iter_events(path, backend=backend)]
+                      for backend in backends]
+            for backend, backend_events in zip(backends[1:], events[1:]):
+                self.assertEqual(events[0], backend_events, (path, backend))
+
+    def test_unknown_backend_raises(self):
+        self.assertRaises(ValueError, filmscribe.FilmscribeFile.from_file, TESTDATA, backend='nope')
+        self.assertRaises(ValueError, filmscribe.FilmscribeFile.from_file, TESTDATA, backend='nope',
+                          cache=filmscribe.FilmscribeFileCache())
+        self.assertRaises(ValueError, filmscribe.FilmscribeIncrementalParser, backend='nope')
+
+
+class FeatureTest(FilmscribeTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super(FeatureTest, cls).setUpClass()
+        cls.synthetic_file = filmscribe.FilmscribeFile.from_file(cls.synthetic)
+
+    def test_columns(self):
+        for filmscribe_list in self.synthetic_file.assemble_lists:
+            events = filmscribe_list.events
+            columns = filmscribe_list.to_columns()
+            self.assertEqual(len(events), len(columns))
+            for k, event in enumerate(events):
+                self.assertEqual(event.master.start.frame, columns.master_start[k])
+                if isinstance(event, filmscribe.FilmscribeLocatorEvent):
+                    self.assertEqual((2, -1), (columns.type[k], columns.source_start[k]))
+                else:
+                    self.assertEqual(event.id, columns.id[k])
+                    self.assertEqual(event.source.end.frame, columns.source_end[k])
+                    self.assertEqual(event.source.clip_name, columns.clip_names[columns.clip_name[k]])
+        lists = self.synthetic_file.assemble_lists + self.synthetic_file.optical_lists
+        streamed = filmscribe.FilmscribeColumns.from_file(self.synthetic)
+        self.assertEqual([filmscribe_list.head.title for filmscribe_list in lists],
+                         [head.title for head, _ in streamed])
+        for filmscribe_list, (_, columns) in zip(lists, streamed):
+            for name in filmscribe.FilmscribeColumns.NAMES:
+                self.assertEqual(list(getattr(filmscribe_list.to_columns(), name)), list(getattr(columns, name)), name)
+
+    def test_master_index(self):
+        events = self.synthetic_file.assemble_lists[0].events
+        index = self.synthetic_file.assemble_lists[0].master_index
+        cuts = [(event.master.start.frame, event.master.end.frame, k, event.source.start.frame)
+                for k, event in enumerate(events) if not isinstance(event, filmscribe.FilmscribeLocatorEvent)]
+        frames = range(min(cut[0] for cut in cuts) - 2, max(cut[1] for cut in cuts) + 3)
+        expected = []
+        for frame in frames:
+            found = [(start, k, source_start + frame - start) for start, end, k, source_start in cuts
+                     if start <= frame <= end]
+            expected.append(max(found)[1:] if found else None)
+        self.assertEqual(expected, [index.source_frame(frame) for frame in frames])
+        self.assertEqual([hit[0] if hit else None for hit in expected], [index.find(frame) for frame in frames])
+        positions, source_frames = index.lookup(frames)
+        self.assertEqual([hit if hit else (-1, -1) for hit in expected], zip(positions, source_frames))
+        locators = [(event.master.start.frame, k) for k, event in enumerate(events)
+                    if isinstance(event, filmscribe.FilmscribeLocatorEvent)]
+        self.assertTrue(locators)
+        for start, k in locators:
+            self.assertIn(k, index.locators(start))
+        self.assertEqual([k for start, k in locators if start <= locators[1][0]], index.locators(0, locators[1][0]))
+
+    def test_from_files(self):
+        missing = self.path('missing.xml')
+        for jobs in (1, 2):
+            results = list(filmscribe.FilmscribeFile.from_files([self.synthetic, missing, TESTDATA], jobs=jobs))
+            self.assertEqual([self.synthetic, missing, TESTDATA], [result.filename for result in results])
+            self.assertEqual([True, False, True], [result.ok for result in results])
+            self.assertIsNone(results[1].filmscribe_file)
+            self.assertEqual(model(self.synthetic_file), model(results[0].filmscribe_file))
+
+    def test_pickle(self):
+        copy = pickle.loads(pickle.dumps(self.synthetic_file, pickle.HIGHEST_PROTOCOL))
+        self.assertEqual(model(self.synthetic_file), model(copy))
+
+    def test_binary_round_trip(self):
+        for path in (TESTDATA, self.synthetic):
+            filmscribe_file = filmscribe.FilmscribeFile.from_file(path, convert_times=True)
+            data = filmscribe_file.to_binary()
+            binary = self.path('round_trip.fsb')
+            with open(binary, 'wb') as outfile:
+                outfile.write(data)
+            self.assertEqual(model(filmscribe_file), model(filmscribe.FilmscribeFile.from_binary(binary)))
+            with filmscribe.FilmscribeBinaryFile.from_buffer(data) as binary_file:
+                self.assertEqual(model(filmscribe_file), model(binary_file.to_filmscribe_file()))
+
+    def test_binary_file_events(self):
+        path = self.path('events.fsb')
+        self.synthetic_file.to_binary(path)
+        lists = self.synthetic_file.assemble_lists + self.synthetic_file.optical_lists
+        with filmscribe.FilmscribeBinaryFile(path) as binary_file:
+            self.assertEqual(len(lists), len(binary_file))
+            for j, filmscribe_list in enumerate(lists):
+                self.assertEqual(len(filmscribe_list.events), binary_file.event_count(j))
+                for k in (0, len(filmscribe_list.events) // 2, len(filmscribe_list.events) - 1):
+                    self.assertEqual(_event(filmscribe_list.events[k]), _event(binary_file.event(j, k)))
+
+    def test_cache(self):
+        cache = filmscribe.FilmscribeFileCache()
+        first = filmscribe.FilmscribeFile.from_file(self.synthetic, cache=cache)
+        second = filmscribe.FilmscribeFile.from_file(self.synthetic, cache=cache)
+        self.assertIsNot(first, second)
+        self.assertEqual(model(self.synthetic_file), model(first))
+        self.assertEqual(model(first), model(second))
+        self.assertEqual((1, 1), (cache.stats['misses'], cache.stats['hits']))
+        # Hits keep a pool like misses do, and share into the pool they are given.
+        self.assertIsInstance(second.strings, filmscribe.FilmscribeStringPool)
+        self.assertIn(second.assemble_lists[0].events[0].source.clip_name, second.strings)
+        third = filmscribe.FilmscribeFile.from_file(self.synthetic, cache=cache, strings=first.strings)
+        self.assertEqual(2, cache.stats['hits'])
+        self.assertIs(first.strings, third.strings)
+        self.assertIs(first.assemble_lists[0].events[0].source.clip_name,
+                      third.assemble_lists[0].events[0].source.clip_name)
+        filmscribe.FilmscribeFile.from_file(self.synthetic, cache=cache, convert_times=True)
+        self.assertEqual(2, cache.stats['misses'])
+        cache.invalidate(self.synthetic)
+        self.assertEqual(0, len(cache))
+
+        # An edited file misses and drops its older entry.
+        path = self.path('edited.xml')
+        shutil.copy(TESTDATA, path)
+        filmscribe.FilmscribeFile.from_file(path, cache=cache)
+        mtime = os.stat(path).st_mtime + 10
+        os.utime(path, (mtime, mtime))
+        filmscribe.FilmscribeFile.from_file(path, cache=cache)
+        self.assertEqual((4, 1), (cache.stats['misses'], len(cache)))
+
+    def test_diff_lists(self):
+        sources = [('clip{0}'.format(n % 7), n * 100, 24 + n) for n in range(40)]
+        old_list = _assemble_list(sources)
+        self.assertEqual([], filmscribe.diff_lists(old_list, old_list))
+        edited = list(sources)
+        del edited[10]
+        edited.insert(20, edited.pop(15))
+        clip_name, start, length = edited[25]
+        edited[25] = (clip_name, start + 2, length - 2)
+        changes = filmscribe.diff_lists(old_list, _assemble_list(edited))
+        kinds = dict((change.kind, change) for change in changes)
+        self.assertEqual(11, kinds[filmscribe.FilmscribeChange.DELETED].old_event.id)
+        self.assertEqual(2, kinds[filmscribe.FilmscribeChange.TRIMMED].head_trim)
+        self.assertIn(filmscribe.FilmscribeChange.MOVED, kinds)
+        self.assertNotIn(filmscribe.FilmscribeChange.INSERTED, kinds)
+
+    def test_string_pool(self):
+        pool = filmscribe.FilmscribeStringPool()
+        first = filmscribe.FilmscribeFile.from_file(self.synthetic, strings=pool)
+        second = pool.share(filmscribe.FilmscribeFile.from_file(self.synthetic))
+        self.assertIs(pool, second.strings)
+        for one, other in zip(first.assemble_lists[0].events, second.assemble_lists[0].events):
+            if not isinstance(one, filmscribe.FilmscribeLocatorEvent):
+                self.assertIs(one.source.clip_name, other.source.clip_name)
+                self.assertIs(one.source.custom.values[0], other.source.custom.values[0])
+        batch = list(filmscribe.FilmscribeFile.from_files([self.synthetic, TESTDATA], jobs=2))
+        self.assertEqual([None, None], [result.filmscribe_file.strings for result in batch])
+        self.assertEqual(model(first), model(batch[0].filmscribe_file))
+        pooled = list(filmscribe.FilmscribeFile.from_files([self.synthetic, self.synthetic], jobs=2, strings=pool))
+        self.assertIs(pool, pooled[1].filmscribe_file.strings)
+        self.assertIs(first.assemble_lists[0].events[0].source.clip_name,
+                      pooled[1].filmscribe_file.assemble_lists[0].events[0].source.clip_name)
+        codes = list(pool.codes([u'new', u'other', u'new', None]))
+        self.assertEqual([codes[0], codes[0] + 1, codes[0], -1], codes)
+        self.assertEqual(u'other', pool.values[codes[1]])
+
+    def test_xml_round_trip(self):
+        for path in (TESTDATA, self.synthetic):
+            filmscribe_file = filmscribe.FilmscribeFile.from_file(path)
+            written = self.path('written.xml')
+            filmscribe_file.to_xml(written)
+            self.assertEqual(model(filmscribe_file), model(filmscribe.FilmscribeFile.from_file(written)))
+
+    def test_source_index(self):
+        index = filmscribe.FilmscribeSourceIndex()
+        index.add('synthetic', self.synthetic_file)
+        event = self.synthetic_file.assemble_lists[1].events[5]
+        self.assertIn(event, [found for _, _, found in index.events('cam_roll', event.source.cam_roll)])
+        self.assertEqual(len(index.events('cam_roll', event.source.cam_roll)),
+                         index.count('cam_roll', event.source.cam_roll))
+        self.assertIsNotNone(event.source.lab_roll)
+        self.assertIn(event, [found for _, _, found in index.events('lab_roll', event.source.lab_roll)])
+        index.remove('synthetic')
+        self.assertEqual(0, index.count('cam_roll', event.source.cam_roll))
+
+    def test_source_index_positions(self):
+        index = filmscribe.FilmscribeSourceIndex()
+        names = ['reel {0}'.format(number) for number in range(6)]
+        for name in names:
+            index.add(name, self.synthetic_file)
+        index.remove(names[2])
+        index.add(names[2], self.synthetic_file)
+        lists = self.synthetic_file.assemble_lists + self.synthetic_file.optical_lists
+        expected = [(i, k) for i, filmscribe_list in enumerate(lists) for k, event in enumerate(filmscribe_list.events)
+                    if filmscribe._peek(event, 'source') is not None and event.source.clip_name == u'1A/1']
+        self.assertTrue(expected)
+        found = index.lookup('clip_name', u'1A/1')
+        self.assertEqual(sorted((name, i, k) for name in names for i, k in expected), sorted(found))
+        self.assertEqual(names[:2] + names[3:] + names[2:3], [name for name, _, _ in found][::len(expected)])
+
+        many_lists = filmscribe.FilmscribeFile()
+        for _ in range(1 << 12):
+            many_lists.add_assemble_list(filmscribe.FilmscribeAssembleList())
+        self.assertRaises(ValueError, index.add, 'many lists', many_lists)
+
+    def test_source_ranges(self):
+        lists = self.synthetic_file.assemble_lists
+        ranges = filmscribe.FilmscribeSourceRanges(lists, key='clip_name', basis='frame')
+        entries = [(event.source.clip_name, event.source.start.frame, event.source.end.frame, (i, k))
+                   for i, filmscribe_list in enumerate(lists) for k, event in enumerate(filmscribe_list.events)
+                   if not isinstance(event, filmscribe.FilmscribeLocatorEvent)]
+        self.assertEqual(len(entries), len(ranges))
+        expected = set((first[3], second[3]) for n, first in enumerate(entries) for second in entries[n + 1:]
+                       if first[0] == second[0] and first[1] <= second[2] and second[1] <= first[2])
+        self.assertEqual(expected, set((dupe.first_position, dupe.second_position) for dupe in ranges.dupes()))
+        reused = set(max(pair) for pair in expected)
+        self.assertEqual(len(reused), ranges.dupe_count())
+        for pull in ranges.pull_list(handles=8):
+            for i, k in pull.positions:
+                source = lists[i].events[k].source
+                self.assertTrue(pull.start <= source.start.frame - 8 or pull.start == 0)
+                self.assertTrue(source.end.frame + 8 <= pull.end)
+
+    def test_dupe_count_heads(self):
+        filmscribe_file = filmscribe.FilmscribeFile.from_file(self.synthetic)
+        counts = filmscribe.FilmscribeSourceRanges(filmscribe_file.assemble_lists).dupe_counts()
+        self.assertTrue(any(counts))
+        for filmscribe_list, count in zip(filmscribe_file.assemble_lists, counts):
+            filmscribe_list.head.dupe_count = count
+        path = self.path('dupes.xml')
+        filmscribe_file.to_xml(path)
+        parsed = filmscribe.FilmscribeFile.from_file(path)
+        self.assertEqual(counts, [filmscribe_list.head.dupe_count for filmscribe_list in parsed.assemble_lists])
+        self.assertEqual(counts, filmscribe.FilmscribeSourceRanges(parsed.assemble_lists).dupe_counts())
+        decoded = filmscribe.FilmscribeBinaryFile.from_buffer(parsed.to_binary()).to_filmscribe_file()
+        self.assertEqual(counts, [filmscribe_list.head.dupe_count for filmscribe_list in decoded.assemble_lists])
+        with filmscribe.FilmscribeSqliteStore() as store:
+            store.write([('dupes', parsed)])
+            self.assertEqual(counts, [count for count, in store.query(
+                'SELECT dupe_count FROM lists ORDER BY id')][:len(counts)])
+
+    def test_sqlite_store(self):
+        with filmscribe.FilmscribeSqliteStore() as store:
+            written = store.write([('synthetic', self.synthetic_file), ('testdata',
+                                                                        filmscribe.FilmscribeFile.from_file(TESTDATA))])
+            self.assertEqual(written, store.query('SELECT COUNT(*) FROM events')[0][0])
+            events = sum(len(filmscribe_list.events) for filmscribe_list in
+                         self.synthetic_file.assemble_lists + self.synthetic_file.optical_lists)
+            self.assertEqual([(events,)], store.query(
+                'SELECT COUNT(*) FROM events JOIN lists ON events.list_id = lists.id JOIN files ON '
+                'lists.file_id = files.id WHERE files.name = ?', ('synthetic',)))
+            store.upsert('synthetic', self.synthetic_file)
+            self.assertEqual([u'testdata', u'synthetic'], store.files)
+            self.assertEqual(written, store.query('SELECT COUNT(*) FROM events')[0][0])
+            self.assertTrue(store.remove('synthetic'))
+            self.assertEqual(written - events, store.query('SELECT COUNT(*) FROM events')[0][0])
+
+            # Lists built in code may have no head.
+            built = filmscribe.FilmscribeFile()
+            built.add_assemble_list(_assemble_list([('clip', 0, 24), ('clip', 100, 48)]))
+            self.assertEqual(2, store.write([('built', built)]))
+            self.assertEqual([(None, None, None, None)], store.query(
+                'SELECT title, dupe_count, edit_rate, duration_frame FROM lists JOIN files ON '
+                'lists.file_id = files.id WHERE files.name = ?', ('built',)))
+
+    def test_split_parse(self):
+        for options in ({}, {'convert_times': True, 'lists': ['SCENE 2', 'OPTICALS 1']}):
+            expected = filmscribe.FilmscribeFile.from_file(self.synthetic, **options)
+            split = filmscribe.FilmscribeFile()
+            self.assertTrue(filmscribe._parse_split(split, self.synthetic, 2, None, dict(
+                options, backend=None, fields=None, heads_only=False, max_lists=None, stats=None)))
+            self.assertEqual(model(expected), model(split))
+            self.assertEqual(expected.to_binary(), split.to_binary())
+
+    def test_optical_index(self):
+        index = self.synthetic_file.optical_index
+        self.assertEqual([], index.unresolved)
+        for assemble_list, optical_list in index.pairs:
+            for event in optical_list.events:
+                if isinstance(event, filmscribe.FilmscribeLocatorEvent):
+                    continue
+                assemble_event = index.assemble_event(event)
+                self.assertEqual(event.ref_num, assemble_event.id)
+                self.assertIn(event, index.optical_events(assemble_event))
+        self.assertEqual(len(self.synthetic_file.optical_lists), len(index.pairs))
+
+
+class TimeEngineTest(unittest.TestCase):
+
+    def test_edgecode(self):
+        engine = filmscribe.FilmscribeTimeEngine(24)
+        self.assertEqual(5015 * 16 + 2, engine.edgecode_to_frames('5015+02'))
+        self.assertEqual('5015+02', engine.frames_to_edgecode(5015 * 16 + 2))
+        keynum = engine.edgecode_to_frames('EH 75 3015-0021+06')
+        self.assertEqual(30150021 * 16 + 6, keynum)
+        self.assertEqual('EH 75 3015-0021+06', engine.frames_to_edgecode(keynum, 'EH 75'))
+        sixteen = filmscribe.FilmscribeTimeEngine(24, frames_per_foot=40)
+        self.assertEqual(10 * 40 + 3, sixteen.edgecode_to_frames('0010+03'))
+        self.assertIsNone(engine.edgecode_to_frames('bogus'))
+        self.assertEqual([5015 * 16 + 2, -1], list(engine.edgecodes_to_frames(['5015+02', None])))
+
+    def test_convert_times(self):
+        engine = filmscribe.FilmscribeTimeEngine.for_rate(24.0)
+        events = filmscribe.FilmscribeFile.from_file(TESTDATA, convert_times=True).assemble_lists[0].events
+        points = [point for event in events if isinstance(event, filmscribe.FilmscribeCutEvent)
+                  for point in (event.source.start, event.source.end)]
+        self.assertEqual([engine.timecode_to_frames(point.timecode) for point in points],
+                         [point.timecode_frames for point in points])
+        self.assertEqual([engine.edgecode_to_frames(point.edgecode) for point in points],
+                         [point.edgecode_frames for point in points])
+        self.assertTrue(all(point.edgecode_frames is not None for point in points))
+        source = filmscribe.FilmscribeFile.from_file(TESTDATA).assemble_lists[0].events[0].source
+        self.assertEqual((None, None), (source.start.timecode_frames, source.start.edgecode_frames))
+
+    def test_testdata_timecodes_increase(self):
+        filmscribe_file = filmscribe.FilmscribeFile.from_file(TESTDATA, convert_times=True)
+        engine = filmscribe.FilmscribeTimeEngine.for_rate(24.0)
+        points = sorted((point.frame, point.timecode, point.timecode_frames)
+                        for event in filmscribe_file.assemble_lists[0].events
+                        for point in (event.master.start, filmscribe._peek(event.master, 'end'))
+                        if point is not None and point.timecode is not None)
+        self.assertEqual(55, len(points))
+        frames = [timecode_frames for _, _, timecode_frames in points]
+        self.assertEqual(sorted(set(frames)), frames)
+        # TC1 runs with the master frames, one timecode frame count per master frame.
+        self.assertEqual(set([points[0][2] - points[0][0]]),
+                         set(timecode_frames - frame for frame, _, timecode_frames in points))
+        for _, timecode, timecode_frames in points:
+            self.assertEqual(timecode, engine.frames_to_timecode(timecode_frames))
+
+    def test_pulldown(self):
+        engine = filmscribe.FilmscribeTimeEngine(24)
+        self.assertEqual((30, True), (engine.timecode_rate, engine.pulldown))
+        self.assertEqual(86400, engine.timecode_to_frames('01:00:00:00'))
+        self.assertEqual(86543, engine.timecode_to_frames('01:00:05:29'))
+        self.assertEqual(86544, engine.timecode_to_frames('01:00:06:00'))
+        self.assertEqual(['01:00:00:00', '01:00:00:01', '01:00:00:03', '01:00:00:04', '01:00:00:05'],
+                         [engine.frames_to_timecode(86400 + frames) for frames in range(5)])
+        for frames in range(0, 3000000, 97):
+            self.assertEqual(frames, engine.timecode_to_frames(engine.frames_to_timecode(frames)))
+        previous = -1
+        for video in range(0, 30 * 120):
+            seconds, ff = divmod(video, 30)
+            frames = engine.timecode_to_frames('00:{0:02d}:{1:02d}:{2:02d}'.format(seconds // 60, seconds % 60, ff))
+            self.assertTrue(previous <= frames <= previous + 1)
+            previous = frames
+
+    def test_timecode_rates(self):
+        self.assertEqual(86400 + 5 * 24 + 23, filmscribe.FilmscribeTimeEngine.for_rate(
+            24, 'TC24').timecode_to_frames('01:00:05:23'))
+        self.assertEqual(90000 + 24, filmscribe.FilmscribeTimeEngine.for_rate(25).timecode_to_frames('01:00:00:24'))
+        drop_frame = filmscribe.FilmscribeTimeEngine.for_rate(29.97)
+        self.assertEqual(1800, drop_frame.timecode_to_frames('00:01:00;02'))
+        self.assertEqual(17982, drop_frame.timecode_to_frames('00:10:00;00'))
+        for frames in range(0, 300000, 13):
+            self.assertEqual(frames, drop_frame.timecode_to_frames(drop_frame.frames_to_timecode(frames)))
+
+    def test_invalid_timecodes(self):
+        engine = filmscribe.FilmscribeTimeEngine(24)
+        for value in ('00:00:00:99', '00:00:00:30', '00:00:60:00', '00:60:00:00', '00:01:00;00', 'EH 75', None):
+            self.assertIsNone(engine.timecode_to_frames(value), value)
+        self.assertIsNone(filmscribe.FilmscribeTimeEngine.for_rate(24, 'TC24').timecode_to_frames('00:00:00:24'))
+
+
+class EdlWriterTest(FilmscribeTestCase):
+
+    def test_layout(self):
+        filmscribe_list = filmscribe.FilmscribeFile.from_file(self.synthetic).assemble_lists[0]
+        edl = filmscribe_list.to_edl()
+        lines = edl.splitlines()
+        self.assertEqual(['TITLE: SCENE 1', 'FCM: NON-DROP FRAME'], lines[:2])
+        cuts = [event for event in filmscribe_list.events if not isinstance(event, filmscribe.FilmscribeLocatorEvent)]
+        self.assertEqual(['{0:03d}'.format(number) for number in range(1, len(cuts) + 1)],
+                         [line[:3] for line in lines if line[:3].isdigit()])
+        self.assertEqual([event.source.clip_name for event in cuts],
+                         [line[18:] for line in lines if line.startswith('* FROM CLIP NAME: ')])
+        path = self.path('list.edl')
+        filmscribe_list.to_edl(path)
+        with open(path, 'rb') as infile:
+            self.assertEqual(edl, infile.read())
+
+    def check_edl(self, filmscribe_list):
+        engine = filmscribe.FilmscribeTimeEngine.for_rate(filmscribe_list.head.edit_rate)
+        lines = filmscribe_list.to_edl().splitlines()
+        records = [line.split()[-4:] for line in lines if line[:3].isdigit()]
+        cuts = [event for event in filmscribe_list.events if not isinstance(event, filmscribe.FilmscribeLocatorEvent)]
+        self.assertEqual(len(cuts), len(records))
+        self.assertEqual(cuts[0].master.start.timecode, records[0][2])
+        for event, (source_in, source_out, record_in, record_out) in zip(cuts, records):
+            length = int(event.length)
+            self.assertEqual(length, engine.timecode_to_frames(record_out) - engine.timecode_to_frames(record_in))
+            self.assertEqual(length, engine.timecode_to_frames(source_out) - engine.timecode_to_frames(source_in))
+        for previous, following in zip(records, records[1:]):
+            self.assertEqual(previous[3], following[2])
+        locators = [event for event in filmscribe_list.events if isinstance(event, filmscribe.FilmscribeLocatorEvent)]
+        self.assertEqual([event.master.start.timecode for event in locators if filmscribe._peek(event, 'master')],
+                         [line.split()[2] for line in lines if line.startswith('* LOC:')])
+
+    def test_testdata(self):
+        filmscribe_list = filmscribe.FilmscribeFile.from_file(TESTDATA).assemble_lists[0]
+        self.check_edl(filmscribe_list)
+        self.assertIn('* LOC: 01:00:05:29 ', filmscribe_list.to_edl())
+
+    def test_synthetic(self):
+        filmscribe_file = filmscribe.FilmscribeFile.from_file(self.synthetic)
+        for filmscribe_list in filmscribe_file.assemble_lists + filmscribe_file.optical_lists:
+            self.check_edl(filmscribe_list)
+
+
+class BenchmarkTest(FilmscribeTestCase):
+
+    def test_generator(self):
+        generator = benchmark.FilmscribeGenerator(events=50, assemble_lists=2, optical_lists=1, optical_events=10,
+                                                  seed=3)
+        path = self.path('generated.xml')
+        count = generator.write(path)
+        with open(path, 'rb') as infile:
+            data = infile.read()
+        generator.write(path)
+        with open(path, 'rb') as infile:
+            self.assertEqual(data, infile.read())
+        filmscribe_file = filmscribe.FilmscribeFile.from_file(path)
+        lists = filmscribe_file.assemble_lists + filmscribe_file.optical_lists
+        self.assertEqual(['SCENE 1', 'SCENE 2', 'OPTICALS 1'],
+                         [filmscribe_list.head.title for filmscribe_list in lists])
+        self.assertEqual(count, sum(len(filmscribe_list.events) for filmscribe_list in lists))
+        self.assertEqual([], benchmark.conformance([path]))
+
+    def test_compare(self):
+        baseline = {'from_file': {'events_per_sec': 1000.0, 'peak_rss_mb': 100.0}}
+        results = {'from_file': {'events_per_sec': 850.0, 'peak_rss_mb': 105.0}, 'columns': {'events_per_sec': 1.0}}
+        self.assertEqual([('from_file', 'events_per_sec', 1000.0, 850.0)], benchmark.compare(results, baseline))
+        self.assertEqual([], benchmark.compare(results, baseline, threshold=0.2))
+
+    def test_without_resource(self):
+        # Platforms without the resource module report no memory.
+        modules = (benchmark, filmscribe)
+        saved = [module.resource for module in modules]
+        try:
+            for module in modules:
+                module.resource = None
+            result = benchmark._run_case(('iter_events', self.synthetic, self.path('synthetic.bin'), 1))
+        finally:
+            for module, resource in zip(modules, saved):
+                module.resource = resource
+        self.assertTrue(result['events'])
+        self.assertEqual((0, None), (result['peak_rss_mb'], result['peak_rss_delta_mb']))
+
+
+class WatcherTest(FilmscribeTestCase):
+
+    def watch(self, paths, **options):
+        results = []
+        watcher = filmscribe.FilmscribeWatcher(paths, results.append, interval=0.1, settle=0.0, **options)
+        return watcher, results
+
+    def test_once(self):
+        directory = self.path('exports')
+        os.mkdir(directory)
+        shutil.copy(self.synthetic, os.path.join(directory, 'reel1.xml'))
+        with open(os.path.join(directory, 'broken.xml'), 'wb') as outfile:
+            outfile.write(b'<FilmScribeFile>')
+        state_file = self.path('state.json')
+        watcher, results = self.watch([directory], jobs=2, state_file=state_file)
+        watcher.run(once=True)
+        self.assertEqual([(os.path.basename(result.filename), result.ok) for result in results],
+                         [('broken.xml', False), ('reel1.xml', True)])
+        self.assertEqual(3, len(results[1].filmscribe_file.assemble_lists))
+
+        # Unchanged files are not parsed again after a restart.
+        watcher, results = self.watch([directory], jobs=1, state_file=state_file)
+        watcher.run(once=True)
+        self.assertEqual([], results)
+
+    def test_timeout(self):
+        # Opening a pipe without a writer blocks the worker for good.
+        fifo = self.path('stuck.xml')
+        os.mkfifo(fifo)
+        watcher, results = self.watch([fifo], jobs=2, timeout=0.5)
+        watcher.run(once=True)
+        self.assertEqual(1, len(results))
+        self.assertFalse(results[0].ok)
+        self.assertIn('Timed out', results[0].error)
+        self.assertEqual(1, watcher.status()['timed_out'])
+
+    def test_stop_from_signal(self):
+        watcher, results = self.watch([self.synthetic], jobs=2)
+        previous = signal.signal(signal.SIGALRM, lambda *_: watcher.stop())
+        try:
+            signal.setitimer(signal.ITIMER_REAL, 0.5)
+            watcher.run()
+        finally:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, previous)
+        self.assertTrue(watcher.stopping)
+        self.assertEqual([self.synthetic], [result.filename for result in results])
+
+
+def _gzip(data):
+    buf = BytesIO()
+    with gzip.GzipFile(fileobj=buf, mode='wb') as outfile:
+        outfile.write(data)
+    return buf.getvalue()
+
+
+if __name__ == '__main__':
+    unittest.main()